@@ -2,19 +2,58 @@
 
 ⚠️ ALPHA VERSION - Experimental ⚠️
 This API is in ALPHA stage and should be considered experimental.
+
+    python app.py                 # development: one worker, auto-reload
+    python app.py --production    # SERVER_WORKERS workers, no reload
+    gunicorn -c gunicorn.conf.py
+
+The app is built on first access of app.app, so only the worker processes
+that serve requests build a pipeline, never a supervising parent process.
 """
 
+import argparse
+import os
 import uvicorn
 from knitty.api.app import create_app
+from knitty.config.settings import get_settings
+from knitty.core.task_queue import check_server_workers
 
-app = create_app()
 
-if __name__ == "__main__":
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+def __getattr__(name: str):
+    """Build the app when a server loads "app:app"."""
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Knitty API")
+    parser.add_argument("--production", action="store_true", help="Multi-worker, no reload")
+    parser.add_argument("--workers", type=int, help="Worker processes (default SERVER_WORKERS)")
+    args = parser.parse_args()
+    settings = get_settings()
+    
+    if args.production:
+        workers = args.workers or settings.server_workers or os.cpu_count() or 1
+        try:
+            check_server_workers(settings, workers)
+        except ValueError as e:
+            parser.error(str(e))
+        uvicorn.run(
+            "knitty.api.app:create_app",
+            factory=True,
+            host=settings.server_host,
+            port=settings.server_port,
+            workers=workers,
+            timeout_graceful_shutdown=int(settings.server_drain_timeout),
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
@@ -0,0 +1 @@
+"""Offline benchmarks for Knitty using fake LLM and embedding backends."""
@@ -0,0 +1,84 @@
+"""Compare two benchmark result files.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.10]
+
+Exits with status 1 when any scenario's p95 latency grew, or its throughput
+dropped, by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+Key = Tuple[str, int]
+
+
+def load(path: Path) -> Tuple[Dict[str, Any], Dict[Key, Dict[str, Any]]]:
+    """Read a results file into (meta, results keyed by scenario and concurrency)."""
+    report = json.loads(path.read_text(encoding="utf-8"))
+    results = {(r["scenario"], r["concurrency"]): r for r in report["results"]}
+    return report["meta"], results
+
+
+def change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    """Relative change from before to after."""
+    if not before or after is None:
+        return None
+    return (after - before) / before
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print a comparison table and return the exit status."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+    
+    base_meta, baseline = load(args.baseline)
+    cand_meta, candidate = load(args.candidate)
+    print(f"baseline  {base_meta.get('revision')}  {base_meta.get('timestamp')}")
+    print(f"candidate {cand_meta.get('revision')}  {cand_meta.get('timestamp')}")
+    print(f"{'scenario':<30} {'c':>3} {'p50 ms':>19} {'p95 ms':>19} {'throughput/s':>21}")
+    
+    regressions = []
+    for key in sorted(set(baseline) & set(candidate)):
+        before, after = baseline[key], candidate[key]
+        cells = []
+        for metric in ("p50", "p95"):
+            old = (before["latency_ms"] or {}).get(metric)
+            new = (after["latency_ms"] or {}).get(metric)
+            delta = change(old, new)
+            if delta is None:
+                cells.append(f"{'-':>19}")
+            else:
+                cells.append(f"{new:>9.2f} ({delta:+6.1%})")
+            if metric == "p95" and delta is not None and delta > args.threshold:
+                regressions.append(f"{key[0]} c={key[1]}: p95 {delta:+.1%}")
+        
+        old_tp, new_tp = before["throughput_per_second"], after["throughput_per_second"]
+        delta = change(old_tp, new_tp)
+        cells.append(f"{new_tp:>11.2f} ({delta:+6.1%})" if delta is not None else f"{'-':>21}")
+        if delta is not None and delta < -args.threshold:
+            regressions.append(f"{key[0]} c={key[1]}: throughput {delta:+.1%}")
+        
+        print(f"{key[0]:<30} {key[1]:>3} " + " ".join(cells))
+    
+    missing = sorted(set(baseline) ^ set(candidate))
+    if missing:
+        print(f"\nNot in both files: {', '.join(f'{s} c={c}' for s, c in missing)}")
+    
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
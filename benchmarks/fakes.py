@@ -0,0 +1,144 @@
+"""Deterministic stand-ins for the chat and embedding providers.
+
+Responses depend only on the input messages, so runs are reproducible and
+comparable between commits. Latency is simulated with a fixed base delay
+plus a per-token cost, both configurable.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import Counter
+from typing import Any, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+WORD = re.compile(r"[A-Za-z][A-Za-z+#.\-]{2,}")
+STOPWORDS = {
+    "the", "and", "for", "with", "you", "your", "are", "our", "will", "this", "that",
+    "from", "have", "has", "all", "any", "not", "but", "who", "can", "into", "their",
+}
+
+
+def top_words(text: str, count: int = 25) -> List[str]:
+    """Most frequent non-trivial words of text, ties broken alphabetically."""
+    words = Counter(
+        word.lower() for word in WORD.findall(text) if word.lower() not in STOPWORDS
+    )
+    return [word for word, _ in sorted(words.items(), key=lambda item: (-item[1], item[0]))[:count]]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers Knitty's prompts without a provider.
+    
+    Conversations with a system message are treated as job RAG extraction
+    (JSON object), keyword prompts get a JSON array of frequent words, and
+    anything else (the enhancement prompt) gets a markdown CV.
+    """
+    
+    model_name: str = "fake-chat"
+    temperature: float = 0.0
+    latency: float = 0.05
+    seconds_per_token: float = 0.0
+    
+    @property
+    def _llm_type(self) -> str:
+        return "knitty-fake-chat"
+    
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if any(isinstance(message, SystemMessage) for message in messages):
+            words = top_words(messages[-1].content, 40)
+            return json.dumps({
+                "job_title": " ".join(words[:2]).title(),
+                "summary": " ".join(words[:15]),
+                "responsibilities": words[15:25],
+                "qualifications": words[25:40],
+            })
+        if "keyword" in prompt.lower() and "JSON" in prompt:
+            return json.dumps(top_words(prompt))
+        
+        # Enhancement: a CV that reuses the prompt's most frequent terms
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        words = top_words(prompt, 60)
+        sections = [f"# Candidate {digest}", "## Profile", " ".join(words[:20])]
+        sections += ["## Skills"] + [f"- {word}" for word in words[20:60]]
+        return "\n".join(sections)
+    
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        content = self._respond(messages)
+        input_tokens = sum(len(str(m.content)) // 4 for m in messages)
+        output_tokens = len(content) // 4
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))],
+            llm_output={"token_usage": {
+                "prompt_tokens": input_tokens, "completion_tokens": output_tokens
+            }},
+        )
+    
+    def _delay(self, messages: List[BaseMessage]) -> float:
+        tokens = sum(len(str(m.content)) for m in messages) // 4
+        return self.latency + tokens * self.seconds_per_token
+    
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self._delay(messages))
+        return self._result(messages)
+    
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self._delay(messages))
+        return self._result(messages)
+
+
+class FakeEmbeddings(Embeddings):
+    """Feature-hashed bag-of-words vectors with simulated request latency."""
+    
+    def __init__(self, dimensions: int = 256, latency: float = 0.02, seconds_per_text: float = 0.0):
+        """Initialize fake embeddings."""
+        self.dimensions = dimensions
+        self.latency = latency
+        self.seconds_per_text = seconds_per_text
+        self.calls = 0
+    
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in WORD.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector.tolist()
+    
+    def _delay(self, count: int) -> float:
+        return self.latency + count * self.seconds_per_text
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self._delay(len(texts)))
+        return [self._vector(text) for text in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self._vector(text) for text in texts]
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
@@ -0,0 +1,149 @@
+"""Synthetic inputs and a local HTTP server for job pages."""
+
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+
+SKILLS = [
+    "Python", "FastAPI", "PostgreSQL", "Kubernetes", "Docker", "Terraform", "AWS", "GCP",
+    "React", "TypeScript", "GraphQL", "Kafka", "Redis", "Airflow", "Spark", "PyTorch",
+    "LangChain", "CI/CD", "Observability", "Microservices", "gRPC", "Linux", "Go", "Rust",
+]
+VERBS = ["Designed", "Built", "Led", "Migrated", "Optimized", "Automated", "Scaled", "Shipped"]
+NOUNS = ["pipeline", "service", "platform", "dashboard", "API", "data model", "cluster", "workflow"]
+
+
+def synthetic_lines(seed: int, count: int) -> List[str]:
+    """Deterministic CV-like sentences."""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(VERBS)} a {rng.choice(NOUNS)} using {rng.choice(SKILLS)} and "
+        f"{rng.choice(SKILLS)}, improving {rng.choice(NOUNS)} throughput by {rng.randint(5, 90)}%."
+        for _ in range(count)
+    ]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines: List[str], lines_per_page: int = 50) -> bytes:
+    """Build a minimal multi-page text PDF (Helvetica, one text object per page)."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page ids are known
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page_lines in pages:
+        body = "BT /F1 9 Tf 12 TL 40 800 Td " + " ".join(
+            f"({_pdf_escape(line)}) '" for line in page_lines
+        ) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    ).encode("latin-1")
+    return bytes(out)
+
+
+def job_posting_text(seed: int, paragraphs: int = 8) -> str:
+    """Deterministic job posting text."""
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, 10)
+    lines = [f"Senior {skills[0]} Engineer", "", "Responsibilities:"]
+    lines += [f"- {sentence}" for sentence in synthetic_lines(seed, paragraphs * 3)]
+    lines += ["", "Requirements:"]
+    lines += [f"- {years}+ years with {skill}" for years, skill in zip(range(2, 12), skills)]
+    return "\n".join(lines)
+
+
+def job_page_html(seed: int, filler_paragraphs: int = 40, json_ld: bool = False) -> str:
+    """A job page with navigation, scripts and boilerplate around the posting."""
+    posting = job_posting_text(seed).replace("\n", "<br>\n")
+    filler = "\n".join(f"<p>{line}</p>" for line in synthetic_lines(seed + 1, filler_paragraphs))
+    script = "<script>" + "var tracking = {};" * 200 + "</script>"
+    nav = '<a href="#">link</a>' * 50
+    ld = ""
+    if json_ld:
+        data = {
+            "@type": "JobPosting",
+            "title": f"Engineer {seed}",
+            "description": job_posting_text(seed),
+        }
+        ld = f'<script type="application/ld+json">{json.dumps(data)}</script>'
+    return (
+        f"<html><head><title>Job {seed}</title>{script}{ld}</head><body>"
+        f"<nav>{nav}</nav>"
+        f"<main><h1>Job {seed}</h1>{posting}</main>"
+        f"<footer>{filler}</footer></body></html>"
+    )
+
+
+class JobPageServer:
+    """Serves synthetic job pages at http://127.0.0.1:<port>/job/<seed>[?jsonld=1]."""
+    
+    def __init__(self):
+        """Initialize server on a free port."""
+        pages: Dict[Tuple[int, bool], bytes] = {}
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                try:
+                    seed = int(path.rstrip("/").rsplit("/", 1)[-1])
+                except ValueError:
+                    self.send_error(404)
+                    return
+                key = (seed, "jsonld=1" in query)
+                if key not in pages:
+                    pages[key] = job_page_html(seed, json_ld=key[1]).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(pages[key])))
+                self.end_headers()
+                self.wfile.write(pages[key])
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+    
+    def url(self, seed: int, json_ld: bool = False) -> str:
+        return f"{self.base_url}/job/{seed}" + ("?jsonld=1" if json_ld else "")
+    
+    def __enter__(self) -> "JobPageServer":
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,136 @@
+"""Benchmark the local keyword extractor against the Fast LLM.
+
+Measures local extraction latency on examples/cv.md and
+examples/jobPostingText.txt and, given reference keywords, the share of
+reference keywords the local extractor also returns (recall):
+
+    # Latency only, offline
+    python -m benchmarks.keywords
+
+    # Reference keywords from the Fast LLM configured in .env (two live calls)
+    python -m benchmarks.keywords --live --output keywords.json
+
+    # Reference keywords saved earlier (JSON arrays)
+    python -m benchmarks.keywords --reference-cv cv.json --reference-job job.json
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from knitty.config.prompts import PromptManager
+from knitty.core.keyword_extractor import DictionaryKeywordExtractor, normalize
+from .fixtures import EXAMPLES_DIR
+from .run import ROOT, summarize
+
+
+def keyword_set(keywords: List[str]) -> set:
+    """Keywords compared case-insensitively, hyphens and slashes as spaces."""
+    return {normalize(keyword).strip().lower() for keyword in keywords}
+
+
+def recall(local: List[str], reference: List[str]) -> Dict[str, Any]:
+    """Share of reference keywords found by the local extractor."""
+    found = keyword_set(local)
+    expected = keyword_set(reference)
+    missed = sorted(expected - found)
+    return {
+        "reference_keywords": len(expected),
+        "recall": round(1 - len(missed) / len(expected), 3) if expected else None,
+        "missed": missed,
+    }
+
+
+def live_reference(sources: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Keywords and latency of the configured Fast LLM for each source."""
+    from knitty.config.settings import get_settings
+    from knitty.core.cv_processor import CVProcessor
+    from knitty.core.job_processor import JobProcessor
+    from knitty.core.llm_clients import LLMClients
+    from knitty.core.llm_cache import LLMResponseCache
+    
+    settings = get_settings()
+    prompt_manager = PromptManager(settings.config_dir)
+    llm_clients = LLMClients(settings)
+    cache = LLMResponseCache()
+    cv_processor = CVProcessor(llm_clients, prompt_manager, cache)
+    job_processor = JobProcessor(llm_clients, prompt_manager, settings, llm_cache=cache)
+    extract = {"cv": cv_processor.extract_keywords, "job": job_processor.extract_keywords}
+    reference = {}
+    for name, text in sources.items():
+        started = time.perf_counter()
+        with LLMResponseCache.bypassed():
+            keywords = json.loads(extract[name](text))
+        reference[name] = {
+            "keywords": keywords,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    return reference
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Time the local extractor and compare it with the reference keywords."""
+    sources = {
+        "cv": (EXAMPLES_DIR / "cv.md").read_text(encoding="utf-8"),
+        "job": (EXAMPLES_DIR / "jobPostingText.txt").read_text(encoding="utf-8"),
+    }
+    extractor = DictionaryKeywordExtractor(
+        PromptManager(str(ROOT / "config")), args.max_keywords
+    )
+    
+    reference: Dict[str, Dict[str, Any]] = {}
+    if args.live:
+        reference = live_reference(sources)
+    for name, path in (("cv", args.reference_cv), ("job", args.reference_job)):
+        if path:
+            reference[name] = {"keywords": json.loads(path.read_text(encoding="utf-8"))}
+    
+    results = {}
+    for name, text in sources.items():
+        keywords = json.loads(extractor.extract(text))  # also builds the automaton
+        samples = []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            extractor.extract(text)
+            samples.append(time.perf_counter() - started)
+        result = {"keywords": keywords, "latency_ms": summarize(samples)}
+        if name in reference:
+            result["reference"] = reference[name]
+            result.update(recall(keywords, reference[name]["keywords"]))
+        results[name] = result
+        
+        line = f"{name:<4} local p50={result['latency_ms']['p50']:.2f}ms keywords={len(keywords)}"
+        if "recall" in result:
+            line += f" recall={result['recall']} of {result['reference_keywords']}"
+        if "latency_ms" in result.get("reference", {}):
+            line += f" llm={result['reference']['latency_ms']}ms"
+        print(line)
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--live", action="store_true", help="Call the Fast LLM for references")
+    parser.add_argument("--reference-cv", type=Path, help="JSON array of CV keywords")
+    parser.add_argument("--reference-job", type=Path, help="JSON array of job keywords")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per source")
+    parser.add_argument("--max-keywords", type=int, default=60, help="KEYWORDS_LOCAL_MAX")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point."""
+    args = parse_args(argv)
+    results = run(args)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Run the offline benchmark suite.
+
+Every scenario runs at each concurrency level against fake chat/embedding
+models and a local job page server, so no provider keys or network access
+are needed and results are comparable between commits:
+    
+    python -m benchmarks.run --output before.json
+    git checkout my-branch
+    python -m benchmarks.run --output after.json
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from knitty.config.settings import Settings
+from knitty.core.keyword_extractor import DictionaryKeywordExtractor
+from knitty.core.llm_clients import LLMClients
+from knitty.core.local_embeddings import HashingEmbeddings
+from knitty.core.pipeline import EnhancementPipeline
+from .fakes import FakeChatModel, FakeEmbeddings
+from .fixtures import (
+    EXAMPLES_DIR, JobPageServer, job_page_html, job_posting_text, make_pdf, synthetic_lines
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+Operation = Callable[[int], Awaitable[Any]]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds."""
+    values = np.asarray(samples) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "mean": round(float(values.mean()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+async def measure(
+    name: str,
+    operation: Operation,
+    concurrency: int,
+    iterations: int
+) -> Dict[str, Any]:
+    """Run operation iterations times with bounded concurrency and collect statistics."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    
+    async def run_one(index: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await operation(index)
+            except Exception as e:
+                errors += 1
+                print(f"  {name} #{index} failed: {e}", file=sys.stderr)
+                return
+            latencies.append(time.perf_counter() - started)
+            if isinstance(result, dict):
+                for stage, seconds in result.get("stage_timings", {}).items():
+                    stages[stage].append(seconds)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(i) for i in range(iterations)))
+    wall = time.perf_counter() - started
+    
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "iterations": iterations,
+        "errors": errors,
+        "wall_seconds": round(wall, 4),
+        "throughput_per_second": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency_ms": summarize(latencies) if latencies else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages_ms": {stage: summarize(values) for stage, values in sorted(stages.items())},
+    }
+
+
+def build_pipeline(args: argparse.Namespace, workdir: Path) -> EnhancementPipeline:
+    """Pipeline wired to fake models, with persistent caches kept out of the way."""
+    settings = Settings(
+        _env_file=None,
+        fast_llm_api_key="fake", fast_llm_api_base="http://fake.invalid",
+        smart_llm_api_key="fake", smart_llm_api_base="http://fake.invalid",
+        embed_llm_api_key="fake", embed_llm_api_base="http://fake.invalid",
+        embed_llm_model_name="fake-embed",
+        config_dir=str(ROOT / "config"),
+        job_cache_enabled=False,
+        cv_store_enabled=False,
+        llm_cache_backend="none",
+        job_index_path=str(workdir / "job_index"),
+        task_queue_path=str(workdir / "tasks.sqlite"),
+        static_fetch_min_chars=200,
+        enhancement_candidates=args.candidates,
+    )
+    llm_clients = LLMClients(
+        settings,
+        fast_llm=FakeChatModel(
+            model_name="fake-fast", temperature=0.3, latency=args.fast_latency
+        ),
+        smart_llm=FakeChatModel(
+            model_name="fake-smart", temperature=0.7, latency=args.smart_latency,
+            seconds_per_token=args.smart_seconds_per_token
+        ),
+        embed_llm=FakeEmbeddings(latency=args.embed_latency),
+    )
+    return EnhancementPipeline(settings, llm_clients=llm_clients)
+
+
+def build_scenarios(
+    pipeline: EnhancementPipeline,
+    server: JobPageServer,
+    workdir: Path
+) -> Dict[str, Operation]:
+    """Benchmark operations keyed by scenario name; each takes an iteration index."""
+    example_pdf = str(EXAMPLES_DIR / "cv.pdf")
+    large_pdf = workdir / "large_cv.pdf"
+    large_pdf_bytes = make_pdf(synthetic_lines(7, 2000))
+    large_pdf.write_bytes(large_pdf_bytes)
+    large_pdf = str(large_pdf)
+    
+    pages = [job_page_html(seed) for seed in range(16)]
+    example_posting = (EXAMPLES_DIR / "jobPostingText.txt").read_text(encoding="utf-8")
+    cv_text = (EXAMPLES_DIR / "cv.md").read_text(encoding="utf-8")
+    keyword_sets = [", ".join(synthetic_lines(seed, 2)) for seed in range(200)]
+    keyword_extractor = DictionaryKeywordExtractor(pipeline.prompt_manager)
+    hashing_embeddings = HashingEmbeddings()
+    
+    async def pdf_example(i: int) -> Any:
+        return await pipeline.cv_processor.aextract_text_from_pdf(example_pdf)
+    
+    async def pdf_large(i: int) -> Any:
+        return await pipeline.cv_processor.aextract_text_from_pdf(large_pdf)
+    
+    async def pdf_large_bytes(i: int) -> Any:
+        return await pipeline.cv_processor.aextract_text_from_pdf(large_pdf_bytes)
+    
+    async def pdf_large_loader(i: int) -> Any:
+        # Previous implementation, kept as the reference point for the extractor
+        from langchain_community.document_loaders import PyPDFLoader
+        
+        def load() -> str:
+            return "\n".join(page.page_content for page in PyPDFLoader(large_pdf).load())
+        return await asyncio.to_thread(load)
+    
+    async def clean_html(i: int) -> Any:
+        return await asyncio.to_thread(pipeline.job_processor.clean_html, pages[i % len(pages)])
+    
+    async def keywords_local(i: int) -> Any:
+        return await keyword_extractor.aextract(f"{cv_text}\n{i}")
+    
+    async def similarity(i: int) -> Any:
+        # Unique text per iteration so the embedding cache does not hide provider calls
+        return await pipeline.similarity_calculator.acalculate_similarity(
+            f"{cv_text}\n{i}", job_posting_text(i)
+        )
+    
+    async def similarity_many(i: int) -> Any:
+        return await pipeline.similarity_calculator.acalculate_similarity_many(
+            f"{cv_text}\n{i}", [f"{keywords} {i}" for keywords in keyword_sets]
+        )
+    
+    async def embed_local_hashing(i: int) -> Any:
+        return await hashing_embeddings.aembed_documents(
+            [f"{keywords} {i}" for keywords in keyword_sets]
+        )
+    
+    async def pipeline_example(i: int) -> Any:
+        return await pipeline.process(example_pdf, job_posting_text=f"{example_posting}\n{i}")
+    
+    async def pipeline_large(i: int) -> Any:
+        return await pipeline.process(large_pdf, job_posting_text=job_posting_text(i, 40))
+    
+    async def pipeline_url(i: int) -> Any:
+        return await pipeline.process(example_pdf, job_posting_url=server.url(i))
+    
+    async def pipeline_url_jsonld(i: int) -> Any:
+        return await pipeline.process(example_pdf, job_posting_url=server.url(i, json_ld=True))
+    
+    return {
+        "pdf_extract_example": pdf_example,
+        "pdf_extract_large": pdf_large,
+        "pdf_extract_large_bytes": pdf_large_bytes,
+        "pdf_extract_large_pypdfloader": pdf_large_loader,
+        "clean_html": clean_html,
+        "keywords_local": keywords_local,
+        "similarity": similarity,
+        "similarity_many_200": similarity_many,
+        "embed_local_hashing_200": embed_local_hashing,
+        "pipeline_text_example": pipeline_example,
+        "pipeline_text_large": pipeline_large,
+        "pipeline_url_static": pipeline_url,
+        "pipeline_url_jsonld": pipeline_url_jsonld,
+    }
+
+
+def git_revision() -> Optional[str]:
+    """Current commit, if run inside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected scenarios at every concurrency level."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, JobPageServer() as server:
+        workdir = Path(tmp)
+        pipeline = build_pipeline(args, workdir)
+        scenarios = build_scenarios(pipeline, server, workdir)
+        selected = args.scenarios or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        
+        try:
+            for name in selected:
+                # Warm up imports, connection pools and the query-vector cache
+                await scenarios[name](-1)
+                for concurrency in args.concurrency:
+                    result = await measure(name, scenarios[name], concurrency, args.iterations)
+                    results.append(result)
+                    latency = result["latency_ms"] or {}
+                    print(
+                        f"{name:<30} c={concurrency:<3} "
+                        f"{result['throughput_per_second']:>9.2f}/s  "
+                        f"p50={latency.get('p50', 0):>9.2f}ms  "
+                        f"p95={latency.get('p95', 0):>9.2f}ms  "
+                        f"p99={latency.get('p99', 0):>9.2f}ms  rss={result['peak_rss_mb']}MB"
+                    )
+        finally:
+            await pipeline.aclose()
+    
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", nargs="*", help="Scenarios to run (default: all)")
+    parser.add_argument(
+        "--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 4, 16],
+        help="Comma-separated concurrency levels (default: 1,4,16)"
+    )
+    parser.add_argument("--iterations", type=int, default=32, help="Operations per level")
+    parser.add_argument("--fast-latency", type=float, default=0.05, help="Fast LLM latency (s)")
+    parser.add_argument("--smart-latency", type=float, default=0.2, help="Smart LLM latency (s)")
+    parser.add_argument(
+        "--smart-seconds-per-token", type=float, default=0.0,
+        help="Extra fake Smart LLM latency per prompt token (s)"
+    )
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Embedding latency (s)")
+    parser.add_argument("--candidates", type=int, default=1, help="ENHANCEMENT_CANDIDATES")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point."""
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
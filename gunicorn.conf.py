@@ -0,0 +1,38 @@
+"""Gunicorn configuration for the production profile.
+
+    pip install gunicorn
+    gunicorn -c gunicorn.conf.py
+
+Workers are uvicorn workers, one per CPU core unless SERVER_WORKERS is set.
+The application modules are imported once in the master so forked workers
+share their memory, but the app is built by the create_app factory in each
+worker: SQLite connections, thread pools, HTTP clients and browsers must not
+cross a fork. Every worker warms up in the background and reports it on
+GET /ready.
+"""
+
+import os
+import knitty.api.app  # noqa: F401  (preload modules, not app state)
+from knitty.config.settings import get_settings
+from knitty.core.task_queue import check_server_workers
+
+settings = get_settings()
+
+wsgi_app = "knitty.api.app:create_app()"
+bind = f"{settings.server_host}:{settings.server_port}"
+workers = settings.server_workers or os.cpu_count() or 1
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = False
+
+# Enhancements hold a request open for a minute or more; workers heartbeat
+# from the event loop, so this only catches a blocked loop
+timeout = 180
+keepalive = 5
+# SIGTERM: a worker stops accepting connections and finishes the requests in
+# flight; after graceful_timeout the master kills it
+graceful_timeout = settings.server_drain_timeout
+
+
+def on_starting(server):
+    """Refuse worker counts the task queue backend cannot serve (-w included)."""
+    check_server_workers(settings, server.cfg.workers)
@@ -4,16 +4,22 @@
 This API is in ALPHA stage and should be considered experimental.
 """
 
+import asyncio
+import base64
+import json
 import logging
-import tempfile
-from pathlib import Path
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from ..core.client_registry import get_client_registry
 from ..core.pipeline import EnhancementPipeline
+from ..core.task_queue import WorkerPool, create_task_queue
 from ..config.settings import get_settings
+from .lifecycle import ServerState
+from ..utils.telemetry import REGISTRY, render_gauges
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,14 +40,97 @@ class EnhancementResponse(BaseModel):
     improvement: float = Field(..., description="Improvement in similarity")
     cv_keywords: str = Field(..., description="Extracted CV keywords")
     job_keywords: str = Field(..., description="Extracted job keywords")
+    stage_timings: Dict[str, float] = Field(
+        default_factory=dict, description="Seconds spent in each pipeline stage"
+    )
+    cv_id: Optional[str] = Field(
+        None, description="Id of the stored CV; send it instead of cv_file next time"
+    )
+    prompt_tokens: Dict[str, Any] = Field(
+        default_factory=dict, description="Enhancement prompt tokens per section and compaction"
+    )
+    retry: Dict[str, Any] = Field(
+        default_factory=dict, description="Retry mode, rewritten sections and output tokens"
+    )
+
+
+class IndexPosting(BaseModel):
+    """A job posting to add to the job index."""
+    id: Optional[str] = Field(None, description="Posting id (default: normalized URL or text hash)")
+    title: Optional[str] = Field(None, description="Posting title")
+    job_posting_url: Optional[str] = Field(None, description="URL to job posting")
+    job_posting_text: Optional[str] = Field(None, description="Direct job posting text")
+    job_keywords: Optional[str] = Field(None, description="Precomputed job keywords")
+
+
+class BatchPosting(BaseModel):
+    """A single job posting in a batch enhancement request."""
+    job_posting_url: Optional[str] = Field(None, description="URL to job posting")
+    job_posting_text: Optional[str] = Field(None, description="Direct job posting text")
 
 
 def create_app() -> FastAPI:
     """Create and configure FastAPI application."""
+    # Initialize pipeline
+    settings = get_settings()
+    pipeline = EnhancementPipeline(settings)
+    
+    async def run_enhancement_task(payload: dict) -> dict:
+        """Run one queued enhancement."""
+        cv_pdf = payload.get("cv_pdf")
+        return await pipeline.process(
+            cv_pdf_path=base64.b64decode(cv_pdf) if cv_pdf else None,
+            job_posting_url=payload.get("job_posting_url"),
+            job_posting_text=payload.get("job_posting_text"),
+            additional_info=payload.get("additional_info"),
+            cv_id=payload.get("cv_id")
+        )
+    
+    task_queue = create_task_queue(settings)
+    worker_pool = WorkerPool(task_queue, run_enhancement_task, settings.task_workers)
+    
+    async def read_cv(cv_file: Optional[UploadFile], cv_id: Optional[str]) -> Optional[bytes]:
+        """Validate a CV given as an upload or a stored cv_id; returns uploaded PDF bytes."""
+        if cv_file is not None:
+            if cv_file.content_type != "application/pdf":
+                raise HTTPException(status_code=400, detail="File must be a PDF")
+            return await cv_file.read()
+        if not cv_id:
+            raise HTTPException(status_code=400, detail="Either cv_file or cv_id must be provided")
+        if pipeline.cv_store is None or not await asyncio.to_thread(
+            pipeline.cv_store.contains, cv_id
+        ):
+            raise HTTPException(status_code=404, detail="Unknown cv_id, upload the CV again")
+        return None
+    
+    server_state = ServerState()
+    
+    async def warm_up() -> None:
+        """Warm the pipeline in the background; /ready reports 503 until it is done."""
+        server_state.warmup = await pipeline.warmup()
+        server_state.warm = True
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Start task workers and warm-up; release long-lived resources on shutdown."""
+        await worker_pool.start()
+        warmup_task = None
+        if settings.warmup_enabled:
+            warmup_task = asyncio.create_task(warm_up())
+        else:
+            server_state.warm = True
+        yield
+        if warmup_task is not None:
+            warmup_task.cancel()
+        await worker_pool.stop()
+        await pipeline.aclose()
+        await get_client_registry().aclose()
+    
     app = FastAPI(
         title="Knitty API (ALPHA)",
         description="⚠️ ALPHA VERSION ⚠️\n\nAn intelligent CV tailoring system that optimizes resumes for specific job postings.\n\nThis API is experimental and in active development.",
         version="0.1.0-alpha",
+        lifespan=lifespan,
     )
     
     # CORS middleware
@@ -53,27 +142,143 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
-    # Initialize pipeline
-    pipeline = EnhancementPipeline()
-    
     @app.get("/health")
     async def health_check():
         """Health check endpoint."""
         return {"status": "healthy", "service": "knitty"}
     
+    @app.get("/live")
+    async def liveness():
+        """Liveness probe: the worker process is serving requests."""
+        return {"status": "alive", "uptime": server_state.stats["uptime"]}
+    
+    @app.get("/ready")
+    async def readiness():
+        """Readiness probe: 503 until warm-up has finished."""
+        return JSONResponse(
+            server_state.stats, status_code=200 if server_state.ready else 503
+        )
+    
+    @app.get("/api/v1/stats")
+    async def stats():
+        """Cache and runtime statistics."""
+        return {
+            "embedding_cache": pipeline.embedding_cache.stats,
+            "fetch_tiers": pipeline.job_processor.page_fetcher.stats,
+            "job_cache": pipeline.job_cache.stats if pipeline.job_cache else None,
+            "cv_store": pipeline.cv_store.stats if pipeline.cv_store else None,
+            "llm_cache": pipeline.llm_cache.stats,
+            "job_index": pipeline.job_index.stats,
+            "task_queue": await worker_pool.stats(),
+            "llm_providers": get_client_registry().stats,
+        }
+    
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Prometheus metrics: stage, LLM and embedding timings plus cache counters."""
+        cache_stats = {
+            "embedding": pipeline.embedding_cache.stats,
+            "job": pipeline.job_cache.stats if pipeline.job_cache else {},
+            "cv": pipeline.cv_store.stats if pipeline.cv_store else {},
+            "llm": pipeline.llm_cache.stats,
+        }
+        samples = {}
+        for cache, stats in cache_stats.items():
+            for stat, value in stats.items():
+                if isinstance(value, dict):
+                    # LLM cache counters are grouped per call site
+                    for outcome, count in value.items():
+                        samples[(cache, f"{stat}_{outcome}")] = count
+                else:
+                    samples[(cache, stat)] = value
+        for stat, value in pipeline.job_processor.page_fetcher.stats.items():
+            samples[("fetch_tiers", stat)] = value
+        for stat, value in (await worker_pool.stats()).items():
+            samples[("task_queue", stat)] = value
+        
+        runtime = render_gauges(
+            "knitty_runtime_stat", "Cache, fetch tier and task queue statistics",
+            ("component", "stat"), samples
+        )
+        return PlainTextResponse(
+            REGISTRY.render() + runtime, media_type="text/plain; version=0.0.4"
+        )
+    
+    @app.delete("/api/v1/job-cache")
+    async def invalidate_job_cache(url: Optional[str] = None):
+        """Invalidate one cached job posting, or the whole cache if no URL is given."""
+        if pipeline.job_cache is None:
+            raise HTTPException(status_code=404, detail="Job cache is disabled")
+        
+        if url:
+            return {"invalidated": 1 if pipeline.job_cache.invalidate(url) else 0}
+        return {"invalidated": pipeline.job_cache.clear()}
+    
+    @app.delete("/api/v1/llm-cache")
+    async def clear_llm_cache():
+        """Remove all cached LLM responses."""
+        return {"cleared": pipeline.llm_cache.clear()}
+    
+    @app.post("/api/v1/job-index/postings")
+    async def add_index_postings(postings: List[IndexPosting]):
+        """Add or replace postings in the job index."""
+        if not postings:
+            raise HTTPException(status_code=400, detail="At least one posting is required")
+        return await pipeline.index_postings(
+            [p.model_dump(exclude_none=True) for p in postings]
+        )
+    
+    @app.post("/api/v1/job-index/postings/jsonl")
+    async def add_index_postings_jsonl(
+        postings_file: UploadFile = File(..., description="JSON Lines file, one posting per line")
+    ):
+        """Add or replace postings in the job index from a JSON Lines dump."""
+        content = (await postings_file.read()).decode("utf-8")
+        try:
+            return await pipeline.index_jsonl(content.splitlines())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    @app.delete("/api/v1/job-index/postings/{posting_id:path}")
+    async def delete_index_posting(posting_id: str):
+        """Remove a posting from the job index."""
+        removed = await pipeline.remove_postings([posting_id])
+        if not removed:
+            raise HTTPException(status_code=404, detail="Posting not found")
+        return {"removed": removed}
+    
+    @app.post("/api/v1/job-index/search")
+    async def search_job_index(
+        cv_file: Optional[UploadFile] = File(None, description="CV PDF file"),
+        cv_id: Optional[str] = None,
+        k: Optional[int] = None,
+    ):
+        """Return the indexed postings that best match a CV (uploaded or stored)."""
+        cv_pdf = await read_cv(cv_file, cv_id)
+        
+        try:
+            matches = await pipeline.rank_postings(cv_pdf, k, cv_id=cv_id)
+            return {"matches": matches}
+        except Exception as e:
+            logger.error(f"Error searching job index: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+    
     @app.post("/api/v1/enhance-cv", response_model=EnhancementResponse)
     async def enhance_cv(
-        background_tasks: BackgroundTasks,
-        cv_file: UploadFile = File(..., description="CV PDF file"),
+        cv_file: Optional[UploadFile] = File(None, description="CV PDF file"),
+        cv_id: Optional[str] = None,
         job_posting_url: Optional[str] = None,
         job_posting_text: Optional[str] = None,
         additional_info: Optional[str] = None,
+        bypass_cache: bool = False,
     ):
         """
         Enhance CV to better match job posting.
         
-        Requires either job_posting_url or job_posting_text.
+        Requires either cv_file or cv_id (from POST /api/v1/cvs or an earlier
+        response), and either job_posting_url or job_posting_text.
         """
+        cv_pdf = await read_cv(cv_file, cv_id)
         try:
             # Validate input
             if not job_posting_url and not job_posting_text:
@@ -82,38 +287,28 @@ def create_app() -> FastAPI:
                     detail="Either job_posting_url or job_posting_text must be provided"
                 )
             
-            if cv_file.content_type != "application/pdf":
-                raise HTTPException(
-                    status_code=400,
-                    detail="File must be a PDF"
-                )
-            
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                content = await cv_file.read()
-                tmp_file.write(content)
-                tmp_path = tmp_file.name
+            # Process enhancement straight from the uploaded bytes (or stored CV)
+            result = await pipeline.process(
+                cv_pdf_path=cv_pdf,
+                job_posting_url=job_posting_url,
+                job_posting_text=job_posting_text,
+                additional_info=additional_info,
+                bypass_cache=bypass_cache,
+                cv_id=cv_id
+            )
             
-            try:
-                # Process enhancement
-                result = await pipeline.process(
-                    cv_pdf_path=tmp_path,
-                    job_posting_url=job_posting_url,
-                    job_posting_text=job_posting_text,
-                    additional_info=additional_info
-                )
-                
-                return EnhancementResponse(
-                    enhanced_cv=result["enhanced_cv"],
-                    baseline_similarity=result["baseline_similarity"],
-                    final_similarity=result["final_similarity"],
-                    improvement=result["improvement"],
-                    cv_keywords=result["cv_keywords"],
-                    job_keywords=result["job_keywords"],
-                )
-            finally:
-                # Clean up temporary file
-                background_tasks.add_task(lambda: Path(tmp_path).unlink(missing_ok=True))
+            return EnhancementResponse(
+                enhanced_cv=result["enhanced_cv"],
+                baseline_similarity=result["baseline_similarity"],
+                final_similarity=result["final_similarity"],
+                improvement=result["improvement"],
+                cv_keywords=result["cv_keywords"],
+                job_keywords=result["job_keywords"],
+                stage_timings=result["stage_timings"],
+                cv_id=result["cv_id"],
+                prompt_tokens=result["prompt_tokens"],
+                retry=result["retry"],
+            )
         
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -121,28 +316,194 @@ def create_app() -> FastAPI:
             logger.error(f"Error enhancing CV: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
+    @app.post("/api/v1/enhance-cv/stream")
+    async def enhance_cv_stream(
+        cv_file: Optional[UploadFile] = File(None, description="CV PDF file"),
+        cv_id: Optional[str] = None,
+        job_posting_url: Optional[str] = None,
+        job_posting_text: Optional[str] = None,
+        additional_info: Optional[str] = None,
+        bypass_cache: bool = False,
+    ):
+        """
+        Enhance CV and stream progress as Server-Sent Events.
+        
+        Emits "stage" events as pipeline stages start and finish, "token"
+        events carrying the enhanced CV as it is generated, then the final
+        "similarity" and "result" events (or an "error" event).
+        """
+        if not job_posting_url and not job_posting_text:
+            raise HTTPException(
+                status_code=400,
+                detail="Either job_posting_url or job_posting_text must be provided"
+            )
+        cv_pdf = await read_cv(cv_file, cv_id)
+        
+        async def stream_events():
+            async for event in pipeline.process_stream(
+                cv_pdf_path=cv_pdf,
+                job_posting_url=job_posting_url,
+                job_posting_text=job_posting_text,
+                additional_info=additional_info,
+                bypass_cache=bypass_cache,
+                cv_id=cv_id
+            ):
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        
+        return StreamingResponse(
+            stream_events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    
+    @app.post("/api/v1/jobs", status_code=202)
+    async def submit_enhancement_job(
+        cv_file: Optional[UploadFile] = File(None, description="CV PDF file"),
+        cv_id: Optional[str] = None,
+        job_posting_url: Optional[str] = None,
+        job_posting_text: Optional[str] = None,
+        additional_info: Optional[str] = None,
+    ):
+        """
+        Queue a CV enhancement and return its job id.
+        
+        Requires either cv_file or cv_id (from POST /api/v1/cvs or an earlier
+        response), and either job_posting_url or job_posting_text. Poll
+        GET /api/v1/jobs/{job_id} for status and
+        GET /api/v1/jobs/{job_id}/result for the enhanced CV.
+        """
+        if not job_posting_url and not job_posting_text:
+            raise HTTPException(
+                status_code=400,
+                detail="Either job_posting_url or job_posting_text must be provided"
+            )
+        if await task_queue.depth() >= settings.task_queue_max_depth:
+            raise HTTPException(status_code=429, detail="Enhancement queue is full, retry later")
+        cv_pdf = await read_cv(cv_file, cv_id)
+        
+        job_id = await task_queue.put({
+            "cv_pdf": base64.b64encode(cv_pdf).decode("ascii") if cv_pdf is not None else None,
+            "cv_id": cv_id,
+            "job_posting_url": job_posting_url,
+            "job_posting_text": job_posting_text,
+            "additional_info": additional_info,
+        })
+        return {"job_id": job_id, "status": "queued"}
+    
+    @app.get("/api/v1/jobs/{job_id}")
+    async def get_enhancement_job(job_id: str):
+        """Get status (and result once finished) of a queued enhancement."""
+        task = await task_queue.status(job_id)
+        if task is None:
+            raise HTTPException(status_code=404, detail="Unknown job id")
+        return task.to_dict()
+    
+    @app.get("/api/v1/jobs/{job_id}/result", response_model=EnhancementResponse)
+    async def get_enhancement_job_result(job_id: str):
+        """Get the result of a finished enhancement."""
+        task = await task_queue.status(job_id)
+        if task is None:
+            raise HTTPException(status_code=404, detail="Unknown job id")
+        if task.status == "failed":
+            raise HTTPException(status_code=500, detail=task.error)
+        if task.status != "completed":
+            raise HTTPException(status_code=409, detail=f"Job is {task.status}")
+        return EnhancementResponse(**task.result)
+    
+    @app.post("/api/v1/enhance-cv/batch")
+    async def enhance_cv_batch(
+        cv_file: Optional[UploadFile] = File(None, description="CV PDF file"),
+        cv_id: Optional[str] = Form(None, description="Id of a stored CV, instead of cv_file"),
+        postings: str = Form(..., description="JSON list of {job_posting_url | job_posting_text}"),
+        additional_info: Optional[str] = Form(None, description="Additional CV information"),
+    ):
+        """
+        Enhance one CV against many job postings.
+        
+        Requires either cv_file or cv_id. Streams newline-delimited JSON, one
+        line per posting as it completes. Each line carries the posting's
+        "index" and either the enhancement result or an "error".
+        """
+        try:
+            batch = [BatchPosting(**item) for item in json.loads(postings)]
+        except (json.JSONDecodeError, TypeError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid postings: {e}")
+        
+        if not batch:
+            raise HTTPException(status_code=400, detail="At least one posting is required")
+        if len(batch) > settings.batch_max_postings:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.batch_max_postings} postings per batch"
+            )
+        if any(not p.job_posting_url and not p.job_posting_text for p in batch):
+            raise HTTPException(
+                status_code=400,
+                detail="Each posting needs either job_posting_url or job_posting_text"
+            )
+        cv_pdf = await read_cv(cv_file, cv_id)
+        
+        async def stream_results():
+            try:
+                async for result in pipeline.process_batch(
+                    cv_pdf_path=cv_pdf,
+                    postings=[p.model_dump() for p in batch],
+                    additional_info=additional_info,
+                    cv_id=cv_id
+                ):
+                    yield json.dumps(result) + "\n"
+            except Exception as e:
+                logger.error(f"Error in batch enhancement: {e}", exc_info=True)
+                yield json.dumps({"error": str(e)}) + "\n"
+        
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+    
+    @app.post("/api/v1/cvs", status_code=201)
+    async def upload_cv(
+        cv_file: UploadFile = File(..., description="CV PDF file"),
+        additional_info: Optional[str] = Form(None, description="Additional CV information"),
+    ):
+        """
+        Parse a CV once and return its cv_id.
+        
+        Text, keywords and embedding are kept in the CV store, so later
+        requests can pass cv_id instead of uploading the PDF again.
+        """
+        cv_pdf = await read_cv(cv_file, None)
+        if pipeline.cv_store is None:
+            raise HTTPException(status_code=409, detail="The CV store is disabled")
+        try:
+            cv = await pipeline.prepare_cv(cv_pdf, additional_info)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error preparing CV: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+        return {
+            "cv_id": cv["cv_id"],
+            "characters": len(cv["cv_raw_text"]),
+            "cv_keywords": cv["cv_keywords"],
+        }
+    
+    @app.delete("/api/v1/cvs/{cv_id}")
+    async def delete_cv(cv_id: str):
+        """Remove a CV and its derived artifacts from the CV store."""
+        if pipeline.cv_store is None or not await asyncio.to_thread(
+            pipeline.cv_store.delete, cv_id
+        ):
+            raise HTTPException(status_code=404, detail="Unknown cv_id")
+        return {"deleted": cv_id}
+    
     @app.post("/api/v1/extract-keywords")
     async def extract_keywords(
-        cv_file: UploadFile = File(..., description="CV PDF file"),
+        cv_file: Optional[UploadFile] = File(None, description="CV PDF file"),
+        cv_id: Optional[str] = None,
     ):
-        """Extract keywords from CV."""
+        """Extract keywords from CV (reused from the CV store when known)."""
+        cv_pdf = await read_cv(cv_file, cv_id)
         try:
-            if cv_file.content_type != "application/pdf":
-                raise HTTPException(status_code=400, detail="File must be a PDF")
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                content = await cv_file.read()
-                tmp_file.write(content)
-                tmp_path = tmp_file.name
-            
-            try:
-                cv_raw_text = pipeline.cv_processor.extract_text_from_pdf(tmp_path)
-                cv_text = pipeline.cv_processor.combine_cv_content(cv_raw_text)
-                keywords = pipeline.cv_processor.extract_keywords(cv_text)
-                
-                return {"keywords": keywords}
-            finally:
-                Path(tmp_path).unlink(missing_ok=True)
+            cv = await pipeline.prepare_cv(cv_pdf, cv_id=cv_id, embed=False)
+            return {"cv_id": cv["cv_id"], "keywords": cv["cv_keywords"]}
         
         except Exception as e:
             logger.error(f"Error extracting keywords: {e}", exc_info=True)
@@ -157,7 +518,7 @@ def create_app() -> FastAPI:
     async def calculate_similarity(request: SimilarityRequest):
         """Calculate cosine similarity between two texts."""
         try:
-            similarity = pipeline.similarity_calculator.calculate_similarity(
+            similarity = await pipeline.similarity_calculator.acalculate_similarity(
                 request.text_a, request.text_b
             )
             return {"similarity": similarity}
@@ -165,5 +526,52 @@ def create_app() -> FastAPI:
             logger.error(f"Error calculating similarity: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
     
+    class SectionSimilarityRequest(BaseModel):
+        """Request model for section-level CV scoring."""
+        cv_markdown: str = Field(..., description="Markdown CV (e.g. an edited enhanced_cv)")
+        job_text: str = Field(..., description="Job posting text or keywords to score against")
+    
+    @app.post("/api/v1/calculate-similarity/sections")
+    async def calculate_similarity_sections(request: SectionSimilarityRequest):
+        """
+        Score a markdown CV section by section.
+        
+        Sections are embedded and cached individually, so re-scoring an edited
+        CV only embeds the sections that changed. Returns the document
+        similarity and a per-section breakdown.
+        """
+        try:
+            return await pipeline.section_scorer.ascore(request.cv_markdown, request.job_text)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error calculating section similarity: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    class SimilarityBatchRequest(BaseModel):
+        """Request model for one-to-many similarity calculation."""
+        query: str = Field(..., description="Text to compare against every candidate")
+        candidates: List[str] = Field(..., description="Candidate texts")
+    
+    @app.post("/api/v1/calculate-similarity/batch")
+    async def calculate_similarity_batch(request: SimilarityBatchRequest):
+        """Calculate cosine similarity between one text and many candidates."""
+        if not request.candidates:
+            raise HTTPException(status_code=400, detail="At least one candidate is required")
+        if len(request.candidates) > settings.similarity_batch_max_candidates:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.similarity_batch_max_candidates} candidates per batch"
+            )
+        
+        try:
+            similarities = await pipeline.similarity_calculator.acalculate_similarity_many(
+                request.query, request.candidates
+            )
+            return {"similarities": similarities}
+        except Exception as e:
+            logger.error(f"Error calculating similarities: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+    
     return app
 
@@ -0,0 +1,35 @@
+"""Worker lifecycle: warm-up state behind the liveness and readiness probes.
+
+Each server worker process owns one ServerState. It is live as soon as the
+app starts and ready once warm-up has finished. Draining on shutdown is left
+to the server: uvicorn stops accepting connections on SIGTERM and waits up to
+its graceful shutdown timeout for the requests in flight before the app's
+lifespan shutdown closes pipeline resources.
+"""
+
+import time
+from typing import Any, Dict
+
+
+class ServerState:
+    """Warm-up state of one worker process."""
+    
+    def __init__(self):
+        """Initialize state of a worker that has not warmed up yet."""
+        self.started_at = time.time()
+        self.warm = False
+        self.warmup: Dict[str, str] = {}
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the worker should receive traffic."""
+        return self.warm
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Readiness details for the probe endpoints."""
+        return {
+            "status": "ready" if self.warm else "warming_up",
+            "warmup": self.warmup,
+            "uptime": round(time.time() - self.started_at, 1),
+        }
@@ -14,18 +14,20 @@ class PromptManager:
         self._cache = {}
     
     def _load_file(self, filename: str) -> str:
-        """Load a configuration file."""
-        if filename in self._cache:
-            return self._cache[filename]
-        
+        """Load a configuration file, re-reading it when it changes on disk."""
         file_path = self.config_dir / filename
         if not file_path.exists():
             raise FileNotFoundError(f"Config file not found: {file_path}")
         
+        mtime = file_path.stat().st_mtime_ns
+        cached = self._cache.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
         with open(file_path, 'r', encoding='utf-8') as file:
             content = file.read().strip()
         
-        self._cache[filename] = content
+        self._cache[filename] = (mtime, content)
         return content
     
     @property
@@ -53,6 +55,16 @@ class PromptManager:
         """Get CV enhancement prompt template."""
         return self._load_file('cvEnhancePrompt.txt')
     
+    @property
+    def cv_refine_prompt(self) -> str:
+        """Get targeted CV section refinement prompt template."""
+        return self._load_file('cvRefinePrompt.txt')
+    
+    @property
+    def skills_dictionary(self) -> str:
+        """Get skills dictionary used by the local keyword extractor."""
+        return self._load_file('skillsDictionary.txt')
+    
     def format_cv_keywords_prompt(self, cv_text: str) -> str:
         """Format CV keywords extraction prompt."""
         return self.cv_keywords_prompt.format(cvText=cv_text)
@@ -79,4 +91,21 @@ class PromptManager:
             jobKeywords=job_keywords,
             currentCosineSimilarity=current_cosine_similarity
         )
+    
+    def format_cv_refine_prompt(
+        self,
+        cv_text: str,
+        job_keywords: str,
+        cv_sections: str,
+        current_cosine_similarity: float,
+        new_cosine_similarity: float
+    ) -> str:
+        """Format targeted CV section refinement prompt."""
+        return self.cv_refine_prompt.format(
+            cvText=cv_text,
+            jobKeywords=job_keywords,
+            cvSections=cv_sections,
+            currentCosineSimilarity=current_cosine_similarity,
+            newCosineSimilarity=new_cosine_similarity
+        )
 
@@ -1,11 +1,35 @@
 """Application settings and configuration."""
 
+import hashlib
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 
+def _onnx_model_fingerprint(model_path: str) -> str:
+    """Short SHA-256 of the ONNX model file (model.onnx inside a directory)."""
+    path = os.path.abspath(model_path)
+    if os.path.isdir(path):
+        path = os.path.join(path, "model.onnx")
+    try:
+        stat = os.stat(path)
+    except OSError:
+        # Not loadable anyway; keep distinct paths apart
+        return hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    """Hash a file once per (path, mtime, size)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
@@ -25,11 +49,18 @@ class Settings(BaseSettings):
     smart_llm_api_base: str
     smart_llm_model_name: str = "gemini-2.5-pro"
     
-    # Embedding LLM Configuration
-    embed_llm_api_key: str
-    embed_llm_api_base: str
+    # Embedding LLM Configuration (key and base are only needed for EMBED_BACKEND=openai)
+    embed_llm_api_key: Optional[str] = None
+    embed_llm_api_base: Optional[str] = None
     embed_llm_model_name: str = "text-embedding-ada-002"
     
+    # Embedding Backend (openai, or in-process: hashing, onnx)
+    embed_backend: str = "openai"
+    embed_local_dimensions: int = 1024
+    embed_local_batch_size: int = 64
+    embed_local_workers: int = 0
+    embed_onnx_model_path: Optional[str] = None
+    
     # Optional: HTML Generation API
     special_sauce_api_url: Optional[str] = None
     special_sauce_api_key: Optional[str] = None
@@ -40,6 +71,113 @@ class Settings(BaseSettings):
     max_retries: int = 3
     chunk_size: int = 2000
     chunk_overlap: int = 200
+    # Above 1, best-of-N generation replaces the feedback retry and max_retries is ignored
+    enhancement_candidates: int = 1
+    enhancement_target_similarity: Optional[float] = None
+    # Retry without improvement: full = regenerate the whole CV, targeted = rewrite the
+    # retry_sections sections least similar to the job keywords and splice them back
+    retry_mode: str = "full"
+    retry_sections: int = 2
+    batch_concurrency: int = 4
+    batch_max_postings: int = 50
+    
+    # PDF Extraction (backend: auto, pypdf or pymupdf; 0 disables a cap)
+    pdf_backend: str = "auto"
+    pdf_max_pages: int = 50
+    pdf_max_chars: int = 200000
+    pdf_parallel_min_pages: int = 16
+    pdf_workers: int = 0
+    
+    # CV Artifact Store (parsed CVs keyed by SHA-256 of the PDF bytes)
+    cv_store_enabled: bool = True
+    cv_store_size: int = 256
+    cv_store_path: Optional[str] = None
+    cv_store_max_disk_entries: int = 10000
+    
+    # Keyword Extraction (per call site: llm = Fast LLM prompt, local = skills dictionary, no network)
+    cv_keywords_backend: str = "llm"
+    job_keywords_backend: str = "llm"
+    keywords_local_max: int = 60
+    
+    # Enhancement Prompt Budget (tokens; exact with tiktoken, estimated otherwise; 0 = no cap)
+    prompt_budget_enabled: bool = True
+    prompt_max_tokens: int = 16000
+    prompt_section_max_tokens: Dict[str, int] = {}
+    
+    # Server (production profile: python app.py --production, or gunicorn -c gunicorn.conf.py)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0  # 0 = one per CPU core
+    server_drain_timeout: float = 30.0  # seconds to finish in-flight requests on shutdown
+    warmup_enabled: bool = True
+    warmup_browser_pool: bool = True
+    
+    # Browser Pool (job posting scraping)
+    browser_pool_size: int = 1
+    browser_max_pages: int = 4
+    browser_page_timeout: float = 30.0
+    
+    # Static (non-browser) job page fetching
+    static_fetch_enabled: bool = True
+    static_fetch_min_chars: int = 500
+    static_fetch_timeout: float = 10.0
+    http_max_connections: int = 20
+    
+    # Job Posting Cache (keyed by normalized URL)
+    job_cache_enabled: bool = True
+    job_cache_path: str = ".knitty_cache/job_postings.sqlite"
+    job_cache_ttl: int = 86400
+    
+    # Job Posting Index (top-K matching of a CV against a corpus)
+    job_index_path: str = ".knitty_cache/job_index"
+    job_index_top_k: int = 10
+    job_index_concurrency: int = 8
+    
+    # Background Task Queue (submit/poll enhancement API)
+    task_queue_backend: str = "memory"
+    task_queue_path: str = ".knitty_cache/tasks.sqlite"
+    task_workers: int = 2
+    task_queue_max_depth: int = 100
+    task_result_ttl: int = 3600
+    task_lease_seconds: float = 60  # sqlite: requeue running tasks not renewed this long
+    
+    # LLM Response Cache (keyword extraction and job RAG calls)
+    llm_cache_backend: str = "memory"
+    llm_cache_path: str = ".knitty_cache/llm_responses"
+    llm_cache_size: int = 512
+    llm_cache_ttl: int = 604800
+    llm_cache_ttls: Dict[str, int] = {}
+    
+    # Shared LLM Clients (process-wide pools and per-provider limits; 0 disables a limit)
+    llm_max_connections: int = 50
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0
+    llm_timeout: float = 120.0
+    llm_requests_per_minute: float = 0
+    llm_tokens_per_minute: float = 0
+    llm_max_concurrency: int = 8
+    llm_rate_limits: Dict[str, Dict[str, float]] = {}
+    
+    # Observability (Prometheus /metrics is always on; spans need opentelemetry-api)
+    otel_enabled: bool = False
+    otel_service_name: str = "knitty"
+    
+    # Embedding Cache
+    embedding_cache_size: int = 1024
+    embedding_cache_path: Optional[str] = None
+    embed_batch_max_tokens: int = 8000
+    embed_batch_max_items: int = 256
+    similarity_batch_max_candidates: int = 1000
+    
+    @property
+    def embedding_model(self) -> str:
+        """Name of the embedding space, used to key cached and indexed vectors."""
+        backend = self.embed_backend.lower()
+        if backend == "hashing":
+            return f"hashing-v1-{self.embed_local_dimensions}"
+        if backend == "onnx":
+            return f"onnx-{_onnx_model_fingerprint(self.embed_onnx_model_path or '')}"
+        return self.embed_llm_model_name
     
     class Config:
         env_file = ".env"
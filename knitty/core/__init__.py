@@ -4,11 +4,29 @@ from .cv_processor import CVProcessor
 from .job_processor import JobProcessor
 from .similarity import SimilarityCalculator
 from .enhancer import CVEnhancer
+from .embedding_cache import EmbeddingCache
+from .stages import StageGraph
+from .browser_pool import BrowserPool
+from .fetcher import JobPageFetcher
+from .job_cache import JobPostingCache
+from .job_index import JobIndex
+from .client_registry import ClientRegistry
+from .prompt_budget import PromptBudget
+from .keyword_extractor import DictionaryKeywordExtractor
 
 __all__ = [
     "CVProcessor",
     "JobProcessor",
     "SimilarityCalculator",
     "CVEnhancer",
+    "EmbeddingCache",
+    "StageGraph",
+    "BrowserPool",
+    "JobPageFetcher",
+    "JobPostingCache",
+    "JobIndex",
+    "ClientRegistry",
+    "PromptBudget",
+    "DictionaryKeywordExtractor",
 ]
 
@@ -0,0 +1,189 @@
+"""Long-lived pool of headless Chromium browsers for page rendering.
+
+On Windows async Playwright needs a Proactor event loop to start the browser
+subprocess. Under a Selector loop (e.g. uvicorn --reload) the pool falls back
+to sync Playwright on one dedicated thread, which renders a page at a time.
+"""
+
+import asyncio
+import itertools
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+from playwright.async_api import async_playwright, Browser, Playwright
+from playwright.sync_api import sync_playwright
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """Bounded pool of reusable Playwright browsers.
+    
+    Browsers are launched lazily and kept alive between requests; every
+    request gets a fresh browser context so no cookies or storage leak
+    between fetches. Disconnected (crashed) browsers are relaunched on the
+    next use.
+    """
+    
+    def __init__(self, settings: Settings):
+        """Initialize browser pool."""
+        self.max_browsers = max(1, settings.browser_pool_size)
+        self.max_pages = max(1, settings.browser_max_pages)
+        self.page_timeout = settings.browser_page_timeout
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[Optional[Browser]] = []
+        self._slots = itertools.cycle(range(self.max_browsers))
+        self._page_semaphore: Optional[asyncio.Semaphore] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_task: Optional[asyncio.Task] = None
+        self.restarts = 0
+        # Sync fallback: Playwright objects only ever touched from this one thread
+        self._sync_executor: Optional[ThreadPoolExecutor] = None
+        self._sync_playwright: Any = None
+        self._sync_browser: Any = None
+    
+    @staticmethod
+    def _needs_sync_fallback() -> bool:
+        """Whether the running loop cannot start subprocesses (Windows Selector loop)."""
+        proactor = getattr(asyncio, "ProactorEventLoop", None)
+        return (
+            sys.platform == "win32" and proactor is not None
+            and not isinstance(asyncio.get_running_loop(), proactor)
+        )
+    
+    def _launch_sync(self) -> Any:
+        """Return the fallback browser, launching it on the fallback thread if needed."""
+        if self._sync_browser is None or not self._sync_browser.is_connected():
+            if self._sync_playwright is None:
+                self._sync_playwright = sync_playwright().start()
+                logger.warning("Selector event loop on Windows, using sync Playwright in a thread")
+            self._sync_browser = self._sync_playwright.chromium.launch(headless=True)
+        return self._sync_browser
+    
+    def _fetch_sync(self, url: str) -> str:
+        """Render a page with sync Playwright on the fallback thread."""
+        context = self._launch_sync().new_context()
+        try:
+            page = context.new_page()
+            page.set_default_timeout(self.page_timeout * 1000)
+            page.goto(url, wait_until="networkidle")
+            return page.content()
+        finally:
+            context.close()
+    
+    def _close_sync(self) -> None:
+        """Close the fallback browser and Playwright on their thread."""
+        if self._sync_browser is not None and self._sync_browser.is_connected():
+            self._sync_browser.close()
+        if self._sync_playwright is not None:
+            self._sync_playwright.stop()
+        self._sync_browser = None
+        self._sync_playwright = None
+    
+    async def _run_sync(self, function, *args) -> Any:
+        """Run a sync Playwright function on the fallback thread."""
+        if self._sync_executor is None:
+            self._sync_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="sync-playwright"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._sync_executor, function, *args
+        )
+    
+    async def start(self) -> None:
+        """Start Playwright on the running event loop if not started."""
+        loop = asyncio.get_running_loop()
+        if self._start_task is None or self._loop is not loop:
+            if self._start_task is not None:
+                # Playwright objects are bound to the loop that created them
+                logger.warning("Browser pool used from a new event loop, restarting")
+            self._loop = loop
+            self._start_task = loop.create_task(self._start())
+        
+        try:
+            await asyncio.shield(self._start_task)
+        except Exception:
+            self._start_task = None
+            raise
+    
+    async def _start(self) -> None:
+        """Launch Playwright and create loop-bound primitives."""
+        self._page_semaphore = asyncio.Semaphore(self.max_pages)
+        self._launch_lock = asyncio.Lock()
+        self._browsers = [None] * self.max_browsers
+        self._playwright = await async_playwright().start()
+        logger.info(
+            f"Started browser pool ({self.max_browsers} browsers, {self.max_pages} pages)"
+        )
+    
+    async def warmup(self) -> None:
+        """Start Playwright and launch every browser ahead of the first fetch."""
+        if self._needs_sync_fallback():
+            await self._run_sync(self._launch_sync)
+            return
+        await self.start()
+        for slot in range(self.max_browsers):
+            await self._get_browser(slot)
+    
+    async def _get_browser(self, slot: int) -> Browser:
+        """Return a connected browser for slot, launching it if needed."""
+        async with self._launch_lock:
+            browser = self._browsers[slot]
+            if browser is not None and browser.is_connected():
+                return browser
+            
+            if browser is not None:
+                logger.warning(f"Browser {slot} disconnected, relaunching")
+                self.restarts += 1
+            
+            browser = await self._playwright.chromium.launch(headless=True)
+            self._browsers[slot] = browser
+            return browser
+    
+    async def fetch(self, url: str) -> str:
+        """Render a page and return its HTML content."""
+        if self._needs_sync_fallback():
+            return await self._run_sync(self._fetch_sync, url)
+        await self.start()
+        
+        async with self._page_semaphore:
+            browser = await self._get_browser(next(self._slots))
+            context = await browser.new_context()
+            try:
+                page = await context.new_page()
+                page.set_default_timeout(self.page_timeout * 1000)
+                await page.goto(url, wait_until="networkidle")
+                return await page.content()
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Error closing browser context: {e}")
+    
+    async def close(self) -> None:
+        """Close all browsers and stop Playwright."""
+        self._start_task = None
+        if self._sync_executor is not None:
+            try:
+                await self._run_sync(self._close_sync)
+            except Exception as e:
+                logger.debug(f"Error closing sync Playwright: {e}")
+            self._sync_executor.shutdown(wait=False)
+            self._sync_executor = None
+        if self._playwright is None:
+            return
+        
+        for browser in self._browsers:
+            if browser is not None and browser.is_connected():
+                try:
+                    await browser.close()
+                except Exception as e:
+                    logger.debug(f"Error closing browser: {e}")
+        
+        await self._playwright.stop()
+        self._playwright = None
+        self._browsers = []
+        logger.info("Closed browser pool")
@@ -0,0 +1,537 @@
+"""Process-wide registry of rate-limited LLM and embedding clients.
+
+Every pipeline (one per Streamlit session, one per API process) gets its
+chat and embedding clients from here, so they share:
+
+- keep-alive HTTP connection pools per provider (one TLS handshake per
+  connection instead of per pipeline),
+- a token bucket per provider for requests and tokens per minute,
+- adaptive backoff: a 429 halves the provider's rate and pauses new
+  requests for Retry-After; successes raise it again step by step,
+- a cap on in-flight requests per model.
+
+Limits are applied in an httpx transport, so retries done by the OpenAI
+SDK are paced and counted like any other request.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+import httpx
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from ..config.settings import Settings
+from .local_embeddings import create_local_embeddings
+from ..utils.telemetry import (
+    LLM_LIMITER_WAIT, LLM_THROTTLED, InstrumentedEmbeddings, TelemetryCallbackHandler
+)
+
+logger = logging.getLogger(__name__)
+
+# Adaptive backoff: multiplicative decrease on 429, additive increase on success
+MIN_RATE_SCALE = 0.05
+RATE_DECREASE = 0.5
+RATE_INCREASE = 0.05
+MAX_COOLDOWN = 60.0
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate.
+    
+    reserve() never blocks: it takes the tokens (the balance may go
+    negative) and returns how long the caller must wait before sending,
+    so the same bucket serves sync and async callers on any thread or
+    event loop.
+    """
+    
+    def __init__(self, per_minute: float):
+        """Initialize bucket; capacity is one minute of tokens."""
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+    
+    def reserve(self, amount: float, scale: float = 1.0) -> float:
+        """Take amount tokens and return the wait in seconds (caller holds the lock)."""
+        rate = self.per_minute * scale / 60.0
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+        self._tokens -= amount
+        return max(0.0, -self._tokens / rate) if rate > 0 else 0.0
+
+
+class ProviderLimiter:
+    """Request and token budgets for one provider, adapted on 429 responses."""
+    
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        """Initialize limiter; a limit of 0 disables that budget."""
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.scale = 1.0
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "waited_seconds": 0.0}
+    
+    def reserve(self, tokens: int) -> float:
+        """Account for one request of about tokens tokens; returns seconds to wait."""
+        with self._lock:
+            wait = max(0.0, self._blocked_until - time.monotonic())
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, self.scale))
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.reserve(tokens, self.scale))
+            self._stats["requests"] += 1
+            self._stats["waited_seconds"] += wait
+        if wait > 0:
+            LLM_LIMITER_WAIT.observe(wait, provider=self.name)
+        return wait
+    
+    def record(self, response: httpx.Response) -> None:
+        """Adapt the rate to a provider response."""
+        if response.status_code == 429:
+            self.throttled(_retry_after(response.headers))
+        elif response.status_code < 400:
+            with self._lock:
+                self._consecutive_throttles = 0
+                self.scale = min(1.0, self.scale + RATE_INCREASE)
+    
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """Back off after a 429: halve the rate and pause new requests."""
+        with self._lock:
+            self._consecutive_throttles += 1
+            self.scale = max(MIN_RATE_SCALE, self.scale * RATE_DECREASE)
+            if retry_after is None:
+                retry_after = min(MAX_COOLDOWN, 0.5 * 2 ** (self._consecutive_throttles - 1))
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            self._stats["throttled"] += 1
+            scale = self.scale
+        LLM_THROTTLED.inc(provider=self.name)
+        logger.warning(
+            f"Rate limited by {self.name}, pausing {retry_after:.1f}s (rate scale {scale:.2f})"
+        )
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get limiter counters and the current rate scale."""
+        with self._lock:
+            return {
+                **self._stats,
+                "waited_seconds": round(self._stats["waited_seconds"], 3),
+                "rate_scale": round(self.scale, 3),
+            }
+
+
+def _retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Parse retry-after-ms / retry-after (seconds) response headers."""
+    try:
+        if "retry-after-ms" in headers:
+            return min(MAX_COOLDOWN, float(headers["retry-after-ms"]) / 1000)
+        if "retry-after" in headers:
+            return min(MAX_COOLDOWN, float(headers["retry-after"]))
+    except ValueError:
+        pass  # HTTP-date form; fall back to exponential backoff
+    return None
+
+
+class _Waiter:
+    """A blocked acquire: wake() hands it the released slot."""
+    
+    __slots__ = ("wake", "granted")
+    
+    def __init__(self, wake: Callable[[], None]):
+        self.wake = wake
+        self.granted = False
+
+
+class ConcurrencyLimiter:
+    """Semaphore usable from threads and from any event loop.
+    
+    asyncio.Semaphore is bound to one loop, while these clients are shared
+    by sync callers, the API loop and Streamlit's background loop.
+    """
+    
+    def __init__(self, limit: int):
+        """Initialize limiter for limit concurrent holders."""
+        self.limit = limit
+        self._active = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+    
+    def _try_acquire(self, waiter: _Waiter) -> bool:
+        """Take a free slot or queue waiter (caller holds the lock)."""
+        if self._active < self.limit:
+            self._active += 1
+            return True
+        self._waiters.append(waiter)
+        return False
+    
+    def acquire(self) -> None:
+        """Block the calling thread until a slot is free."""
+        event = threading.Event()
+        waiter = _Waiter(event.set)
+        with self._lock:
+            if self._try_acquire(waiter):
+                return
+        event.wait()
+    
+    async def aacquire(self) -> None:
+        """Wait on the running loop until a slot is free."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+        
+        waiter = _Waiter(wake)
+        with self._lock:
+            if self._try_acquire(waiter):
+                return
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was handed over just as we were cancelled
+            self.release()
+            raise
+    
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest waiter if any."""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+                return
+            self._active -= 1
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of slots currently held."""
+        return self._active
+
+
+def _describe_request(request: httpx.Request) -> Tuple[Optional[str], int]:
+    """Return (model, estimated tokens) of an OpenAI-style JSON request."""
+    try:
+        content = request.content
+        body = json.loads(content)
+    except (httpx.RequestNotRead, ValueError):
+        return None, 0
+    if not isinstance(body, dict):
+        return None, len(content) // 4
+    # ~4 bytes per token for the prompt, plus any completion budget
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or 0
+    return body.get("model"), len(content) // 4 + int(completion)
+
+
+class _LimitedSyncStream(httpx.SyncByteStream):
+    """Response body that releases the concurrency slot when closed."""
+    
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+    
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+    
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _LimitedAsyncStream(httpx.AsyncByteStream):
+    """Async response body that releases the concurrency slot when closed."""
+    
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+    
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+    
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class ProviderPool:
+    """Shared connection pools, rate limiter and per-model caps for one provider."""
+    
+    def __init__(self, name: str, settings: Settings):
+        """Initialize pools and limits for provider name (its API host)."""
+        overrides = settings.llm_rate_limits.get(name, {})
+        self.name = name
+        self.limiter = ProviderLimiter(
+            name,
+            overrides.get("requests_per_minute", settings.llm_requests_per_minute),
+            overrides.get("tokens_per_minute", settings.llm_tokens_per_minute),
+        )
+        self.max_concurrency = int(overrides.get("max_concurrency", settings.llm_max_concurrency))
+        self._limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        )
+        self._models: Dict[str, ConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+        
+        timeout = httpx.Timeout(settings.llm_timeout, connect=10.0)
+        self.client = httpx.Client(
+            timeout=timeout,
+            transport=_SyncTransport(self, httpx.HTTPTransport(limits=self._limits)),
+        )
+        self.async_client = httpx.AsyncClient(timeout=timeout, transport=_AsyncTransport(self))
+    
+    def gate(self, model: Optional[str]) -> Optional[ConcurrencyLimiter]:
+        """Concurrency limiter for model, or None when uncapped."""
+        if self.max_concurrency <= 0:
+            return None
+        key = model or ""
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = ConcurrencyLimiter(self.max_concurrency)
+            return self._models[key]
+    
+    def new_async_transport(self) -> httpx.AsyncHTTPTransport:
+        """Connection pool for the running event loop."""
+        return httpx.AsyncHTTPTransport(limits=self._limits)
+    
+    async def aclose(self) -> None:
+        """Close both connection pools."""
+        self.client.close()
+        await self.async_client.aclose()
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get limiter counters and in-flight requests per model."""
+        with self._lock:
+            in_flight = {model: gate.in_flight for model, gate in self._models.items()}
+        return {**self.limiter.stats, "in_flight": in_flight}
+
+
+class _SyncTransport(httpx.BaseTransport):
+    """Applies the provider's limits around a pooled sync transport."""
+    
+    def __init__(self, provider: ProviderPool, transport: httpx.BaseTransport):
+        self.provider = provider
+        self._transport = transport
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = _describe_request(request)
+        gate = self.provider.gate(model)
+        release = gate.release if gate is not None else (lambda: None)
+        if gate is not None:
+            gate.acquire()
+        try:
+            time.sleep(self.provider.limiter.reserve(tokens))
+            response = self._transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+        self.provider.limiter.record(response)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_LimitedSyncStream(response.stream, release),
+            extensions=response.extensions,
+        )
+    
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _AsyncTransport(httpx.AsyncBaseTransport):
+    """Applies the provider's limits around pooled async transports.
+    
+    Connections are bound to the loop that opened them, so there is one
+    pool per event loop. Pools of loops that have been closed are closed
+    when another loop first uses the client.
+    """
+    
+    def __init__(self, provider: ProviderPool):
+        self.provider = provider
+        # Event loop -> its connection pool
+        self._transports: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    async def _get_transport(self) -> httpx.AsyncHTTPTransport:
+        """Return the pool of the running loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is not None:
+                return transport
+            transport = self._transports[loop] = self.provider.new_async_transport()
+            stale = [
+                (other, self._transports.pop(other))
+                for other in list(self._transports) if other.is_closed()
+            ]
+        for other, old in stale:
+            await self._close_transport(other, old)
+        return transport
+    
+    @staticmethod
+    async def _close_transport(
+        loop: asyncio.AbstractEventLoop, transport: httpx.AsyncHTTPTransport
+    ) -> None:
+        """Close a pool on the loop that owns its connections when that loop still runs."""
+        try:
+            current = asyncio.get_running_loop()
+            if loop is not current and loop.is_running():
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(transport.aclose(), loop)
+                )
+            else:
+                await transport.aclose()
+        except Exception as e:
+            logger.debug(f"Error closing HTTP transport: {e}")
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = _describe_request(request)
+        gate = self.provider.gate(model)
+        release = gate.release if gate is not None else (lambda: None)
+        if gate is not None:
+            await gate.aacquire()
+        try:
+            wait = self.provider.limiter.reserve(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            transport = await self._get_transport()
+            response = await transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        self.provider.limiter.record(response)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_LimitedAsyncStream(response.stream, release),
+            extensions=response.extensions,
+        )
+    
+    async def aclose(self) -> None:
+        with self._lock:
+            transports = list(self._transports.items())
+            self._transports.clear()
+        for loop, transport in transports:
+            await self._close_transport(loop, transport)
+
+
+class ClientRegistry:
+    """Process-wide cache of chat and embedding clients keyed by configuration."""
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._providers: Dict[Tuple[str, str], ProviderPool] = {}
+        self._clients: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+    
+    def _provider(self, api_base: str, api_key: str, settings: Settings) -> ProviderPool:
+        """Pool for an API base and key (limits are per key at most providers)."""
+        name = urlparse(api_base).netloc or api_base
+        key = (name, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16])
+        if key not in self._providers:
+            self._providers[key] = ProviderPool(name, settings)
+        return self._providers[key]
+    
+    def chat_model(self, client: str, settings: Settings, temperature: float) -> BaseChatModel:
+        """Shared ChatOpenAI for the "fast" or "smart" client of settings."""
+        api_base = getattr(settings, f"{client}_llm_api_base")
+        api_key = getattr(settings, f"{client}_llm_api_key")
+        model = getattr(settings, f"{client}_llm_model_name")
+        key = ("chat", client, api_base, api_key, model, temperature)
+        with self._lock:
+            if key not in self._clients:
+                provider = self._provider(api_base, api_key, settings)
+                self._clients[key] = ChatOpenAI(
+                    model=model,
+                    api_key=api_key,
+                    base_url=api_base,
+                    temperature=temperature,
+                    http_client=provider.client,
+                    http_async_client=provider.async_client,
+                    callbacks=[TelemetryCallbackHandler(client, model)],
+                )
+            return self._clients[key]
+    
+    def embeddings(self, settings: Settings) -> Embeddings:
+        """Shared embeddings client (timed and counted for /metrics)."""
+        if settings.embed_backend.lower() != "openai":
+            return self._local_embeddings(settings)
+        api_base = settings.embed_llm_api_base
+        api_key = settings.embed_llm_api_key
+        model = settings.embed_llm_model_name
+        if not api_key or not api_base:
+            raise ValueError(
+                "EMBED_LLM_API_KEY and EMBED_LLM_API_BASE are required for EMBED_BACKEND=openai"
+            )
+        key = ("embed", api_base, api_key, model)
+        with self._lock:
+            if key not in self._clients:
+                provider = self._provider(api_base, api_key, settings)
+                self._clients[key] = InstrumentedEmbeddings(
+                    OpenAIEmbeddings(
+                        model=model,
+                        api_key=api_key,
+                        base_url=api_base,
+                        http_client=provider.client,
+                        http_async_client=provider.async_client,
+                    ),
+                    model
+                )
+            return self._clients[key]
+    
+    def _local_embeddings(self, settings: Settings) -> Embeddings:
+        """Shared in-process embeddings (one model load per process)."""
+        key = ("local_embed", settings.embedding_model, settings.embed_onnx_model_path)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = InstrumentedEmbeddings(
+                    create_local_embeddings(settings), settings.embedding_model
+                )
+            return self._clients[key]
+    
+    async def aclose(self) -> None:
+        """Close every provider's connection pools and local embedding pools."""
+        with self._lock:
+            providers = list(self._providers.values())
+            local = [client for key, client in self._clients.items() if key[0] == "local_embed"]
+            self._providers.clear()
+            self._clients.clear()
+        for provider in providers:
+            await provider.aclose()
+        for client in local:
+            client.close()
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get limiter statistics per provider."""
+        with self._lock:
+            providers = list(self._providers.values())
+        return {provider.name: provider.stats for provider in providers}
+
+
+@lru_cache()
+def get_client_registry() -> ClientRegistry:
+    """Get the process-wide client registry."""
+    return ClientRegistry()
@@ -1,11 +1,12 @@
 """CV processing and text extraction."""
 
 import logging
-from pathlib import Path
 from typing import Optional
-from langchain_community.document_loaders import PyPDFLoader
 from ..config.prompts import PromptManager
 from .llm_clients import LLMClients
+from .llm_cache import LLMResponseCache
+from .pdf_extractor import PdfExtractor, PdfSource
+from .keyword_extractor import KeywordExtractor
 
 logger = logging.getLogger(__name__)
 
@@ -13,17 +14,35 @@ logger = logging.getLogger(__name__)
 class CVProcessor:
     """Processes CV files and extracts content."""
     
-    def __init__(self, llm_clients: LLMClients, prompt_manager: PromptManager):
+    def __init__(
+        self,
+        llm_clients: LLMClients,
+        prompt_manager: PromptManager,
+        llm_cache: Optional[LLMResponseCache] = None,
+        pdf_extractor: Optional[PdfExtractor] = None,
+        keyword_extractor: Optional[KeywordExtractor] = None
+    ):
         """Initialize CV processor."""
         self.llm_clients = llm_clients
         self.prompt_manager = prompt_manager
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self.pdf_extractor = pdf_extractor or PdfExtractor(llm_clients.settings)
+        self.keyword_extractor = keyword_extractor
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file."""
+    def extract_text_from_pdf(self, pdf: PdfSource) -> str:
+        """Extract text from a PDF path, bytes or binary file object."""
         try:
-            loader = PyPDFLoader(pdf_path)
-            pages = loader.load()
-            cv_raw_text = "\n".join([page.page_content for page in pages])
+            cv_raw_text = self.pdf_extractor.extract(pdf)
+            logger.info(f"Extracted {len(cv_raw_text)} characters from PDF")
+            return cv_raw_text
+        except Exception as e:
+            logger.error(f"Error extracting PDF: {e}")
+            raise ValueError(f"Failed to extract text from PDF: {e}")
+    
+    async def aextract_text_from_pdf(self, pdf: PdfSource) -> str:
+        """Extract text from a PDF without blocking the event loop."""
+        try:
+            cv_raw_text = await self.pdf_extractor.aextract(pdf)
             logger.info(f"Extracted {len(cv_raw_text)} characters from PDF")
             return cv_raw_text
         except Exception as e:
@@ -49,24 +68,53 @@ Additional Info:
         return cv_text
     
     def extract_keywords(self, cv_text: str) -> str:
-        """Extract keywords from CV using Fast LLM."""
+        """Extract keywords from CV (Fast LLM unless a local extractor is set)."""
         try:
+            if self.keyword_extractor is not None:
+                content = self.keyword_extractor.extract(cv_text)
+                logger.info(f"Extracted keywords from CV ({self.keyword_extractor.name})")
+                return content
+            
             prompt = self.prompt_manager.format_cv_keywords_prompt(cv_text)
-            response = self.llm_clients.fast_llm.invoke([("human", prompt)])
+            response = self.llm_cache.invoke(
+                "cv_keywords", self.llm_clients.fast_llm, [("human", prompt)]
+            )
+            content = self._clean_response(response)
+            
+            logger.info(f"Extracted keywords from CV")
+            return content
+        except Exception as e:
+            logger.error(f"Error extracting CV keywords: {e}")
+            raise ValueError(f"Failed to extract CV keywords: {e}")
+    
+    async def aextract_keywords(self, cv_text: str) -> str:
+        """Extract keywords from CV (async)."""
+        try:
+            if self.keyword_extractor is not None:
+                content = await self.keyword_extractor.aextract(cv_text)
+                logger.info(f"Extracted keywords from CV ({self.keyword_extractor.name})")
+                return content
             
-            # Clean JSON response (remove code blocks if present)
-            content = response.content.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
+            prompt = self.prompt_manager.format_cv_keywords_prompt(cv_text)
+            response = await self.llm_cache.ainvoke(
+                "cv_keywords", self.llm_clients.fast_llm, [("human", prompt)]
+            )
+            content = self._clean_response(response)
             
             logger.info(f"Extracted keywords from CV")
             return content
         except Exception as e:
             logger.error(f"Error extracting CV keywords: {e}")
             raise ValueError(f"Failed to extract CV keywords: {e}")
+    
+    def _clean_response(self, content: str) -> str:
+        """Clean JSON response (remove code blocks if present)."""
+        content = content.strip()
+        if content.startswith('```json'):
+            content = content[7:]
+        if content.startswith('```'):
+            content = content[3:]
+        if content.endswith('```'):
+            content = content[:-3]
+        return content.strip()
 
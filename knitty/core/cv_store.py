@@ -0,0 +1,262 @@
+"""Content-addressed store of parsed CVs and their derived artifacts."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def make_cv_id(pdf_bytes: bytes) -> str:
+    """Identify a CV by the SHA-256 of its PDF bytes."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _info_hash(additional_info: Optional[str]) -> str:
+    """Hash of the additional info ("" when absent)."""
+    info = (additional_info or "").strip()
+    return hashlib.sha256(info.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CVDocument:
+    """Artifacts that depend only on the PDF: its text and embedding."""
+    cv_raw_text: str
+    cv_embedding: Optional[np.ndarray] = None
+    embedding_model: Optional[str] = None
+
+
+@dataclass
+class CVVariant:
+    """Artifacts that also depend on the additional info."""
+    cv_text: str
+    cv_keywords: str
+    keywords_version: Optional[str] = None  # extractor backend and prompt that produced cv_keywords
+
+
+class CVStore:
+    """Two-tier (memory LRU + optional SQLite) store of CV artifacts.
+    
+    Text and embedding are stored per cv_id; combined text and keywords per
+    (cv_id, additional info), so a known CV sent with new additional info
+    only re-runs keyword extraction. Keywords are only reused when they were
+    produced by the same keywords_version (extractor backend and prompt).
+    Both tiers are size-bounded and evict the least recently used CVs.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 256,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 10000
+    ):
+        """Initialize CV store."""
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = Path(db_path) if db_path else None
+        self._documents: "OrderedDict[str, CVDocument]" = OrderedDict()
+        self._variants: "OrderedDict[Tuple[str, str], CVVariant]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "partial_hits": 0, "misses": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cv_documents ("
+                "cv_id TEXT PRIMARY KEY, cv_raw_text TEXT NOT NULL, "
+                "embedding_model TEXT, embedding BLOB, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cv_variants ("
+                "cv_id TEXT NOT NULL, info_hash TEXT NOT NULL, "
+                "cv_text TEXT NOT NULL, cv_keywords TEXT NOT NULL, keywords_version TEXT, "
+                "PRIMARY KEY (cv_id, info_hash))"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(cv_variants)")}
+            if "keywords_version" not in columns:
+                self._db.execute("ALTER TABLE cv_variants ADD COLUMN keywords_version TEXT")
+            self._db.commit()
+            logger.info(f"CV store disk tier at {self.db_path}")
+    
+    def _get_document(self, cv_id: str) -> Optional[CVDocument]:
+        """Look up a document in memory, then on disk (caller holds the lock)."""
+        document = self._documents.get(cv_id)
+        if document is not None:
+            self._documents.move_to_end(cv_id)
+            return document
+        if self._db is None:
+            return None
+        
+        row = self._db.execute(
+            "SELECT cv_raw_text, embedding_model, embedding FROM cv_documents WHERE cv_id = ?",
+            (cv_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute(
+            "UPDATE cv_documents SET last_used = ? WHERE cv_id = ?", (time.time(), cv_id)
+        )
+        self._db.commit()
+        embedding = np.frombuffer(row[2], dtype=np.float32) if row[2] is not None else None
+        document = CVDocument(row[0], embedding, row[1])
+        self._remember(self._documents, cv_id, document)
+        return document
+    
+    def _get_variant(self, key: Tuple[str, str]) -> Optional[CVVariant]:
+        """Look up a variant in memory, then on disk (caller holds the lock)."""
+        variant = self._variants.get(key)
+        if variant is not None:
+            self._variants.move_to_end(key)
+            return variant
+        if self._db is None:
+            return None
+        
+        row = self._db.execute(
+            "SELECT cv_text, cv_keywords, keywords_version FROM cv_variants "
+            "WHERE cv_id = ? AND info_hash = ?",
+            key
+        ).fetchone()
+        if row is None:
+            return None
+        variant = CVVariant(*row)
+        self._remember(self._variants, key, variant)
+        return variant
+    
+    def _remember(self, memory: OrderedDict, key: Any, value: Any) -> None:
+        """Insert into a memory tier, evicting least recently used entries."""
+        memory[key] = value
+        memory.move_to_end(key)
+        while len(memory) > self.max_entries:
+            memory.popitem(last=False)
+    
+    def lookup(
+        self,
+        cv_id: str,
+        additional_info: Optional[str],
+        embedding_model: str,
+        keywords_version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Return the stored CV stage results for a CV.
+        
+        Keys are pipeline stage names (cv_raw_text, cv_embedding, cv_text,
+        cv_keywords); missing artifacts are simply absent. An embedding made
+        with a different model than embedding_model, or keywords made with a
+        different keywords_version, are not returned.
+        """
+        with self._lock:
+            results: Dict[str, Any] = {}
+            document = self._get_document(cv_id)
+            if document is not None:
+                results["cv_raw_text"] = document.cv_raw_text
+                embedding = document.cv_embedding
+                if embedding is not None and document.embedding_model == embedding_model:
+                    results["cv_embedding"] = embedding
+                variant = self._get_variant((cv_id, _info_hash(additional_info)))
+                if variant is not None:
+                    results["cv_text"] = variant.cv_text
+                    if variant.keywords_version == keywords_version:
+                        results["cv_keywords"] = variant.cv_keywords
+            
+            outcome = {0: "misses", 4: "hits"}.get(len(results), "partial_hits")
+            self._stats[outcome] += 1
+            return results
+    
+    def contains(self, cv_id: str) -> bool:
+        """Whether the text of cv_id is stored."""
+        with self._lock:
+            return self._get_document(cv_id) is not None
+    
+    def put(
+        self,
+        cv_id: str,
+        additional_info: Optional[str],
+        embedding_model: str,
+        results: Dict[str, Any],
+        keywords_version: Optional[str] = None
+    ) -> None:
+        """Store the CV stage results of one run."""
+        embedding = results.get("cv_embedding")
+        document = CVDocument(
+            results["cv_raw_text"],
+            np.asarray(embedding, dtype=np.float32) if embedding is not None else None,
+            embedding_model if embedding is not None else None,
+        )
+        key = (cv_id, _info_hash(additional_info))
+        variant = None
+        if "cv_text" in results and "cv_keywords" in results:
+            variant = CVVariant(results["cv_text"], results["cv_keywords"], keywords_version)
+        
+        with self._lock:
+            self._remember(self._documents, cv_id, document)
+            if variant is not None:
+                self._remember(self._variants, key, variant)
+            if self._db is None:
+                return
+            
+            self._db.execute(
+                "INSERT OR REPLACE INTO cv_documents "
+                "(cv_id, cv_raw_text, embedding_model, embedding, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    cv_id, document.cv_raw_text, document.embedding_model,
+                    document.cv_embedding.tobytes() if document.cv_embedding is not None else None,
+                    time.time(),
+                )
+            )
+            if variant is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cv_variants "
+                    "(cv_id, info_hash, cv_text, cv_keywords, keywords_version) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (*key, variant.cv_text, variant.cv_keywords, variant.keywords_version)
+                )
+            self._evict_disk()
+            self._db.commit()
+    
+    def _evict_disk(self) -> None:
+        """Drop the least recently used CVs beyond max_disk_entries (caller holds the lock)."""
+        (count,) = self._db.execute("SELECT COUNT(*) FROM cv_documents").fetchone()
+        excess = count - self.max_disk_entries
+        if excess <= 0:
+            return
+        self._db.execute(
+            "DELETE FROM cv_documents WHERE cv_id IN "
+            "(SELECT cv_id FROM cv_documents ORDER BY last_used ASC LIMIT ?)",
+            (excess,)
+        )
+        self._db.execute(
+            "DELETE FROM cv_variants WHERE cv_id NOT IN (SELECT cv_id FROM cv_documents)"
+        )
+        logger.info(f"Evicted {excess} CVs from the CV store")
+    
+    def delete(self, cv_id: str) -> bool:
+        """Remove a CV and all its variants; returns whether it was stored."""
+        with self._lock:
+            found = self._documents.pop(cv_id, None) is not None
+            for key in [key for key in self._variants if key[0] == cv_id]:
+                del self._variants[key]
+            if self._db is not None:
+                cursor = self._db.execute("DELETE FROM cv_documents WHERE cv_id = ?", (cv_id,))
+                self._db.execute("DELETE FROM cv_variants WHERE cv_id = ?", (cv_id,))
+                self._db.commit()
+                found = found or cursor.rowcount > 0
+            return found
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and memory tier sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_documents"] = len(self._documents)
+            stats["memory_variants"] = len(self._variants)
+        return stats
@@ -0,0 +1,146 @@
+"""Content-addressed cache for embedding vectors."""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Dict, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keys per SELECT ... IN query, below SQLite's bound-parameter limit
+LOOKUP_CHUNK = 400
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + optional SQLite) cache of embedding vectors.
+    
+    Entries are keyed on the embedding model name and the SHA-256 of the
+    embedded text, so identical inputs are only sent to the provider once.
+    Batch lookups and stores touch the disk tier with one query and one
+    transaction; the async variants run them off the event loop.
+    """
+    
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None):
+        """Initialize embedding cache."""
+        self.max_entries = max_entries
+        self.db_path = Path(db_path) if db_path else None
+        self._memory: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text_hash TEXT NOT NULL, "
+                "dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash))"
+            )
+            self._db.commit()
+            logger.info(f"Embedding cache disk tier at {self.db_path}")
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> Tuple[str, str]:
+        """Build cache key from model name and text content."""
+        return model, hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """Return cached vector or None on miss."""
+        return self.get_many(model, [text]).get(text)
+    
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return the cached vectors of texts; misses are left out."""
+        keys = {text: self.make_key(model, text) for text in dict.fromkeys(texts)}
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text, key in keys.items():
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[text] = vector
+            self._stats["memory_hits"] += len(found)
+            
+            pending = {key[1]: text for text, key in keys.items() if text not in found}
+            if self._db is not None and pending:
+                hashes = list(pending)
+                for start in range(0, len(hashes), LOOKUP_CHUNK):
+                    chunk = hashes[start:start + LOOKUP_CHUNK]
+                    rows = self._db.execute(
+                        "SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                        f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                        (model, *chunk)
+                    ).fetchall()
+                    for text_hash, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember((model, text_hash), vector)
+                        found[pending.pop(text_hash)] = vector
+                        self._stats["disk_hits"] += 1
+            self._stats["misses"] += len(pending)
+        return found
+    
+    def put(self, model: str, text: str, vector) -> np.ndarray:
+        """Store vector for text and return it as a float32 array."""
+        return self.put_many(model, [(text, vector)])[0]
+    
+    def put_many(self, model: str, items: List[Tuple[str, object]]) -> List[np.ndarray]:
+        """Store (text, vector) pairs in one transaction; returns float32 arrays."""
+        rows = []
+        vectors = []
+        with self._lock:
+            for text, vector in items:
+                key = self.make_key(model, text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                vectors.append(vector)
+                rows.append((key[0], key[1], int(vector.shape[0]), vector.tobytes()))
+            if self._db is not None and rows:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) "
+                        "VALUES (?, ?, ?, ?)",
+                        rows
+                    )
+        return vectors
+    
+    async def aget_many(self, model: str, texts: Iterable[str]) -> Dict[str, np.ndarray]:
+        """get_many that reads the disk tier off the event loop."""
+        if self._db is None:
+            return self.get_many(model, texts)
+        return await asyncio.to_thread(self.get_many, model, list(texts))
+    
+    async def aput_many(self, model: str, items: List[Tuple[str, object]]) -> List[np.ndarray]:
+        """put_many that writes the disk tier off the event loop."""
+        if self._db is None:
+            return self.put_many(model, items)
+        return await asyncio.to_thread(self.put_many, model, items)
+    
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        """Insert into memory tier, evicting least recently used entries."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached vectors from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+        return stats
@@ -1,13 +1,33 @@
-"""CV enhancement using Smart LLM."""
+"""CV enhancement using Smart LLM.
 
+Retry modes (RETRY_MODE), used when the first enhancement does not beat the
+baseline similarity:
+    full:     send the prompt, the previous CV and its score back and
+              regenerate the whole document
+    targeted: score the previous CV section by section, ask for rewrites of
+              only the RETRY_SECTIONS sections least similar to the job
+              keywords and splice them back; output tokens drop to the size
+              of the rewritten sections
+"""
+
+import asyncio
 import logging
-from typing import Optional
+import re
+from typing import Any, Dict, List, Optional, Tuple
 from ..config.prompts import PromptManager
 from .llm_clients import LLMClients
+from .prompt_budget import TokenCounter
+from .section_scorer import CVSection, SectionScorer, split_sections
 from .similarity import SimilarityCalculator
+from .stages import EventCallback
+from ..utils.telemetry import ENHANCEMENT_ATTEMPTS, RETRY_OUTPUT_TOKENS_SAVED
 
 logger = logging.getLogger(__name__)
 
+CODE_FENCE = re.compile(r"\A\s*```[a-zA-Z]*\n(.*?)\n```\s*\Z", re.DOTALL)
+# Sections the refinement never rewrites (contact details, not content)
+FIXED_SECTIONS = frozenset({"Header", "Preamble"})
+
 
 class CVEnhancer:
     """Enhances CV to better match job posting."""
@@ -16,12 +36,21 @@ class CVEnhancer:
         self,
         llm_clients: LLMClients,
         prompt_manager: PromptManager,
-        similarity_calculator: SimilarityCalculator
+        similarity_calculator: SimilarityCalculator,
+        retry_mode: str = "full",
+        retry_sections: int = 2,
+        token_counter: Optional[TokenCounter] = None
     ):
         """Initialize CV enhancer."""
+        if retry_mode not in ("full", "targeted"):
+            raise ValueError(f"Unknown retry mode: {retry_mode}")
         self.llm_clients = llm_clients
         self.prompt_manager = prompt_manager
         self.similarity_calculator = similarity_calculator
+        self.retry_mode = retry_mode
+        self.retry_sections = max(1, retry_sections)
+        self.section_scorer = SectionScorer(similarity_calculator)
+        self._token_counter = token_counter
     
     def generate_enhanced_cv(
         self,
@@ -52,6 +81,192 @@ class CVEnhancer:
             logger.error(f"Error generating enhanced CV: {e}")
             raise ValueError(f"Failed to generate enhanced CV: {e}")
     
+    async def agenerate_enhanced_cv(
+        self,
+        cv_template: str,
+        cv_text: str,
+        job_posting_text: str,
+        cv_keywords: str,
+        job_keywords: str,
+        current_similarity: float,
+        on_event: Optional[EventCallback] = None
+    ) -> str:
+        """
+        Generate enhanced CV (async).
+        
+        When on_event is given the Smart LLM output is streamed and every
+        chunk is reported as a {"event": "token"} event.
+        """
+        try:
+            prompt = self.prompt_manager.format_cv_enhance_prompt(
+                cv_template=cv_template,
+                cv_text=cv_text,
+                job_posting_text=job_posting_text,
+                cv_keywords=cv_keywords,
+                job_keywords=job_keywords,
+                current_cosine_similarity=current_similarity
+            )
+            
+            enhanced_cv = await self._acomplete([("human", prompt)], 1, on_event)
+            
+            logger.info("Generated enhanced CV")
+            return enhanced_cv
+        except Exception as e:
+            logger.error(f"Error generating enhanced CV: {e}")
+            raise ValueError(f"Failed to generate enhanced CV: {e}")
+    
+    async def _acomplete(
+        self,
+        messages: list,
+        attempt: int,
+        on_event: Optional[EventCallback] = None
+    ) -> str:
+        """Run the Smart LLM, streaming tokens to on_event if given."""
+        if on_event is None:
+            response = await self.llm_clients.smart_llm.ainvoke(messages)
+            return response.content.strip()
+        
+        parts = []
+        async for chunk in self.llm_clients.smart_llm.astream(messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                on_event({"event": "token", "attempt": attempt, "data": chunk.content})
+        return "".join(parts).strip()
+    
+    def _build_retry_messages(
+        self,
+        cv_template: str,
+        cv_text: str,
+        job_posting_text: str,
+        cv_keywords: str,
+        job_keywords: str,
+        current_similarity: float,
+        enhanced_cv: str,
+        new_similarity: float
+    ) -> list:
+        """Build the feedback conversation for a retry attempt."""
+        similarity_string = (
+            f"New Cosine Similarity: {new_similarity:.6f}; "
+            f"Improvement over previous: {float(new_similarity - current_similarity):+.6f}"
+        )
+        
+        prompt = self.prompt_manager.format_cv_enhance_prompt(
+            cv_template, cv_text, job_posting_text,
+            cv_keywords, job_keywords, current_similarity
+        )
+        
+        return [
+            ("human", prompt),
+            ("assistant", enhanced_cv),
+            ("human", similarity_string),
+        ]
+    
+    @property
+    def token_counter(self) -> TokenCounter:
+        """Token counter for the Smart LLM (created on first use)."""
+        if self._token_counter is None:
+            self._token_counter = TokenCounter(self.llm_clients.settings.smart_llm_model_name)
+        return self._token_counter
+    
+    def _refine_targets(
+        self,
+        enhanced_cv: str,
+        scored: Dict[str, Any]
+    ) -> List[CVSection]:
+        """The retry_sections rewritable sections least similar to the job keywords."""
+        sections = split_sections(enhanced_cv)
+        candidates = [
+            (entry["similarity"], index)
+            for index, entry in enumerate(scored["sections"])
+            if entry["title"] not in FIXED_SECTIONS
+        ]
+        weakest = sorted(candidates)[:self.retry_sections]
+        return [sections[index] for _, index in sorted(weakest, key=lambda item: item[1])]
+    
+    def _build_refine_messages(
+        self,
+        cv_text: str,
+        job_keywords: str,
+        current_similarity: float,
+        new_similarity: float,
+        targets: List[CVSection]
+    ) -> list:
+        """Build the prompt asking for rewrites of the target sections only."""
+        prompt = self.prompt_manager.format_cv_refine_prompt(
+            cv_text=cv_text,
+            job_keywords=job_keywords,
+            cv_sections="\n\n".join(section.text for section in targets),
+            current_cosine_similarity=current_similarity,
+            new_cosine_similarity=new_similarity
+        )
+        return [("human", prompt)]
+    
+    def _splice(
+        self,
+        enhanced_cv: str,
+        targets: List[CVSection],
+        patch: str,
+        new_similarity: float
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Replace the target sections with their rewrites; report output tokens saved."""
+        fenced = CODE_FENCE.match(patch)
+        if fenced:
+            patch = fenced.group(1)
+        rewrites: Dict[str, List[CVSection]] = {}
+        for section in split_sections(patch):
+            rewrites.setdefault(section.title, []).append(section)
+        
+        document = enhanced_cv.replace("\r\n", "\n")
+        replaced = []
+        for target in targets:
+            matches = rewrites.get(target.title)
+            if matches and target.text in document:
+                document = document.replace(target.text, matches.pop(0).text, 1)
+                replaced.append(target.title)
+        missing = [target.title for target in targets if target.title not in replaced]
+        if missing:
+            logger.warning(f"Refinement returned no usable rewrite for sections: {missing}")
+        
+        # A full retry would have written a document the size of the previous one;
+        # only the sections actually spliced in count towards the savings
+        output_tokens = self.token_counter.count(patch)
+        full_output_tokens = self.token_counter.count(enhanced_cv)
+        target_tokens = sum(self.token_counter.count(target.text) for target in targets)
+        replaced_tokens = sum(
+            self.token_counter.count(target.text) for target in targets if target.title in replaced
+        )
+        saved = 0
+        if replaced and target_tokens:
+            saved = max(0, full_output_tokens - output_tokens) * replaced_tokens // target_tokens
+        RETRY_OUTPUT_TOKENS_SAVED.inc(saved)
+        report = {
+            "mode": "targeted",
+            "sections": replaced,
+            "previous_similarity": new_similarity,
+            "output_tokens": output_tokens,
+            "full_output_tokens": full_output_tokens,
+            "output_tokens_saved": saved,
+            "no_op": not replaced,
+        }
+        if replaced:
+            logger.info(
+                f"Targeted retry rewrote {len(replaced)} of {len(targets)} sections, "
+                f"{output_tokens} output tokens instead of ~{full_output_tokens}"
+            )
+        else:
+            logger.warning(
+                f"Targeted retry was a no-op: none of {len(targets)} sections were rewritten"
+            )
+        return document, report
+    
+    def _full_retry_report(self, enhanced_cv: str, new_similarity: float) -> Dict[str, Any]:
+        """Report for a whole-document retry."""
+        return {
+            "mode": "full",
+            "previous_similarity": new_similarity,
+            "output_tokens": self.token_counter.count(enhanced_cv),
+        }
+    
     def enhance_with_retry(
         self,
         cv_template: str,
@@ -61,9 +276,16 @@ class CVEnhancer:
         job_keywords: str,
         current_similarity: float,
         job_keywords_text: str,
-        max_retries: int = 3
+        max_retries: int = 3,
+        retry_report: Optional[Dict[str, Any]] = None
     ) -> tuple[str, float]:
-        """Enhance CV with iterative improvement."""
+        """
+        Enhance CV with iterative improvement.
+        
+        If retry_report is given it is filled with the retry mode, rewritten
+        sections and output tokens when a retry runs.
+        """
+        ENHANCEMENT_ATTEMPTS.inc(mode="initial")
         enhanced_cv = self.generate_enhanced_cv(
             cv_template, cv_text, job_posting_text,
             cv_keywords, job_keywords, current_similarity
@@ -79,28 +301,103 @@ class CVEnhancer:
         # Retry if no improvement
         if new_similarity <= current_similarity and max_retries > 0:
             logger.info("No improvement detected, retrying with feedback...")
+            targets = []
+            if self.retry_mode == "targeted":
+                scored = self.section_scorer.score(enhanced_cv, job_keywords_text)
+                targets = self._refine_targets(enhanced_cv, scored)
             
-            similarity_string = (
-                f"New Cosine Similarity: {new_similarity:.6f}; "
-                f"Improvement over previous: {float(new_similarity - current_similarity):+.6f}"
-            )
+            if targets:
+                ENHANCEMENT_ATTEMPTS.inc(mode="retry_targeted")
+                messages = self._build_refine_messages(
+                    cv_text, job_keywords, current_similarity, new_similarity, targets
+                )
+                response = self.llm_clients.smart_llm.invoke(messages)
+                enhanced_cv, report = self._splice(
+                    enhanced_cv, targets, response.content.strip(), new_similarity
+                )
+            else:
+                ENHANCEMENT_ATTEMPTS.inc(mode="retry")
+                messages = self._build_retry_messages(
+                    cv_template, cv_text, job_posting_text, cv_keywords,
+                    job_keywords, current_similarity, enhanced_cv, new_similarity
+                )
+                response = self.llm_clients.smart_llm.invoke(messages)
+                enhanced_cv = response.content.strip()
+                report = self._full_retry_report(enhanced_cv, new_similarity)
+            if retry_report is not None:
+                retry_report.update(report)
             
-            prompt = self.prompt_manager.format_cv_enhance_prompt(
-                cv_template, cv_text, job_posting_text,
-                cv_keywords, job_keywords, current_similarity
+            # Recalculate similarity
+            new_similarity = self.similarity_calculator.calculate_similarity(
+                enhanced_cv, job_keywords_text
             )
             
-            messages = [
-                ("human", prompt),
-                ("assistant", enhanced_cv),
-                ("human", similarity_string),
-            ]
+            logger.info(f"Retry enhancement similarity: {new_similarity:.6f}")
+        
+        improvement = new_similarity - current_similarity
+        logger.info(f"Final similarity: {new_similarity:.6f}, Improvement: {improvement:+.6f}")
+        
+        return enhanced_cv, new_similarity
+    
+    async def aenhance_with_retry(
+        self,
+        cv_template: str,
+        cv_text: str,
+        job_posting_text: str,
+        cv_keywords: str,
+        job_keywords: str,
+        current_similarity: float,
+        job_keywords_text: str,
+        max_retries: int = 3,
+        on_event: Optional[EventCallback] = None,
+        retry_report: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, float]:
+        """Enhance CV with iterative improvement (async)."""
+        ENHANCEMENT_ATTEMPTS.inc(mode="initial")
+        enhanced_cv = await self.agenerate_enhanced_cv(
+            cv_template, cv_text, job_posting_text,
+            cv_keywords, job_keywords, current_similarity, on_event
+        )
+        
+        new_similarity = await self.similarity_calculator.acalculate_similarity(
+            enhanced_cv, job_keywords_text
+        )
+        
+        logger.info(f"Initial enhancement similarity: {new_similarity:.6f} (baseline: {current_similarity:.6f})")
+        
+        if new_similarity <= current_similarity and max_retries > 0:
+            logger.info("No improvement detected, retrying with feedback...")
+            targets = []
+            if self.retry_mode == "targeted":
+                scored = await self.section_scorer.ascore(enhanced_cv, job_keywords_text)
+                targets = self._refine_targets(enhanced_cv, scored)
+            if on_event is not None:
+                on_event({
+                    "event": "retry",
+                    "attempt": 2,
+                    "similarity": new_similarity,
+                    "sections": [section.title for section in targets],
+                })
             
-            response = self.llm_clients.smart_llm.invoke(messages)
-            enhanced_cv = response.content.strip()
+            if targets:
+                ENHANCEMENT_ATTEMPTS.inc(mode="retry_targeted")
+                messages = self._build_refine_messages(
+                    cv_text, job_keywords, current_similarity, new_similarity, targets
+                )
+                patch = await self._acomplete(messages, 2, on_event)
+                enhanced_cv, report = self._splice(enhanced_cv, targets, patch, new_similarity)
+            else:
+                ENHANCEMENT_ATTEMPTS.inc(mode="retry")
+                messages = self._build_retry_messages(
+                    cv_template, cv_text, job_posting_text, cv_keywords,
+                    job_keywords, current_similarity, enhanced_cv, new_similarity
+                )
+                enhanced_cv = await self._acomplete(messages, 2, on_event)
+                report = self._full_retry_report(enhanced_cv, new_similarity)
+            if retry_report is not None:
+                retry_report.update(report)
             
-            # Recalculate similarity
-            new_similarity = self.similarity_calculator.calculate_similarity(
+            new_similarity = await self.similarity_calculator.acalculate_similarity(
                 enhanced_cv, job_keywords_text
             )
             
@@ -110,4 +407,136 @@ class CVEnhancer:
         logger.info(f"Final similarity: {new_similarity:.6f}, Improvement: {improvement:+.6f}")
         
         return enhanced_cv, new_similarity
-
+    
+    async def aenhance_best_of_n(
+        self,
+        cv_template: str,
+        cv_text: str,
+        job_posting_text: str,
+        cv_keywords: str,
+        job_keywords: str,
+        current_similarity: float,
+        job_keywords_text: str,
+        candidates: int = 3,
+        target_similarity: Optional[float] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> tuple[str, float]:
+        """
+        Generate several enhanced CVs concurrently and keep the closest match.
+        
+        Without a target all candidates are embedded in one batched request;
+        each finished generation is reported as a {"event": "candidate_generated"}
+        event while the others are still running. With a target each
+        candidate is scored as it arrives and the remaining generations are
+        cancelled once one reaches the target. Every scored candidate is
+        reported as a {"event": "candidate"} event as soon as it is scored.
+        There is no feedback retry on this path, so max_retries does not apply.
+        """
+        prompt = self.prompt_manager.format_cv_enhance_prompt(
+            cv_template=cv_template,
+            cv_text=cv_text,
+            job_posting_text=job_posting_text,
+            cv_keywords=cv_keywords,
+            job_keywords=job_keywords,
+            current_cosine_similarity=current_similarity
+        )
+        tasks = [
+            asyncio.create_task(self._acomplete([("human", prompt)], i + 1))
+            for i in range(max(1, candidates))
+        ]
+        ENHANCEMENT_ATTEMPTS.inc(len(tasks), mode="best_of_n")
+        
+        try:
+            if target_similarity is None:
+                scored = await self._score_all(tasks, job_keywords_text, on_event)
+            else:
+                scored = await self._score_until(
+                    tasks, job_keywords_text, target_similarity, on_event
+                )
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled calls unwind and retrieve their exceptions before returning
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if not scored:
+            raise ValueError("Failed to generate enhanced CV: all candidates failed")
+        
+        _, enhanced_cv, new_similarity = max(scored, key=lambda item: item[2])
+        improvement = new_similarity - current_similarity
+        logger.info(
+            f"Best of {len(scored)} candidates: {new_similarity:.6f}, Improvement: {improvement:+.6f}"
+        )
+        return enhanced_cv, new_similarity
+    
+    async def _score_all(
+        self,
+        tasks: List[asyncio.Task],
+        job_keywords_text: str,
+        on_event: Optional[EventCallback] = None
+    ) -> List[tuple[int, str, float]]:
+        """Wait for every candidate and score them with one batched embedding call."""
+        attempts = {task: i + 1 for i, task in enumerate(tasks)}
+        pending = set(tasks)
+        candidates = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=attempts.get):
+                if task.exception() is not None:
+                    logger.warning(f"Candidate {attempts[task]} failed: {task.exception()}")
+                    continue
+                candidates.append((attempts[task], task.result()))
+                if on_event is not None:
+                    on_event({"event": "candidate_generated", "attempt": attempts[task]})
+        if not candidates:
+            return []
+        candidates.sort()
+        
+        vectors = await self.similarity_calculator.aembed_many(
+            [job_keywords_text] + [text for _, text in candidates]
+        )
+        similarities = self.similarity_calculator.cosine_similarity_many(vectors[0], vectors[1:])
+        
+        scored = [
+            (attempt, text, float(similarity))
+            for (attempt, text), similarity in zip(candidates, similarities)
+        ]
+        if on_event is not None:
+            for attempt, _, similarity in scored:
+                on_event({"event": "candidate", "attempt": attempt, "similarity": similarity})
+        return scored
+    
+    async def _score_until(
+        self,
+        tasks: List[asyncio.Task],
+        job_keywords_text: str,
+        target_similarity: float,
+        on_event: Optional[EventCallback] = None
+    ) -> List[tuple[int, str, float]]:
+        """Score candidates as they finish, stopping once one reaches the target."""
+        attempts = {task: i + 1 for i, task in enumerate(tasks)}
+        pending = set(tasks)
+        scored = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    logger.warning(f"Candidate {attempts[task]} failed: {task.exception()}")
+                    continue
+                similarity = await self.similarity_calculator.acalculate_similarity(
+                    task.result(), job_keywords_text
+                )
+                scored.append((attempts[task], task.result(), similarity))
+                if on_event is not None:
+                    on_event({
+                        "event": "candidate", "attempt": attempts[task], "similarity": similarity
+                    })
+            
+            if scored and max(item[2] for item in scored) >= target_similarity:
+                if pending:
+                    logger.info(
+                        f"Target similarity {target_similarity:.6f} reached, "
+                        f"cancelling {len(pending)} candidates"
+                    )
+                break
+        return scored
@@ -0,0 +1,264 @@
+"""Tiered fetching of job posting pages (static HTTP first, browser fallback)."""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import httpx
+from bs4 import BeautifulSoup
+from ..config.settings import Settings
+from .browser_pool import BrowserPool
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+)
+
+
+@dataclass
+class FetchResult:
+    """Text of a fetched job page and the tier that produced it."""
+    url: str
+    text: str
+    tier: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def html_to_text(html_content: str) -> str:
+    """Strip scripts and styles from HTML and return its visible text."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    return soup.get_text(separator="\n", strip=True)
+
+
+def _find_job_postings(node: Any) -> List[Dict[str, Any]]:
+    """Collect JobPosting objects from a parsed JSON-LD document."""
+    found = []
+    if isinstance(node, list):
+        for item in node:
+            found.extend(_find_job_postings(item))
+    elif isinstance(node, dict):
+        node_type = node.get("@type")
+        types = node_type if isinstance(node_type, list) else [node_type]
+        if "JobPosting" in types:
+            found.append(node)
+        if "@graph" in node:
+            found.extend(_find_job_postings(node["@graph"]))
+    return found
+
+
+def _json_ld_value(value: Any) -> str:
+    """Flatten a JSON-LD property into readable text."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(filter(None, (_json_ld_value(v) for v in value)))
+    if isinstance(value, dict):
+        if "name" in value:
+            return _json_ld_value(value["name"])
+        if "address" in value:
+            return _json_ld_value(value["address"])
+        parts = [
+            value.get(key) for key in
+            ("streetAddress", "addressLocality", "addressRegion", "addressCountry")
+        ]
+        return ", ".join(_json_ld_value(p) for p in parts if p)
+    text = str(value)
+    if "<" in text and ">" in text:
+        text = BeautifulSoup(text, "html.parser").get_text(separator="\n", strip=True)
+    return text.strip()
+
+
+def extract_json_ld_job(soup: BeautifulSoup) -> Optional[str]:
+    """Extract a JobPosting from JSON-LD script tags as plain text."""
+    fields = [
+        ("Title", "title"),
+        ("Company", "hiringOrganization"),
+        ("Location", "jobLocation"),
+        ("Employment Type", "employmentType"),
+        ("Date Posted", "datePosted"),
+        ("Description", "description"),
+        ("Responsibilities", "responsibilities"),
+        ("Qualifications", "qualifications"),
+        ("Skills", "skills"),
+        ("Experience Requirements", "experienceRequirements"),
+        ("Education Requirements", "educationRequirements"),
+    ]
+    
+    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        try:
+            data = json.loads(script.string or "")
+        except (json.JSONDecodeError, TypeError):
+            continue
+        
+        for posting in _find_job_postings(data):
+            lines = []
+            for label, key in fields:
+                value = _json_ld_value(posting.get(key))
+                if value:
+                    lines.append(f"{label}:\n{value}" if "\n" in value else f"{label}: {value}")
+            if lines:
+                return "\n\n".join(lines)
+    return None
+
+
+def extract_main_text(soup: BeautifulSoup) -> str:
+    """Extract visible text, preferring the page's main content region."""
+    for tag in soup(["script", "style", "noscript", "nav", "header", "footer"]):
+        tag.decompose()
+    
+    main = soup.find("main") or soup.find(attrs={"role": "main"}) or soup.find("article")
+    root = main or soup.body or soup
+    return root.get_text(separator="\n", strip=True)
+
+
+class JobPageFetcher:
+    """Fetches job pages over plain HTTP and escalates to a browser if needed.
+    
+    Tiers, in order:
+        jsonld:  static HTML containing a schema.org JobPosting
+        static:  static HTML whose main content is long enough
+        browser: Chromium render through the shared BrowserPool
+    """
+    
+    TIERS = ("jsonld", "static", "browser")
+    
+    def __init__(self, settings: Settings, browser_pool: BrowserPool):
+        """Initialize job page fetcher."""
+        self.settings = settings
+        self.browser_pool = browser_pool
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {tier: 0 for tier in self.TIERS}
+        self._stats["static_failures"] = 0
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._client_loop is not loop:
+            # Connections are bound to the loop that opened them
+            logger.info("HTTP client used from a new event loop, replacing it")
+            await self._close_client()
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.settings.static_fetch_timeout,
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+                limits=httpx.Limits(max_connections=self.settings.http_max_connections),
+            )
+            self._client_loop = loop
+        return self._client
+    
+    async def _close_client(self) -> None:
+        """Close the pooled HTTP client on the loop that owns its connections."""
+        client, client_loop = self._client, self._client_loop
+        self._client = None
+        self._client_loop = None
+        if client is None:
+            return
+        try:
+            current = asyncio.get_running_loop()
+            if client_loop is not None and client_loop is not current and client_loop.is_running():
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+                )
+            else:
+                await client.aclose()
+        except Exception as e:
+            logger.debug(f"Error closing HTTP client: {e}")
+    
+    async def fetch_static(self, url: str) -> Optional[FetchResult]:
+        """Fetch a page without a browser; returns None on HTTP failure."""
+        client = await self._get_client()
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.info(f"Static fetch failed for {url}: {e}")
+            self._stats["static_failures"] += 1
+            return None
+        
+        text, tier = await asyncio.to_thread(self._parse_static, response.text)
+        return FetchResult(
+            url=url,
+            text=text,
+            tier=tier,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+    
+    @staticmethod
+    def _parse_static(html_content: str) -> tuple[str, str]:
+        """Parse static HTML into (text, tier)."""
+        soup = BeautifulSoup(html_content, "html.parser")
+        text = extract_json_ld_job(soup)
+        if text:
+            return text, "jsonld"
+        return extract_main_text(soup), "static"
+    
+    async def is_not_modified(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> bool:
+        """Issue a conditional request; True if the origin answers 304."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        if not headers:
+            return False
+        
+        client = await self._get_client()
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.info(f"Revalidation failed for {url}: {e}")
+            return False
+        return response.status_code == 304
+    
+    async def fetch_browser(self, url: str) -> FetchResult:
+        """Render a page with the browser pool."""
+        html_content = await self.browser_pool.fetch(url)
+        text = await asyncio.to_thread(html_to_text, html_content)
+        return FetchResult(url=url, text=text, tier="browser")
+    
+    async def fetch(self, url: str) -> FetchResult:
+        """Fetch job page text using the cheapest tier that yields enough content."""
+        result = None
+        if self.settings.static_fetch_enabled:
+            result = await self.fetch_static(url)
+            # A stub JSON-LD description is as thin as an empty static page
+            too_thin = (
+                result is not None
+                and len(result.text) < self.settings.static_fetch_min_chars
+            )
+            if too_thin:
+                logger.info(
+                    f"{result.tier} content too thin ({len(result.text)} chars), "
+                    f"escalating to browser"
+                )
+                result = None
+        
+        if result is None:
+            result = await self.fetch_browser(url)
+        
+        self._stats[result.tier] += 1
+        logger.info(f"Fetched {url} via {result.tier} tier ({len(result.text)} chars)")
+        return result
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP client."""
+        await self._close_client()
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get per-tier request counters."""
+        return dict(self._stats)
@@ -0,0 +1,156 @@
+"""Persistent cache of processed job postings keyed by normalized URL."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = {"gclid", "fbclid", "ref", "refid", "trackingid", "trk", "src", "source"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a job posting URL so equivalent links share one cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+@dataclass
+class CachedJobPosting:
+    """Processed artifacts of one job posting."""
+    url: str
+    job_text: str
+    job_data: Dict[str, Any]
+    job_keywords: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = field(default_factory=time.time)
+    keywords_backend: Optional[str] = None  # JOB_KEYWORDS_BACKEND that produced job_keywords
+    
+    def is_fresh(self, ttl: float) -> bool:
+        """Whether the entry is younger than ttl seconds."""
+        return time.time() - self.fetched_at < ttl
+    
+    @property
+    def can_revalidate(self) -> bool:
+        """Whether the origin gave validators for a conditional request."""
+        return bool(self.etag or self.last_modified)
+
+
+class JobPostingCache:
+    """SQLite-backed cache of cleaned job text, RAG JSON and job keywords."""
+    
+    def __init__(self, db_path: str, ttl: float = 86400):
+        """Initialize job posting cache."""
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "revalidated": 0, "misses": 0}
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_postings ("
+            "url TEXT PRIMARY KEY, job_text TEXT NOT NULL, job_data TEXT NOT NULL, "
+            "job_keywords TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL NOT NULL, keywords_backend TEXT)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(job_postings)")}
+        if "keywords_backend" not in columns:
+            self._db.execute("ALTER TABLE job_postings ADD COLUMN keywords_backend TEXT")
+        self._db.commit()
+    
+    def get(self, url: str) -> Optional[CachedJobPosting]:
+        """Return the cached entry for url, fresh or not."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, job_text, job_data, job_keywords, etag, last_modified, fetched_at, "
+                "keywords_backend FROM job_postings WHERE url = ?",
+                (normalize_url(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedJobPosting(
+            url=row[0],
+            job_text=row[1],
+            job_data=json.loads(row[2]),
+            job_keywords=row[3],
+            etag=row[4],
+            last_modified=row[5],
+            fetched_at=row[6],
+            keywords_backend=row[7],
+        )
+    
+    def put(self, entry: CachedJobPosting) -> None:
+        """Insert or replace an entry."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO job_postings "
+                "(url, job_text, job_data, job_keywords, etag, last_modified, fetched_at, "
+                "keywords_backend) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_url(entry.url), entry.job_text, json.dumps(entry.job_data),
+                    entry.job_keywords, entry.etag, entry.last_modified, entry.fetched_at,
+                    entry.keywords_backend,
+                )
+            )
+            self._db.commit()
+    
+    def touch(self, url: str) -> None:
+        """Mark an entry as freshly validated."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE job_postings SET fetched_at = ? WHERE url = ?",
+                (time.time(), normalize_url(url))
+            )
+            self._db.commit()
+    
+    def invalidate(self, url: str) -> bool:
+        """Remove the entry for url; returns whether one existed."""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM job_postings WHERE url = ?", (normalize_url(url),)
+            )
+            self._db.commit()
+        logger.info(f"Invalidated job cache entry for {url}")
+        return cursor.rowcount > 0
+    
+    def clear(self) -> int:
+        """Remove all entries; returns how many were removed."""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM job_postings")
+            self._db.commit()
+        return cursor.rowcount
+    
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome (hits, revalidated or misses)."""
+        with self._lock:
+            self._stats[outcome] += 1
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get lookup counters and entry count."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._db.execute("SELECT COUNT(*) FROM job_postings").fetchone()[0]
+        return stats
@@ -0,0 +1,176 @@
+"""Persistent NumPy index of job posting embeddings for top-K matching."""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class JobIndex:
+    """In-memory matrix of normalized job keyword embeddings.
+    
+    Each row belongs to one posting id; postings keep their metadata (title,
+    url, job_keywords, ...) alongside. Searching a CV embedding is a single
+    matrix-vector product over the whole corpus. The index is saved as an
+    .npz matrix plus a .json sidecar and reloaded on construction.
+    """
+    
+    def __init__(self, path: Optional[str] = None, model_name: Optional[str] = None):
+        """Initialize job index, loading it from path if it exists."""
+        self.path = Path(path) if path else None
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._postings: Dict[str, Dict[str, Any]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        
+        if self.path is not None and self._matrix_path.exists():
+            self.load()
+    
+    @property
+    def _matrix_path(self) -> Path:
+        return self.path.with_suffix(".npz")
+    
+    @property
+    def _meta_path(self) -> Path:
+        return self.path.with_suffix(".json")
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, posting_id: str) -> bool:
+        return posting_id in self._postings
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows."""
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    def add(self, postings: List[Dict[str, Any]], vectors: List[np.ndarray]) -> int:
+        """
+        Add or replace postings with their job keyword embeddings.
+        
+        Args:
+            postings: Dicts with an "id" plus any metadata to return from search
+            vectors: One embedding per posting
+        
+        Returns:
+            Number of postings added
+        """
+        if len(postings) != len(vectors):
+            raise ValueError("Expected one embedding per posting")
+        if not postings:
+            return 0
+        
+        rows = self._normalize(np.vstack(vectors).astype(np.float32))
+        with self._lock:
+            if self._matrix is not None and rows.shape[1] != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {rows.shape[1]} does not match "
+                    f"index dimension {self._matrix.shape[1]}"
+                )
+            self._delete_locked([posting["id"] for posting in postings])
+            
+            for posting in postings:
+                self._ids.append(posting["id"])
+                self._postings[posting["id"]] = dict(posting)
+            self._matrix = rows if self._matrix is None else np.vstack([self._matrix, rows])
+        
+        logger.info(f"Indexed {len(postings)} postings ({len(self._ids)} total)")
+        return len(postings)
+    
+    def delete(self, posting_ids: Iterable[str]) -> int:
+        """Remove postings by id; returns how many were removed."""
+        with self._lock:
+            removed = self._delete_locked(list(posting_ids))
+        if removed:
+            logger.info(f"Removed {removed} postings from job index")
+        return removed
+    
+    def _delete_locked(self, posting_ids: List[str]) -> int:
+        """Remove postings; caller holds the lock."""
+        doomed = {posting_id for posting_id in posting_ids if posting_id in self._postings}
+        if not doomed:
+            return 0
+        
+        keep = [i for i, posting_id in enumerate(self._ids) if posting_id not in doomed]
+        self._ids = [self._ids[i] for i in keep]
+        self._matrix = self._matrix[keep] if keep else None
+        for posting_id in doomed:
+            del self._postings[posting_id]
+        return len(doomed)
+    
+    def get(self, posting_id: str) -> Optional[Dict[str, Any]]:
+        """Get a posting's metadata."""
+        posting = self._postings.get(posting_id)
+        return dict(posting) if posting else None
+    
+    def search(self, vector: np.ndarray, k: int = 10) -> List[Dict[str, Any]]:
+        """Return the k postings most similar to vector, best first, with scores."""
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            if self._matrix is None:
+                return []
+            scores = self._matrix @ query
+            k = min(k, len(self._ids))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {**self._postings[self._ids[i]], "similarity": float(scores[i])}
+                for i in top
+            ]
+    
+    def save(self) -> None:
+        """Write the index to disk atomically."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._lock:
+            matrix = self._matrix if self._matrix is not None else np.zeros((0, 0), np.float32)
+            meta = {
+                "model_name": self.model_name,
+                "ids": list(self._ids),
+                "postings": dict(self._postings),
+            }
+        
+        tmp_matrix = self._matrix_path.with_suffix(".tmp.npz")
+        tmp_meta = self._meta_path.with_suffix(".tmp.json")
+        np.savez(tmp_matrix, matrix=matrix)
+        tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+        tmp_matrix.replace(self._matrix_path)
+        tmp_meta.replace(self._meta_path)
+        logger.info(f"Saved job index with {len(meta['ids'])} postings to {self.path}")
+    
+    def load(self) -> None:
+        """Load the index from disk."""
+        meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        if self.model_name and meta.get("model_name") not in (None, self.model_name):
+            logger.warning(
+                f"Job index at {self.path} was built with {meta['model_name']}, "
+                f"not {self.model_name}; starting empty"
+            )
+            return
+        
+        with np.load(self._matrix_path) as data:
+            matrix = data["matrix"]
+        with self._lock:
+            self._ids = meta["ids"]
+            self._postings = meta["postings"]
+            self._matrix = matrix if len(self._ids) else None
+        logger.info(f"Loaded job index with {len(self._ids)} postings from {self.path}")
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get index size and dimension."""
+        with self._lock:
+            return {
+                "postings": len(self._ids),
+                "dimension": int(self._matrix.shape[1]) if self._matrix is not None else 0,
+            }
@@ -2,49 +2,48 @@
 
 import json
 import logging
-import sys
-import asyncio
 from typing import Optional, Dict, Any
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
 from langchain_core.prompts import ChatPromptTemplate
 from ..config.settings import Settings
 from .llm_clients import LLMClients
+from .browser_pool import BrowserPool
+from .fetcher import JobPageFetcher, FetchResult, html_to_text
+from .retrieval import ChunkRetriever
+from .llm_cache import LLMResponseCache
+from .keyword_extractor import KeywordExtractor
 from ..config.prompts import PromptManager
 
 logger = logging.getLogger(__name__)
 
+RAG_QUERY = "job title responsibilities qualifications requirements description"
+
 
 class JobProcessor:
     """Processes job postings from URLs or text."""
     
-    def __init__(self, llm_clients: LLMClients, prompt_manager: PromptManager, settings: Settings):
+    def __init__(
+        self,
+        llm_clients: LLMClients,
+        prompt_manager: PromptManager,
+        settings: Settings,
+        browser_pool: Optional[BrowserPool] = None,
+        llm_cache: Optional[LLMResponseCache] = None,
+        keyword_extractor: Optional[KeywordExtractor] = None
+    ):
         """Initialize job processor."""
         self.llm_clients = llm_clients
         self.prompt_manager = prompt_manager
         self.settings = settings
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self.browser_pool = browser_pool or BrowserPool(settings)
+        self.page_fetcher = JobPageFetcher(settings, self.browser_pool)
+        self._chunk_retriever: Optional[ChunkRetriever] = None
+        self.keyword_extractor = keyword_extractor
     
     async def fetch_url(self, job_posting_url: str) -> str:
-        """Fetch HTML content from URL using Playwright."""
-        if sys.platform == 'win32':
-            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-        
-        def run_sync_playwright():
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context()
-                page = context.new_page()
-                page.goto(job_posting_url, wait_until="networkidle")
-                
-                content = page.content()
-                browser.close()
-                return content
-        
+        """Fetch HTML content from URL using the shared browser pool."""
         try:
-            content = await asyncio.to_thread(run_sync_playwright)
+            content = await self.browser_pool.fetch(job_posting_url)
             logger.info(f"Fetched HTML from URL: {job_posting_url}")
             return content
         except Exception as e:
@@ -54,79 +53,83 @@ class JobProcessor:
     def clean_html(self, html_content: str) -> str:
         """Clean HTML and extract text content."""
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
-            
-            # Remove script and style tags
-            for tag in soup(["script", "style"]):
-                tag.decompose()
-            
-            text = soup.get_text(separator="\n", strip=True)
+            text = html_to_text(html_content)
             logger.info(f"Cleaned HTML, extracted {len(text)} characters")
             return text
         except Exception as e:
             logger.error(f"Error cleaning HTML: {e}")
             raise ValueError(f"Failed to clean HTML: {e}")
     
-    def _embed_text(self, text: str) -> InMemoryVectorStore:
-        """Create vector store from text."""
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.settings.chunk_size,
-            chunk_overlap=self.settings.chunk_overlap
-        )
-        
-        documents = [Document(page_content=text)]
-        chunks = text_splitter.split_documents(documents)
-        logger.info(f"Created {len(chunks)} chunks for RAG")
-        
-        vector_store = InMemoryVectorStore.from_documents(
-            chunks,
-            self.llm_clients.embed_llm
-        )
-        
-        return vector_store
+    @property
+    def chunk_retriever(self) -> ChunkRetriever:
+        """Get or create the chunk retriever used by RAG."""
+        if self._chunk_retriever is None:
+            self._chunk_retriever = ChunkRetriever(
+                self.llm_clients.embed_llm,
+                self.settings.embedding_model,
+                chunk_size=self.settings.chunk_size,
+                chunk_overlap=self.settings.chunk_overlap
+            )
+        return self._chunk_retriever
+    
+    def _job_rag_messages(self, text: str) -> list:
+        """Build the structured extraction messages used by RAG."""
+        complete_job_rag_prompt = ChatPromptTemplate.from_messages([
+            ("system", self.prompt_manager.job_rag_prompt),
+            ("human", "Extract the job details from this text:\n\n{text}")
+        ])
+        return complete_job_rag_prompt.format_messages(text=text)
+    
+    def _parse_job_json(self, content: str) -> Dict[str, Any]:
+        """Parse JSON response from the RAG chain."""
+        json_text = self._clean_response(content)
+        job_posting_data = json.loads(json_text)
+        logger.info("Successfully extracted job information via RAG")
+        return job_posting_data
     
     def extract_job_with_rag(self, job_extracted_text: str) -> Dict[str, Any]:
         """Extract structured job information using RAG."""
         try:
-            # Create vector store
-            vector_store = self._embed_text(job_extracted_text)
-            
             # Retrieve relevant chunks
-            retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-            query = "job title responsibilities qualifications requirements description"
-            relevant_pieces = retriever.invoke(query)
+            relevant_pieces = self.chunk_retriever.retrieve(job_extracted_text, RAG_QUERY, k=3)
             
             if not relevant_pieces:
                 logger.warning("No relevant chunks found in RAG")
                 return {"error": "No relevant job information found"}
             
-            combined_context = "\n\n".join([doc.page_content for doc in relevant_pieces[:3]])
+            combined_context = "\n\n".join(relevant_pieces)
             
             # Extract structured information
-            complete_job_rag_prompt = ChatPromptTemplate.from_messages([
-                ("system", self.prompt_manager.job_rag_prompt),
-                ("human", "Extract the job details from this text:\n\n{text}")
-            ])
-            
-            chain = complete_job_rag_prompt | self.llm_clients.fast_llm
-            response = chain.invoke({"text": combined_context})
-            
-            # Parse JSON response
-            json_text = response.content.strip()
+            response = self.llm_cache.invoke(
+                "job_rag", self.llm_clients.fast_llm, self._job_rag_messages(combined_context)
+            )
+            return self._parse_job_json(response)
+        
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON parsing error: {e}")
+            raise ValueError(f"Failed to parse job information: {e}")
+        except Exception as e:
+            logger.error(f"Error in RAG extraction: {e}")
+            raise ValueError(f"Failed to extract job information: {e}")
+    
+    async def aextract_job_with_rag(self, job_extracted_text: str) -> Dict[str, Any]:
+        """Extract structured job information using RAG (async)."""
+        try:
+            relevant_pieces = await self.chunk_retriever.aretrieve(
+                job_extracted_text, RAG_QUERY, k=3
+            )
             
-            # Remove code blocks if present
-            if json_text.startswith('```json'):
-                json_text = json_text[7:]
-            if json_text.startswith('```'):
-                json_text = json_text[3:]
-            if json_text.endswith('```'):
-                json_text = json_text[:-3]
-            json_text = json_text.strip()
+            if not relevant_pieces:
+                logger.warning("No relevant chunks found in RAG")
+                return {"error": "No relevant job information found"}
             
-            job_posting_data = json.loads(json_text)
-            logger.info("Successfully extracted job information via RAG")
-            return job_posting_data
+            combined_context = "\n\n".join(relevant_pieces)
             
+            response = await self.llm_cache.ainvoke(
+                "job_rag", self.llm_clients.fast_llm, self._job_rag_messages(combined_context)
+            )
+            return self._parse_job_json(response)
+        
         except json.JSONDecodeError as e:
             logger.error(f"JSON parsing error: {e}")
             raise ValueError(f"Failed to parse job information: {e}")
@@ -134,32 +137,68 @@ class JobProcessor:
             logger.error(f"Error in RAG extraction: {e}")
             raise ValueError(f"Failed to extract job information: {e}")
     
+    async def afetch_job_page(self, job_posting_url: str) -> FetchResult:
+        """Fetch cleaned job page text using the tiered fetcher."""
+        try:
+            return await self.page_fetcher.fetch(job_posting_url)
+        except Exception as e:
+            logger.error(f"Error fetching URL: {e}")
+            raise ValueError(f"Failed to fetch URL: {e}")
+    
     async def extract_job_posting_from_url(self, job_posting_url: str) -> Dict[str, Any]:
         """Complete pipeline for extracting job posting from URL."""
-        html_content = await self.fetch_url(job_posting_url)
-        job_extracted_text = self.clean_html(html_content)
-        job_posting_data = self.extract_job_with_rag(job_extracted_text)
+        fetch_result = await self.afetch_job_page(job_posting_url)
+        job_extracted_text = fetch_result.text
+        job_posting_data = await self.aextract_job_with_rag(job_extracted_text)
         return job_posting_data
     
     def extract_keywords(self, job_posting_text: str) -> str:
-        """Extract keywords from job posting using Fast LLM."""
+        """Extract keywords from job posting (Fast LLM unless a local extractor is set)."""
         try:
+            if self.keyword_extractor is not None:
+                content = self.keyword_extractor.extract(job_posting_text)
+                logger.info(f"Extracted keywords from job posting ({self.keyword_extractor.name})")
+                return content
+            
             prompt = self.prompt_manager.format_job_keywords_prompt(job_posting_text)
-            response = self.llm_clients.fast_llm.invoke([("human", prompt)])
+            response = self.llm_cache.invoke(
+                "job_keywords", self.llm_clients.fast_llm, [("human", prompt)]
+            )
+            content = self._clean_response(response)
             
-            # Clean JSON response
-            content = response.content.strip()
-            if content.startswith('```json'):
-                content = content[7:]
-            if content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
+            logger.info("Extracted keywords from job posting")
+            return content
+        except Exception as e:
+            logger.error(f"Error extracting job keywords: {e}")
+            raise ValueError(f"Failed to extract job keywords: {e}")
+    
+    async def aextract_keywords(self, job_posting_text: str) -> str:
+        """Extract keywords from job posting (async)."""
+        try:
+            if self.keyword_extractor is not None:
+                content = await self.keyword_extractor.aextract(job_posting_text)
+                logger.info(f"Extracted keywords from job posting ({self.keyword_extractor.name})")
+                return content
+            
+            prompt = self.prompt_manager.format_job_keywords_prompt(job_posting_text)
+            response = await self.llm_cache.ainvoke(
+                "job_keywords", self.llm_clients.fast_llm, [("human", prompt)]
+            )
+            content = self._clean_response(response)
             
             logger.info("Extracted keywords from job posting")
             return content
         except Exception as e:
             logger.error(f"Error extracting job keywords: {e}")
             raise ValueError(f"Failed to extract job keywords: {e}")
-
+    
+    def _clean_response(self, content: str) -> str:
+        """Clean JSON response (remove code blocks if present)."""
+        content = content.strip()
+        if content.startswith('```json'):
+            content = content[7:]
+        if content.startswith('```'):
+            content = content[3:]
+        if content.endswith('```'):
+            content = content[:-3]
+        return content.strip()
@@ -0,0 +1,282 @@
+"""Keyword extraction backends for the CV and job keyword stages.
+
+Backends:
+    llm:   the Fast LLM keyword prompts (cvKeywordsPrompt.txt, jobKeywordsPrompt.txt)
+    local: skills dictionary (config/skillsDictionary.txt) matched with an
+           Aho-Corasick automaton, plus repeated phrases and acronyms found in
+           the text; CPU only, no network round-trip
+
+Both return a JSON array of keywords, so downstream stages (embedding,
+similarity, enhancement prompt) do not depend on the backend in use.
+"""
+
+import asyncio
+import json
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from ..config.prompts import PromptManager
+from ..config.settings import Settings
+
+# Markup and contact details carry no skills but would form repeated phrases
+NOISE = re.compile(r"<[^>]*>|https?://\S+|www\.\S+|\S+@\S+")
+# Hyphens, slashes and underscores match spaces ("problem-solving", "LAN/WAN")
+SEPARATORS = re.compile(r"[\s\-/_]+")
+TOKEN = re.compile(r"[A-Za-z][A-Za-z0-9+#.]*[A-Za-z0-9+#]|[A-Za-z]")
+ACRONYM = re.compile(r"^[A-Z][A-Z0-9]{1,5}$")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also an and any are as at be because been
+before being below between both but by can could did do does doing down during each either
+etc few for from further had has have having he her here hers him his how i if in into is
+it its itself just least less like made make many may me more most much must my new no nor
+not now of off on once one only or other our ours out over own per same she should so some
+such than that the their them then there these they this those through to too under until
+up upon us use used using very via was we well were what when where which while who whom
+why will with within without would you your yours
+ability able across based daily etc excellent experience experienced including key knowledge
+looking plus preferred related required requirements responsibilities role skills strong
+team work working years ensure ensuring provide providing help support various
+""".split())
+# All-caps words that are not acronyms worth reporting
+NON_ACRONYMS = frozenset({"I", "A", "AM", "PM", "OK", "CV", "TO", "OF", "IN", "ON", "AT", "AND"})
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher (one pass over the text for all patterns)."""
+    
+    def __init__(self, patterns: Iterable[str]):
+        """Build the automaton for patterns."""
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(index)
+        
+        # Breadth-first, so failure links of shallower nodes are final when used
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, pattern index) of every occurrence in text."""
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for index in self._output[node]:
+                yield position + 1 - len(self.patterns[index]), position + 1, index
+
+
+def normalize(text: str) -> str:
+    """Collapse separators to single spaces (case preserved)."""
+    return SEPARATORS.sub(" ", text)
+
+
+def _lower(text: str) -> str:
+    """Lowercase without changing the length (a few Unicode characters would)."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+@dataclass
+class SkillsDictionary:
+    """Parsed skills dictionary and its automaton."""
+    terms: List[str] = field(default_factory=list)  # normalized term per pattern
+    canonical: List[str] = field(default_factory=list)  # reported name per pattern
+    case_sensitive: List[bool] = field(default_factory=list)
+    known: Set[str] = field(default_factory=set)  # lowercased terms and names
+    automaton: Optional[AhoCorasick] = None
+    
+    @classmethod
+    def parse(cls, text: str) -> "SkillsDictionary":
+        """Parse "Canonical | alias | ..." lines (# starts a comment)."""
+        dictionary = cls()
+        seen = set()
+        for line in text.splitlines():
+            if line.lstrip().startswith("#"):
+                continue
+            names = [name.strip() for name in line.split("|") if name.strip()]
+            for name in names:
+                term = normalize(name)
+                key = term if len(term) <= 2 else _lower(term)
+                if key in seen:
+                    continue
+                seen.add(key)
+                dictionary.terms.append(term)
+                dictionary.canonical.append(names[0])
+                dictionary.case_sensitive.append(len(term) <= 2)
+                dictionary.known.update((_lower(term), _lower(names[0])))
+        dictionary.automaton = AhoCorasick(_lower(term) for term in dictionary.terms)
+        return dictionary
+
+
+class KeywordExtractor(ABC):
+    """Extracts keywords from CV or job posting text as a JSON array."""
+    
+    name: str
+    
+    @abstractmethod
+    def extract(self, text: str) -> str:
+        """Extract keywords from text."""
+    
+    async def aextract(self, text: str) -> str:
+        """Extract keywords without blocking the event loop."""
+        return await asyncio.to_thread(self.extract, text)
+
+
+class DictionaryKeywordExtractor(KeywordExtractor):
+    """Skills dictionary matches ranked with repeated phrases and acronyms.
+    
+    Dictionary terms are matched leftmost-longest on whole words ("Node.js"
+    wins over its "JS" suffix) and ranked by frequency, multi-word terms
+    first on ties. Phrases of two or three content words that occur at
+    least twice outside any dictionary match, and all-caps acronyms, follow
+    them to cover skills the dictionary lacks.
+    """
+    
+    name = "local"
+    
+    def __init__(self, prompt_manager: PromptManager, max_keywords: int = 60):
+        """Initialize extractor; the dictionary is reloaded when the file changes."""
+        self.prompt_manager = prompt_manager
+        self.max_keywords = max_keywords
+        self._source: Optional[str] = None
+        self._dictionary: Optional[SkillsDictionary] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def dictionary(self) -> SkillsDictionary:
+        """Current dictionary, rebuilt if the file changed."""
+        source = self.prompt_manager.skills_dictionary
+        with self._lock:
+            if source != self._source:
+                self._dictionary = SkillsDictionary.parse(source)
+                self._source = source
+            return self._dictionary
+    
+    def _match_terms(
+        self, dictionary: SkillsDictionary, text: str, lowered: str
+    ) -> List[Tuple[int, int, int]]:
+        """Non-overlapping whole-word dictionary matches, leftmost-longest."""
+        matches = sorted(
+            dictionary.automaton.iter_matches(lowered), key=lambda m: (m[0], m[0] - m[1])
+        )
+        selected = []
+        covered_until = 0
+        for start, end, index in matches:
+            if start < covered_until:
+                continue
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            if dictionary.case_sensitive[index] and text[start:end] != dictionary.terms[index]:
+                continue
+            selected.append((start, end, index))
+            covered_until = end
+        return selected
+    
+    def _phrases(self, text: str, covered: List[Tuple[int, int]]) -> Dict[str, Tuple[int, str]]:
+        """Acronyms and repeated 2-3 word phrases outside dictionary matches."""
+        spans = iter(covered)
+        span = next(spans, None)
+        runs: List[List[Tuple[int, str]]] = [[]]
+        previous_end = 0
+        for token in TOKEN.finditer(text):
+            while span is not None and span[1] <= token.start():
+                span = next(spans, None)
+            inside = span is not None and span[0] < token.end() and token.start() < span[1]
+            word = token.group().rstrip(".")
+            # Phrases never span punctuation, dictionary terms or stopwords
+            if (
+                inside or _lower(word) in STOPWORDS or len(word) < 3
+                or text[previous_end:token.start()].strip()
+            ):
+                runs.append([])
+            if not inside and _lower(word) not in STOPWORDS and len(word) >= 3:
+                runs[-1].append((token.start(), word))
+            if not inside and ACRONYM.match(word) and word not in NON_ACRONYMS:
+                runs.append([(token.start(), word)])
+                runs.append([])
+            previous_end = token.end()
+        
+        counts: Dict[str, Tuple[int, str]] = {}
+        for run in runs:
+            if len(run) == 1 and ACRONYM.match(run[0][1]):
+                key = run[0][1]
+                count, _ = counts.get(key, (0, key))
+                counts[key] = (count + 2, key)  # an acronym counts once, like a repeated phrase
+                continue
+            for size in (2, 3):
+                for i in range(len(run) - size + 1):
+                    phrase = " ".join(word for _, word in run[i:i + size])
+                    key = _lower(phrase)
+                    count, first = counts.get(key, (0, phrase))
+                    counts[key] = (count + 1, first)
+        return {key: value for key, value in counts.items() if value[0] >= 2}
+    
+    def extract(self, text: str) -> str:
+        """Extract keywords from text as a JSON array, best first."""
+        dictionary = self.dictionary
+        text = normalize(NOISE.sub(" ", text))
+        matches = self._match_terms(dictionary, text, _lower(text))
+        
+        # name -> (score, first position); dictionary terms rank before extra phrases
+        scores: Dict[str, Tuple[float, int]] = {}
+        for start, _, index in matches:
+            name = dictionary.canonical[index]
+            score, first = scores.get(name, (0.0, start))
+            scores[name] = (score + 1 + 0.5 * name.count(" "), first)
+        extras: Dict[str, Tuple[float, int]] = {}
+        for key, (score, phrase) in self._phrases(text, [m[:2] for m in matches]).items():
+            if key not in dictionary.known:
+                extras[phrase] = (score, text.find(phrase))
+        
+        ranked = [
+            name
+            for group in (scores, extras)
+            for name in sorted(group, key=lambda name: (-group[name][0], group[name][1]))
+        ]
+        return json.dumps(ranked[:self.max_keywords] if self.max_keywords else ranked)
+
+
+def create_keyword_extractor(
+    backend: str,
+    prompt_manager: PromptManager,
+    settings: Settings
+) -> Optional[KeywordExtractor]:
+    """Extractor for a backend name; None means the Fast LLM prompt."""
+    backend = backend.lower()
+    if backend == "llm":
+        return None
+    if backend == "local":
+        return DictionaryKeywordExtractor(prompt_manager, settings.keywords_local_max)
+    raise ValueError(f"Unknown keyword backend: {backend}")
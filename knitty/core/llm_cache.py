@@ -0,0 +1,368 @@
+"""Memoized LLM responses for deterministic-ish extraction calls."""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_bypass = contextvars.ContextVar("knitty_llm_cache_bypass", default=False)
+
+# Seconds between sweeps of expired rows in the SQLite backend
+PRUNE_INTERVAL = 3600
+
+
+class LLMCacheBackend(ABC):
+    """Storage for cached responses: key -> (content, expires_at)."""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (content, expires_at) or None."""
+    
+    @abstractmethod
+    def set(self, key: str, content: str, expires_at: float) -> None:
+        """Store content until expires_at."""
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove an entry."""
+    
+    @abstractmethod
+    def clear(self) -> int:
+        """Remove all entries; returns how many were removed."""
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored entries."""
+
+
+class MemoryLLMCache(LLMCacheBackend):
+    """Process-local LRU."""
+    
+    def __init__(self, max_entries: int = 512):
+        """Initialize memory backend."""
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return the entry and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def set(self, key: str, content: str, expires_at: float) -> None:
+        """Store the entry, evicting the least recently used beyond max_entries."""
+        with self._lock:
+            self._entries[key] = (content, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> int:
+        """Drop all entries."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        return count
+    
+    def __len__(self) -> int:
+        """Number of entries in memory."""
+        return len(self._entries)
+
+
+class SQLiteLLMCache(LLMCacheBackend):
+    """Single SQLite file shared by all processes on the host."""
+    
+    def __init__(self, db_path: str):
+        """Initialize SQLite backend."""
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Read the entry from the database."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+    
+    def set(self, key: str, content: str, expires_at: float) -> None:
+        """Write the entry, occasionally sweeping expired rows."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, content, expires_at) VALUES (?, ?, ?)",
+                (key, content, expires_at)
+            )
+            now = time.time()
+            if now >= self._next_prune:
+                # Expired rows are also dropped on read; this only bounds the file size
+                self._db.execute("DELETE FROM llm_responses WHERE expires_at < ?", (now,))
+                self._next_prune = now + PRUNE_INTERVAL
+            self._db.commit()
+    
+    def delete(self, key: str) -> None:
+        """Delete the entry row."""
+        with self._lock:
+            self._db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self._db.commit()
+    
+    def clear(self) -> int:
+        """Delete all rows."""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM llm_responses")
+            self._db.commit()
+        return cursor.rowcount
+    
+    def __len__(self) -> int:
+        """Count the stored rows."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+
+class DiskLLMCache(LLMCacheBackend):
+    """One JSON file per entry, sharded by key prefix; easy to inspect or rsync.
+    
+    The entry count is taken from one directory scan and then kept up to
+    date by this process's writes, so it can drift when several processes
+    share the directory.
+    """
+    
+    def __init__(self, directory: str):
+        """Initialize disk backend."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None
+    
+    def _adjust_count(self, delta: int) -> None:
+        """Update the entry count once it is known."""
+        with self._lock:
+            if self._count is not None:
+                self._count = max(self._count + delta, 0)
+    
+    def _path(self, key: str) -> Path:
+        """Sharded file path of a key."""
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Read the entry file; unreadable files count as misses."""
+        try:
+            data = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        return data["content"], data["expires_at"]
+    
+    def set(self, key: str, content: str, expires_at: float) -> None:
+        """Write the entry file atomically via a temporary file."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"content": content, "expires_at": expires_at}), encoding="utf-8"
+        )
+        existed = path.exists()
+        tmp_path.replace(path)
+        if not existed:
+            self._adjust_count(1)
+    
+    def delete(self, key: str) -> None:
+        """Remove the entry file if present."""
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            return
+        self._adjust_count(-1)
+    
+    def clear(self) -> int:
+        """Remove every entry file."""
+        count = 0
+        for path in self.directory.glob("*/*.json"):
+            path.unlink(missing_ok=True)
+            count += 1
+        with self._lock:
+            self._count = 0
+        return count
+    
+    def __len__(self) -> int:
+        """Entry count, scanning the directory only the first time."""
+        with self._lock:
+            if self._count is None:
+                self._count = sum(1 for _ in self.directory.glob("*/*.json"))
+            return self._count
+
+
+class LLMResponseCache:
+    """Caches LLM response content per call site.
+    
+    Keys hash the model name, temperature and the fully formatted messages,
+    so editing a prompt file in config/ (which PromptManager reloads) yields
+    new keys and stale responses are never served. Each call site can have
+    its own TTL. With no backend every call goes straight to the LLM.
+    """
+    
+    def __init__(
+        self,
+        backend: Optional[LLMCacheBackend] = None,
+        default_ttl: float = 604800,
+        ttls: Optional[Dict[str, float]] = None
+    ):
+        """Initialize LLM response cache."""
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether responses are cached at all."""
+        return self.backend is not None
+    
+    @staticmethod
+    @contextmanager
+    def bypassed() -> Iterator[None]:
+        """Skip cache reads (but still store fresh responses) in this context."""
+        token = _bypass.set(True)
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+    
+    @staticmethod
+    def _message_pairs(messages: List[Any]) -> List[Tuple[str, str]]:
+        """Normalize (role, content) tuples and LangChain messages."""
+        return [
+            tuple(message) if isinstance(message, tuple) else (message.type, message.content)
+            for message in messages
+        ]
+    
+    def make_key(self, llm: Any, messages: List[Any]) -> str:
+        """Build cache key from model, temperature and formatted messages."""
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+        payload = json.dumps(
+            [model, getattr(llm, "temperature", None), self._message_pairs(messages)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _record(self, site: str, outcome: str) -> None:
+        with self._lock:
+            site_stats = self._stats.setdefault(site, {"hits": 0, "misses": 0, "bypassed": 0})
+            site_stats[outcome] += 1
+    
+    def _lookup(self, site: str, key: str) -> Optional[str]:
+        """Return cached content if present and fresh."""
+        if _bypass.get():
+            self._record(site, "bypassed")
+            return None
+        
+        entry = self.backend.get(key)
+        if entry is not None:
+            content, expires_at = entry
+            if expires_at > time.time():
+                self._record(site, "hits")
+                logger.info(f"LLM cache hit for {site}")
+                return content
+            self.backend.delete(key)
+        
+        self._record(site, "misses")
+        return None
+    
+    def _store(self, site: str, key: str, content: str) -> None:
+        ttl = self.ttls.get(site, self.default_ttl)
+        if ttl > 0:
+            self.backend.set(key, content, time.time() + ttl)
+    
+    async def _alookup(self, site: str, key: str) -> Optional[str]:
+        """_lookup that reads SQLite or disk backends off the event loop."""
+        if isinstance(self.backend, MemoryLLMCache):
+            return self._lookup(site, key)
+        return await asyncio.to_thread(self._lookup, site, key)
+    
+    async def _astore(self, site: str, key: str, content: str) -> None:
+        """_store that writes SQLite or disk backends off the event loop."""
+        if isinstance(self.backend, MemoryLLMCache):
+            self._store(site, key, content)
+        else:
+            await asyncio.to_thread(self._store, site, key, content)
+    
+    def invoke(self, site: str, llm: Any, messages: List[Any]) -> str:
+        """Return the response content for messages, calling llm on a miss."""
+        if self.backend is None:
+            return llm.invoke(messages).content
+        
+        key = self.make_key(llm, messages)
+        content = self._lookup(site, key)
+        if content is None:
+            content = llm.invoke(messages).content
+            self._store(site, key, content)
+        return content
+    
+    async def ainvoke(self, site: str, llm: Any, messages: List[Any]) -> str:
+        """Return the response content for messages, calling llm on a miss (async)."""
+        if self.backend is None:
+            return (await llm.ainvoke(messages)).content
+        
+        key = self.make_key(llm, messages)
+        content = await self._alookup(site, key)
+        if content is None:
+            content = (await llm.ainvoke(messages)).content
+            await self._astore(site, key, content)
+        return content
+    
+    def clear(self) -> int:
+        """Remove all cached responses."""
+        return self.backend.clear() if self.backend is not None else 0
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get per-site hit/miss counters and entry count."""
+        with self._lock:
+            stats: Dict[str, Any] = {site: dict(counts) for site, counts in self._stats.items()}
+        stats["entries"] = len(self.backend) if self.backend is not None else 0
+        return stats
+
+
+def create_llm_cache(settings: Settings) -> LLMResponseCache:
+    """Create the LLM response cache with the backend selected in settings."""
+    backend_name = settings.llm_cache_backend.lower()
+    if backend_name == "none":
+        backend = None
+    elif backend_name == "memory":
+        backend = MemoryLLMCache(settings.llm_cache_size)
+    elif backend_name == "sqlite":
+        backend = SQLiteLLMCache(settings.llm_cache_path)
+    elif backend_name == "disk":
+        backend = DiskLLMCache(settings.llm_cache_path)
+    else:
+        raise ValueError(f"Unknown LLM cache backend: {settings.llm_cache_backend}")
+    
+    return LLMResponseCache(backend, settings.llm_cache_ttl, settings.llm_cache_ttls)
@@ -1,52 +1,55 @@
 """LLM client initialization and management."""
 
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
 from typing import Optional
 from ..config.settings import Settings
+from ..utils.telemetry import InstrumentedEmbeddings
+from .client_registry import get_client_registry
 
 
 class LLMClients:
     """Manages LLM client instances."""
     
-    def __init__(self, settings: Settings):
-        """Initialize LLM clients with settings."""
+    def __init__(
+        self,
+        settings: Settings,
+        fast_llm: Optional[BaseChatModel] = None,
+        smart_llm: Optional[BaseChatModel] = None,
+        embed_llm: Optional[Embeddings] = None
+    ):
+        """
+        Initialize LLM clients with settings.
+        
+        Clients are taken from the process-wide registry, so pipelines share
+        connection pools and rate limits. Pre-built clients (e.g. the fakes
+        used by the benchmarks) can be injected instead.
+        """
         self.settings = settings
-        self._fast_llm: Optional[ChatOpenAI] = None
-        self._smart_llm: Optional[ChatOpenAI] = None
-        self._embed_llm: Optional[OpenAIEmbeddings] = None
+        self._fast_llm = fast_llm
+        self._smart_llm = smart_llm
+        self._embed_llm = (
+            InstrumentedEmbeddings(embed_llm, settings.embedding_model)
+            if embed_llm is not None else None
+        )
     
     @property
-    def fast_llm(self) -> ChatOpenAI:
-        """Get or create Fast LLM client."""
+    def fast_llm(self) -> BaseChatModel:
+        """Get the shared Fast LLM client."""
         if self._fast_llm is None:
-            self._fast_llm = ChatOpenAI(
-                model=self.settings.fast_llm_model_name,
-                api_key=self.settings.fast_llm_api_key,
-                base_url=self.settings.fast_llm_api_base,
-                temperature=0.3,
-            )
+            self._fast_llm = get_client_registry().chat_model("fast", self.settings, 0.3)
         return self._fast_llm
     
     @property
-    def smart_llm(self) -> ChatOpenAI:
-        """Get or create Smart LLM client."""
+    def smart_llm(self) -> BaseChatModel:
+        """Get the shared Smart LLM client."""
         if self._smart_llm is None:
-            self._smart_llm = ChatOpenAI(
-                model=self.settings.smart_llm_model_name,
-                api_key=self.settings.smart_llm_api_key,
-                base_url=self.settings.smart_llm_api_base,
-                temperature=0.7,
-            )
+            self._smart_llm = get_client_registry().chat_model("smart", self.settings, 0.7)
         return self._smart_llm
     
     @property
-    def embed_llm(self) -> OpenAIEmbeddings:
-        """Get or create Embedding LLM client."""
+    def embed_llm(self) -> Embeddings:
+        """Get the shared Embedding LLM client (timed and counted for /metrics)."""
         if self._embed_llm is None:
-            self._embed_llm = OpenAIEmbeddings(
-                model=self.settings.embed_llm_model_name,
-                api_key=self.settings.embed_llm_api_key,
-                base_url=self.settings.embed_llm_api_base,
-            )
+            self._embed_llm = get_client_registry().embeddings(self.settings)
         return self._embed_llm
-
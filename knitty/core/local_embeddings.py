@@ -0,0 +1,219 @@
+"""In-process embedding backends that need no network access.
+
+Backends (EMBED_BACKEND):
+    openai:  the configured embeddings API (default)
+    hashing: signed feature hashing of words, word bigrams and character
+             trigrams with sublinear term frequencies; deterministic across
+             processes, no model download, lexical rather than semantic
+    onnx:    a sentence-transformers model exported to ONNX, mean pooled
+             (pip install onnxruntime tokenizers; EMBED_ONNX_MODEL_PATH points
+             at a directory holding model.onnx and tokenizer.json)
+
+Texts are embedded in batches of EMBED_LOCAL_BATCH_SIZE spread over a thread
+pool (onnxruntime releases the GIL during inference); async calls run off
+the event loop.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from ..config.settings import Settings
+
+try:
+    import onnxruntime
+    from tokenizers import Tokenizer
+except ImportError:
+    onnxruntime = None
+    Tokenizer = None
+
+WORD = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our the to we with you your"
+    .split()
+)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (zero rows stay zero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class LocalEmbeddings(Embeddings, ABC):
+    """Batched, thread-pooled embeddings computed in-process."""
+    
+    def __init__(self, batch_size: int = 64, workers: int = 0):
+        """Initialize batching (workers=0 uses the CPU count)."""
+        self.batch_size = max(1, batch_size)
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    @abstractmethod
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch into a (len(texts), dimensions) matrix."""
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Return the batch thread pool, creating it on first use."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="local-embed"
+                )
+            return self._pool
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches, spreading several batches over the pool."""
+        if not texts:
+            return []
+        batches = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        if len(batches) == 1 or self.workers == 1:
+            matrices = [self._embed_batch(batch) for batch in batches]
+        else:
+            matrices = list(self._get_pool().map(self._embed_batch, batches))
+        return np.vstack(matrices).astype(np.float32).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text."""
+        return self.embed_documents([text])[0]
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts without blocking the event loop."""
+        # Not the batch pool: embed_documents waits on it and could starve it
+        return await asyncio.to_thread(self.embed_documents, texts)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a single text without blocking the event loop."""
+        return (await self.aembed_documents([text]))[0]
+    
+    def close(self) -> None:
+        """Shut down the batch pool."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+
+@lru_cache(maxsize=262144)
+def _feature(token: str, dimensions: int) -> Tuple[int, float]:
+    """Bucket and sign of a token (stable across processes, unlike hash())."""
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest[:4], "little") % dimensions, 1.0 if digest[4] & 1 else -1.0
+
+
+class HashingEmbeddings(LocalEmbeddings):
+    """Feature-hashed term vectors.
+    
+    Words and word bigrams carry the weight; character trigrams at half
+    weight let inflections ("manage", "management") overlap. Stopwords are
+    dropped and term counts are dampened with 1 + log(count).
+    """
+    
+    def __init__(self, dimensions: int = 1024, batch_size: int = 64, workers: int = 0):
+        """Initialize embedder with the vector size."""
+        super().__init__(batch_size, workers)
+        self.dimensions = dimensions
+    
+    def _terms(self, text: str) -> Counter:
+        """Count the words, word bigrams and character trigrams of text."""
+        words = [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+        terms = Counter(words)
+        terms.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+        for word in set(words):
+            if len(word) > 3:
+                padded = f"<{word}>"
+                terms.update(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return terms
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Hash the weighted terms of each text into one normalized row."""
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for term, count in self._terms(text).items():
+                bucket, sign = _feature(term, self.dimensions)
+                weight = 0.5 if term.startswith("#") else 1.0
+                matrix[row, bucket] += sign * weight * (1.0 + math.log(count))
+        return _normalize_rows(matrix)
+
+
+class OnnxEmbeddings(LocalEmbeddings):
+    """Sentence-transformers model exported to ONNX (optional dependencies)."""
+    
+    def __init__(
+        self,
+        model_path: str,
+        batch_size: int = 64,
+        workers: int = 0,
+        max_length: int = 256
+    ):
+        """Load model.onnx and tokenizer.json from model_path."""
+        if onnxruntime is None:
+            raise ValueError("EMBED_BACKEND=onnx requires the onnxruntime and tokenizers packages")
+        super().__init__(batch_size, workers)
+        path = Path(model_path)
+        model_file = path / "model.onnx" if path.is_dir() else path
+        tokenizer_file = (path if path.is_dir() else path.parent) / "tokenizer.json"
+        if not model_file.exists() or not tokenizer_file.exists():
+            raise ValueError(f"Expected model.onnx and tokenizer.json in {model_path}")
+        
+        options = onnxruntime.SessionOptions()
+        # Batches already run in parallel; keep each inference from oversubscribing cores
+        options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._session = onnxruntime.InferenceSession(
+            str(model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+        self._tokenizer = Tokenizer.from_file(str(tokenizer_file))
+        self._tokenizer.enable_truncation(max_length)
+        self._tokenizer.enable_padding()
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Run the model on one tokenized batch and mean-pool the token vectors."""
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array(
+            [encoding.attention_mask for encoding in encodings], dtype=np.int64
+        )
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        output = self._session.run(None, feeds)[0]
+        if output.ndim == 2:  # Exported with pooling included
+            return _normalize_rows(output)
+        mask = attention_mask[..., None].astype(output.dtype)
+        pooled = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return _normalize_rows(pooled)
+
+
+def create_local_embeddings(settings: Settings) -> LocalEmbeddings:
+    """Local embeddings for settings.embed_backend ("hashing" or "onnx")."""
+    backend = settings.embed_backend.lower()
+    if backend == "hashing":
+        return HashingEmbeddings(
+            settings.embed_local_dimensions,
+            settings.embed_local_batch_size,
+            settings.embed_local_workers
+        )
+    if backend == "onnx":
+        if not settings.embed_onnx_model_path:
+            raise ValueError("EMBED_BACKEND=onnx requires EMBED_ONNX_MODEL_PATH")
+        return OnnxEmbeddings(
+            settings.embed_onnx_model_path,
+            settings.embed_local_batch_size,
+            settings.embed_local_workers
+        )
+    raise ValueError(f"Unknown embedding backend: {settings.embed_backend}")
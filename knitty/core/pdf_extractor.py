@@ -0,0 +1,220 @@
+"""PDF text extraction from paths, bytes or file objects.
+
+Pages are extracted one at a time and extraction stops as soon as the page
+or character cap is reached, so a huge upload cannot exhaust memory. Long
+documents are split into page ranges extracted in parallel in a process
+pool (text extraction is CPU-bound and holds the GIL).
+
+Backends:
+    pypdf:   pure Python, always available
+    pymupdf: MuPDF bindings, several times faster (pip install pymupdf)
+    auto:    pymupdf if installed, else pypdf
+"""
+
+import asyncio
+import io
+import logging
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Type, Union
+from ..config.settings import Settings
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+logger = logging.getLogger(__name__)
+
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+# What backends (and pool workers) receive: a filesystem path or the raw bytes
+PdfInput = Union[str, bytes]
+
+
+class PdfBackend(ABC):
+    """Opens a PDF and extracts the text of page ranges."""
+    
+    name: str
+    
+    @abstractmethod
+    def page_count(self, pdf: PdfInput) -> int:
+        """Number of pages in the document."""
+    
+    @abstractmethod
+    def iter_pages(
+        self, pdf: PdfInput, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[str]:
+        """Yield the text of pages start..stop-1."""
+
+
+class PypdfBackend(PdfBackend):
+    """pypdf, the parser behind langchain's PyPDFLoader."""
+    
+    name = "pypdf"
+    
+    @staticmethod
+    def _reader(pdf: PdfInput):
+        from pypdf import PdfReader
+        return PdfReader(io.BytesIO(pdf) if isinstance(pdf, bytes) else pdf)
+    
+    def page_count(self, pdf: PdfInput) -> int:
+        return len(self._reader(pdf).pages)
+    
+    def iter_pages(
+        self, pdf: PdfInput, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[str]:
+        reader = self._reader(pdf)
+        for index in range(start, min(stop or len(reader.pages), len(reader.pages))):
+            yield reader.pages[index].extract_text()
+
+
+class PymupdfBackend(PdfBackend):
+    """PyMuPDF (optional dependency)."""
+    
+    name = "pymupdf"
+    
+    @staticmethod
+    def _open(pdf: PdfInput):
+        if isinstance(pdf, bytes):
+            return pymupdf.open(stream=pdf, filetype="pdf")
+        return pymupdf.open(pdf)
+    
+    def page_count(self, pdf: PdfInput) -> int:
+        with self._open(pdf) as document:
+            return document.page_count
+    
+    def iter_pages(
+        self, pdf: PdfInput, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[str]:
+        with self._open(pdf) as document:
+            for index in range(start, min(stop or document.page_count, document.page_count)):
+                yield document[index].get_text()
+
+
+BACKENDS: Dict[str, Type[PdfBackend]] = {
+    "pypdf": PypdfBackend,
+    "pymupdf": PymupdfBackend,
+}
+
+
+def create_pdf_backend(name: str = "auto") -> PdfBackend:
+    """Create the named backend; "auto" prefers pymupdf when installed."""
+    name = name.lower()
+    if name == "auto":
+        name = "pymupdf" if pymupdf is not None else "pypdf"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name}")
+    if name == "pymupdf" and pymupdf is None:
+        raise ValueError("PDF_BACKEND=pymupdf requires the pymupdf package")
+    return BACKENDS[name]()
+
+
+def _extract_range(backend_name: str, pdf: PdfInput, start: int, stop: int) -> List[str]:
+    """Pool worker: text of pages start..stop-1."""
+    return list(BACKENDS[backend_name]().iter_pages(pdf, start, stop))
+
+
+def read_pdf_source(source: PdfSource) -> PdfInput:
+    """Normalize a source to a path string or bytes (file objects are read)."""
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    return source.read()
+
+
+def read_pdf_bytes(source: PdfSource) -> bytes:
+    """Read the raw bytes of a PDF source."""
+    pdf = read_pdf_source(source)
+    return pdf if isinstance(pdf, bytes) else Path(pdf).read_bytes()
+
+
+class PdfExtractor:
+    """Extracts CV text with page/character caps and optional parallelism."""
+    
+    def __init__(self, settings: Settings):
+        """Initialize extractor from settings."""
+        self.backend = create_pdf_backend(settings.pdf_backend)
+        self.max_pages = settings.pdf_max_pages
+        self.max_chars = settings.pdf_max_chars
+        self.parallel_min_pages = settings.pdf_parallel_min_pages
+        self.workers = settings.pdf_workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def _page_limit(self, pdf: PdfInput) -> int:
+        pages = self.backend.page_count(pdf)
+        if self.max_pages and pages > self.max_pages:
+            logger.warning(f"PDF has {pages} pages, extracting the first {self.max_pages}")
+            return self.max_pages
+        return pages
+    
+    def _join(self, pages: Iterator[str]) -> str:
+        """Join page texts, stopping once the character cap is reached."""
+        parts = []
+        total = 0
+        for text in pages:
+            parts.append(text)
+            total += len(text) + 1
+            if self.max_chars and total >= self.max_chars:
+                logger.warning(f"PDF text truncated to {self.max_chars} characters")
+                break
+        text = "\n".join(parts)
+        return text[:self.max_chars] if self.max_chars else text
+    
+    def _ranges(self, pages: int) -> List[Tuple[int, int]]:
+        size = -(-pages // self.workers)
+        return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+    
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    def _use_pool(self, pages: int) -> bool:
+        return self.workers > 1 and 0 < self.parallel_min_pages <= pages
+    
+    def extract(self, source: PdfSource) -> str:
+        """Extract text from a PDF path, bytes or binary file object."""
+        pdf = read_pdf_source(source)
+        pages = self._page_limit(pdf)
+        if self._use_pool(pages):
+            try:
+                pool = self._get_pool()
+                futures = [
+                    pool.submit(_extract_range, self.backend.name, pdf, start, stop)
+                    for start, stop in self._ranges(pages)
+                ]
+                return self._join(text for future in futures for text in future.result())
+            except BrokenProcessPool:
+                logger.warning("PDF worker pool broke, extracting in-process")
+                self._pool = None
+        return self._join(self.backend.iter_pages(pdf, 0, pages))
+    
+    async def aextract(self, source: PdfSource) -> str:
+        """Extract text without blocking the event loop."""
+        pdf = await asyncio.to_thread(read_pdf_source, source)
+        pages = await asyncio.to_thread(self._page_limit, pdf)
+        if self._use_pool(pages):
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            try:
+                chunks = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _extract_range, self.backend.name, pdf, start, stop)
+                    for start, stop in self._ranges(pages)
+                ))
+                return self._join(text for chunk in chunks for text in chunk)
+            except BrokenProcessPool:
+                logger.warning("PDF worker pool broke, extracting in-process")
+                self._pool = None
+        return await asyncio.to_thread(self._join, self.backend.iter_pages(pdf, 0, pages))
+    
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,114 +1,769 @@
 """Main processing pipeline that orchestrates all components."""
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Optional, Dict, Any
+import time
+from contextlib import nullcontext
+from typing import Optional, Dict, Any, Set, Tuple, List, AsyncIterator
 from ..config.settings import Settings, get_settings
 from ..config.prompts import PromptManager
 from .llm_clients import LLMClients
 from .cv_processor import CVProcessor
 from .job_processor import JobProcessor
+from .browser_pool import BrowserPool
 from .similarity import SimilarityCalculator
+from .section_scorer import SectionScorer
+from .embedding_cache import EmbeddingCache
 from .enhancer import CVEnhancer
+from .prompt_budget import PromptBudget
+from .keyword_extractor import DictionaryKeywordExtractor, create_keyword_extractor
+from .stages import StageGraph, EventCallback
+from .job_cache import JobPostingCache, CachedJobPosting, normalize_url
+from .job_index import JobIndex
+from .llm_cache import LLMResponseCache, create_llm_cache
+from .pdf_extractor import PdfExtractor, PdfSource, read_pdf_bytes
+from .cv_store import CVStore, make_cv_id
+from ..utils.telemetry import PIPELINE_DURATION, configure_tracing, span
 
 logger = logging.getLogger(__name__)
 
+# Stages of the CV branch, all of which the CV store can provide
+CV_STAGES = frozenset({"cv_raw_text", "cv_text", "cv_keywords", "cv_embedding"})
+
 
 class EnhancementPipeline:
     """Main pipeline for CV enhancement."""
     
-    def __init__(self, settings: Optional[Settings] = None):
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        browser_pool: Optional[BrowserPool] = None,
+        llm_clients: Optional[LLMClients] = None
+    ):
         """Initialize pipeline with settings."""
         self.settings = settings or get_settings()
+        configure_tracing(self.settings.otel_enabled, self.settings.otel_service_name)
         self.prompt_manager = PromptManager(self.settings.config_dir)
-        self.llm_clients = LLMClients(self.settings)
-        self.cv_processor = CVProcessor(self.llm_clients, self.prompt_manager)
+        self.llm_clients = llm_clients or LLMClients(self.settings)
+        self.llm_cache = create_llm_cache(self.settings)
+        self.pdf_extractor = PdfExtractor(self.settings)
+        # One extractor per backend, shared by the CV and job call sites
+        keyword_extractors = {
+            backend: create_keyword_extractor(backend, self.prompt_manager, self.settings)
+            for backend in {self.settings.cv_keywords_backend, self.settings.job_keywords_backend}
+        }
+        self.cv_processor = CVProcessor(
+            self.llm_clients, self.prompt_manager, self.llm_cache, self.pdf_extractor,
+            keyword_extractors[self.settings.cv_keywords_backend]
+        )
+        self.browser_pool = browser_pool or BrowserPool(self.settings)
         self.job_processor = JobProcessor(
-            self.llm_clients, self.prompt_manager, self.settings
+            self.llm_clients, self.prompt_manager, self.settings, self.browser_pool,
+            self.llm_cache, keyword_extractors[self.settings.job_keywords_backend]
+        )
+        self.embedding_cache = EmbeddingCache(
+            max_entries=self.settings.embedding_cache_size,
+            db_path=self.settings.embedding_cache_path
+        )
+        self.similarity_calculator = SimilarityCalculator(
+            self.llm_clients, self.embedding_cache
         )
-        self.similarity_calculator = SimilarityCalculator(self.llm_clients)
+        self.section_scorer = SectionScorer(self.similarity_calculator)
+        self.prompt_budget = PromptBudget(self.settings)
         self.enhancer = CVEnhancer(
-            self.llm_clients, self.prompt_manager, self.similarity_calculator
+            self.llm_clients, self.prompt_manager, self.similarity_calculator,
+            self.settings.retry_mode, self.settings.retry_sections
         )
+        self.job_cache = (
+            JobPostingCache(self.settings.job_cache_path, self.settings.job_cache_ttl)
+            if self.settings.job_cache_enabled else None
+        )
+        self.cv_store = (
+            CVStore(
+                self.settings.cv_store_size,
+                self.settings.cv_store_path,
+                self.settings.cv_store_max_disk_entries
+            )
+            if self.settings.cv_store_enabled else None
+        )
+        self.job_index = JobIndex(
+            self.settings.job_index_path, self.settings.embedding_model
+        )
+    
+    def _warm_prompts(self) -> None:
+        """Read the prompt files and build local skills dictionaries."""
+        for name in (
+            "cv_template", "cv_keywords_prompt", "job_keywords_prompt",
+            "job_rag_prompt", "cv_enhance_prompt", "cv_refine_prompt"
+        ):
+            getattr(self.prompt_manager, name)
+        for extractor in (self.cv_processor.keyword_extractor, self.job_processor.keyword_extractor):
+            if isinstance(extractor, DictionaryKeywordExtractor):
+                logger.debug(f"Loaded {len(extractor.dictionary.terms)} skills dictionary terms")
+    
+    def _warm_tokenizer(self) -> None:
+        """Load the Smart LLM tokenizer (tiktoken may download its BPE file)."""
+        logger.debug(f"Loaded tokenizer {self.prompt_budget.counter.name}")
+        self.enhancer.token_counter
+    
+    def _warm_llm_clients(self) -> None:
+        """Create the shared LLM and embedding clients (no requests are sent)."""
+        for name in ("fast_llm", "smart_llm", "embed_llm"):
+            getattr(self.llm_clients, name)
+    
+    async def warmup(self) -> Dict[str, str]:
+        """
+        Initialize lazily created resources ahead of the first request.
+        
+        Returns:
+            "ok" or the error for each component; failures are logged, not
+            raised, so the affected component falls back to lazy start-up
+        """
+        steps = {
+            "prompts": lambda: asyncio.to_thread(self._warm_prompts),
+            "tokenizer": lambda: asyncio.to_thread(self._warm_tokenizer),
+            "llm_clients": lambda: asyncio.to_thread(self._warm_llm_clients),
+        }
+        if self.settings.warmup_browser_pool:
+            steps["browser_pool"] = self.browser_pool.warmup
+        
+        status = {}
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                await step()
+                status[name] = "ok"
+                logger.info(f"Warmed up {name} in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                status[name] = f"failed: {e}"
+                logger.warning(f"Warm-up of {name} failed: {e}")
+        return status
+    
+    async def aclose(self) -> None:
+        """Release long-lived resources such as the browser pool."""
+        await self.job_processor.page_fetcher.close()
+        await self.browser_pool.close()
+        self.pdf_extractor.close()
+    
+    async def _lookup_job_cache(
+        self, job_posting_url: str
+    ) -> Tuple[Optional[CachedJobPosting], str]:
+        """Return a usable cached job posting and the lookup outcome."""
+        entry = await asyncio.to_thread(self.job_cache.get, job_posting_url)
+        outcome = "miss"
+        backend = self.settings.job_keywords_backend
+        if entry is not None and entry.keywords_backend != backend:
+            # Keywords from another extractor would not match this configuration
+            logger.info(
+                f"Job cache entry for {job_posting_url} has {entry.keywords_backend} keywords, "
+                f"expected {backend}"
+            )
+            entry = None
+        if entry is not None:
+            if entry.is_fresh(self.job_cache.ttl):
+                outcome = "hit"
+            elif entry.can_revalidate and await self.job_processor.page_fetcher.is_not_modified(
+                job_posting_url, entry.etag, entry.last_modified
+            ):
+                await asyncio.to_thread(self.job_cache.touch, job_posting_url)
+                outcome = "revalidated"
+        
+        self.job_cache.record({"hit": "hits", "revalidated": "revalidated"}.get(outcome, "misses"))
+        logger.info(f"Job cache {outcome} for {job_posting_url}")
+        return (entry if outcome != "miss" else None), outcome
     
     async def process(
         self,
-        cv_pdf_path: str,
+        cv_pdf_path: Optional[PdfSource] = None,
         job_posting_url: Optional[str] = None,
         job_posting_text: Optional[str] = None,
-        additional_info: Optional[str] = None
+        additional_info: Optional[str] = None,
+        bypass_cache: bool = False,
+        cv_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process CV enhancement pipeline.
         
         Args:
-            cv_pdf_path: Path to CV PDF file
+            cv_pdf_path: CV PDF as a path, bytes or binary file object
             job_posting_url: Optional URL to job posting
             job_posting_text: Optional direct job posting text
             additional_info: Optional additional CV information
+            bypass_cache: Ignore cached job postings, CV artifacts and LLM
+                responses (fresh results are still stored)
+            cv_id: Id of a CV in the CV store, instead of cv_pdf_path
         
         Returns:
             Dictionary with enhanced CV and metrics
         """
+        if not job_posting_url and not job_posting_text:
+            raise ValueError("Either job_posting_url or job_posting_text must be provided")
+        if cv_pdf_path is None and cv_id is None:
+            raise ValueError("Either a CV PDF or a cv_id must be provided")
+        
         try:
-            # Step 1: Process CV
-            logger.info("Step 1: Processing CV...")
-            cv_raw_text = self.cv_processor.extract_text_from_pdf(cv_pdf_path)
-            cv_text = self.cv_processor.combine_cv_content(cv_raw_text, additional_info)
-            cv_keywords = self.cv_processor.extract_keywords(cv_text)
+            result = await self._run(
+                cv_pdf_path, additional_info, job_posting_url, job_posting_text,
+                bypass_cache=bypass_cache, cv_id=cv_id
+            )
+            logger.info("Pipeline completed successfully")
+            return result
+        
+        except Exception as e:
+            logger.error(f"Pipeline error: {e}", exc_info=True)
+            raise
+    
+    async def process_stream(
+        self,
+        cv_pdf_path: Optional[PdfSource] = None,
+        job_posting_url: Optional[str] = None,
+        job_posting_text: Optional[str] = None,
+        additional_info: Optional[str] = None,
+        bypass_cache: bool = False,
+        cv_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the pipeline and yield progress events as they happen.
+        
+        Events, in order of appearance:
+            {"event": "stage", "stage": ..., "status": started|completed|failed}
+            {"event": "token", "attempt": n, "data": ...} for enhanced CV chunks
+            {"event": "retry", "attempt": 2, "similarity": ...}
+            {"event": "candidate_generated", "attempt": n} in best-of-N mode without a target
+            {"event": "candidate", "attempt": n, "similarity": ...} in best-of-N mode
+            {"event": "similarity", "baseline_similarity": ..., ...}
+            {"event": "result", ...process() result...} or {"event": "error", ...}
+        """
+        if not job_posting_url and not job_posting_text:
+            raise ValueError("Either job_posting_url or job_posting_text must be provided")
+        if cv_pdf_path is None and cv_id is None:
+            raise ValueError("Either a CV PDF or a cv_id must be provided")
+        
+        events: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        run_task = asyncio.create_task(self._run(
+            cv_pdf_path, additional_info, job_posting_url, job_posting_text,
+            on_event=events.put_nowait, bypass_cache=bypass_cache, cv_id=cv_id
+        ))
+        run_task.add_done_callback(lambda _: events.put_nowait(done))
+        
+        try:
+            while True:
+                event = await events.get()
+                if event is done:
+                    break
+                yield event
+            
+            try:
+                result = run_task.result()
+            except Exception as e:
+                logger.error(f"Pipeline error: {e}", exc_info=True)
+                yield {"event": "error", "detail": str(e)}
+                return
             
-            # Step 2: Process Job Posting
-            logger.info("Step 2: Processing job posting...")
-            if job_posting_url:
-                job_posting_data = await self.job_processor.extract_job_posting_from_url(
-                    job_posting_url
+            yield {
+                "event": "similarity",
+                "baseline_similarity": result["baseline_similarity"],
+                "final_similarity": result["final_similarity"],
+                "improvement": result["improvement"],
+            }
+            yield {"event": "result", **result}
+        finally:
+            run_task.cancel()
+    
+    async def process_batch(
+        self,
+        cv_pdf_path: Optional[PdfSource],
+        postings: List[Dict[str, Optional[str]]],
+        additional_info: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        cv_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Enhance one CV against many job postings.
+        
+        CV-side artifacts (text, keywords, embedding) are computed once; the
+        job-side work and enhancement for each posting then run with bounded
+        concurrency. Results are yielded as soon as each posting completes.
+        
+        Args:
+            cv_pdf_path: CV PDF as a path, bytes or binary file object
+            postings: List of dicts with job_posting_url or job_posting_text
+            additional_info: Optional additional CV information
+            concurrency: Maximum postings processed at once
+            cv_id: Id of a CV in the CV store, instead of cv_pdf_path
+        
+        Yields:
+            Result dictionaries like process() plus "index" into postings, or
+            {"index": ..., "error": ...} for postings that failed
+        """
+        for index, posting in enumerate(postings):
+            if not posting.get("job_posting_url") and not posting.get("job_posting_text"):
+                raise ValueError(
+                    f"Posting {index}: either job_posting_url or job_posting_text must be provided"
+                )
+        
+        cv_results = await self.prepare_cv(cv_pdf_path, additional_info, cv_id=cv_id)
+        logger.info(f"Prepared CV artifacts, processing {len(postings)} postings")
+        
+        semaphore = asyncio.Semaphore(concurrency or self.settings.batch_concurrency)
+        
+        async def run_one(index: int, posting: Dict[str, Optional[str]]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await self._run(
+                        cv_pdf_path, additional_info,
+                        posting.get("job_posting_url"), posting.get("job_posting_text"),
+                        initial=cv_results
+                    )
+                    return {"index": index, **result}
+                except Exception as e:
+                    logger.error(f"Batch posting {index} failed: {e}")
+                    return {"index": index, "error": str(e)}
+        
+        tasks = [asyncio.create_task(run_one(i, p)) for i, p in enumerate(postings)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def index_postings(
+        self,
+        postings: List[Dict[str, Any]],
+        concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Add job postings to the job index.
+        
+        Each posting needs job_keywords, job_posting_text or job_posting_url;
+        missing keywords are extracted the same way as in process(). An
+        optional "id" identifies the posting for later updates and deletes
+        (default: the normalized URL or a hash of the text). Other fields
+        such as "title" are stored and returned by search.
+        
+        Returns:
+            {"added": n, "failed": [{"index": ..., "error": ...}], "total": ...}
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.settings.job_index_concurrency)
+        
+        async def prepare(posting: Dict[str, Any]) -> Dict[str, Any]:
+            url = posting.get("job_posting_url")
+            text = posting.get("job_posting_text")
+            keywords = posting.get("job_keywords")
+            if not keywords and not url and not text:
+                raise ValueError(
+                    "Either job_keywords, job_posting_url or job_posting_text must be provided"
                 )
-                # Convert to string if it's a dict
-                if isinstance(job_posting_data, dict):
-                    job_posting_text = json.dumps(job_posting_data, indent=2)
-                else:
-                    job_posting_text = str(job_posting_data)
-            elif job_posting_text:
-                pass  # Use provided text
-            else:
-                raise ValueError("Either job_posting_url or job_posting_text must be provided")
             
-            job_keywords = self.job_processor.extract_keywords(job_posting_text)
+            if not keywords:
+                async with semaphore:
+                    keywords = await self._job_keywords(url, text)
             
-            # Step 3: Calculate baseline similarity
-            logger.info("Step 3: Calculating baseline similarity...")
-            baseline_similarity = self.similarity_calculator.calculate_similarity(
-                cv_raw_text, job_keywords
+            entry = {k: v for k, v in posting.items() if k != "job_posting_text"}
+            entry["job_keywords"] = keywords
+            entry["id"] = str(posting.get("id") or (
+                normalize_url(url) if url else hashlib.sha256(text.encode("utf-8")).hexdigest()
+            ))
+            return entry
+        
+        prepared = await asyncio.gather(*(prepare(p) for p in postings), return_exceptions=True)
+        entries, failed = [], []
+        for index, entry in enumerate(prepared):
+            if isinstance(entry, Exception):
+                logger.error(f"Indexing posting {index} failed: {entry}")
+                failed.append({"index": index, "error": str(entry)})
+            else:
+                entries.append(entry)
+        
+        vectors = await self.similarity_calculator.aembed_many(
+            [entry["job_keywords"] for entry in entries]
+        )
+        added = self.job_index.add(entries, vectors)
+        await asyncio.to_thread(self.job_index.save)
+        return {"added": added, "failed": failed, "total": len(self.job_index)}
+    
+    async def index_jsonl(self, lines: List[str]) -> Dict[str, Any]:
+        """Add job postings from JSON Lines (one posting object per line)."""
+        postings = []
+        for number, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    postings.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {number}: {e}")
+        return await self.index_postings(postings)
+    
+    async def remove_postings(self, posting_ids: List[str]) -> int:
+        """Remove postings from the job index."""
+        removed = self.job_index.delete(posting_ids)
+        if removed:
+            await asyncio.to_thread(self.job_index.save)
+        return removed
+    
+    async def rank_postings(
+        self,
+        cv_pdf_path: Optional[PdfSource] = None,
+        k: Optional[int] = None,
+        cv_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the indexed postings that best match a CV.
+        
+        Uses the same CV embedding as the baseline similarity, so scores are
+        comparable with process() and only the embedding model is called
+        (not at all for a CV already in the CV store).
+        """
+        cv_pdf, _, stored = await self._lookup_cv(cv_pdf_path, cv_id, None, False)
+        cv_raw_text = stored.get("cv_raw_text")
+        if cv_raw_text is None:
+            cv_raw_text = await self.cv_processor.aextract_text_from_pdf(cv_pdf)
+        cv_embedding = stored.get("cv_embedding")
+        if cv_embedding is None:
+            cv_embedding = await self.similarity_calculator.aembed_text(cv_raw_text)
+        return self.job_index.search(cv_embedding, k or self.settings.job_index_top_k)
+    
+    async def prepare_cv(
+        self,
+        cv_pdf_path: Optional[PdfSource] = None,
+        additional_info: Optional[str] = None,
+        cv_id: Optional[str] = None,
+        bypass_cache: bool = False,
+        embed: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Run (or reuse from the CV store) the CV branch of the pipeline.
+        
+        Args:
+            embed: Also compute the CV embedding if it is not stored yet
+        
+        Returns:
+            Dictionary with cv_id and the CV stage results (cv_raw_text,
+            cv_text, cv_keywords and, if available, cv_embedding)
+        """
+        if cv_pdf_path is None and cv_id is None:
+            raise ValueError("Either a CV PDF or a cv_id must be provided")
+        
+        cv_pdf, cv_id, initial = await self._lookup_cv(
+            cv_pdf_path, cv_id, additional_info, bypass_cache
+        )
+        graph = StageGraph()
+        self._add_cv_stages(graph, cv_pdf, additional_info, embed=embed)
+        with LLMResponseCache.bypassed() if bypass_cache else nullcontext():
+            results = await graph.run(initial)
+        await self._store_cv(cv_id, additional_info, set(initial), results)
+        return {"cv_id": cv_id, **results}
+    
+    async def _job_keywords(
+        self,
+        job_posting_url: Optional[str],
+        job_posting_text: Optional[str]
+    ) -> str:
+        """Extract job keywords for one posting, using the job cache for URLs."""
+        if job_posting_url and self.job_cache is not None:
+            cached_job, _ = await self._lookup_job_cache(job_posting_url)
+            if cached_job is not None:
+                return cached_job.job_keywords
+        
+        graph = StageGraph()
+        self._add_job_stages(graph, job_posting_url, job_posting_text)
+        results = await graph.run()
+        return results["job_keywords"]
+    
+    async def _run(
+        self,
+        cv_pdf_path: PdfSource,
+        additional_info: Optional[str],
+        job_posting_url: Optional[str],
+        job_posting_text: Optional[str],
+        initial: Optional[Dict[str, Any]] = None,
+        on_event: Optional[EventCallback] = None,
+        bypass_cache: bool = False,
+        cv_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run the stage graph for one posting and build the result dict."""
+        started = time.perf_counter()
+        status = "failed"
+        try:
+            with span("pipeline.run", **{"job.source": "url" if job_posting_url else "text"}):
+                result = await self._run_graph(
+                    cv_pdf_path, additional_info, job_posting_url, job_posting_text,
+                    initial, on_event, bypass_cache, cv_id
+                )
+            status = "completed"
+            return result
+        finally:
+            PIPELINE_DURATION.observe(time.perf_counter() - started, status=status)
+    
+    async def _run_graph(
+        self,
+        cv_pdf_path: PdfSource,
+        additional_info: Optional[str],
+        job_posting_url: Optional[str],
+        job_posting_text: Optional[str],
+        initial: Optional[Dict[str, Any]],
+        on_event: Optional[EventCallback],
+        bypass_cache: bool,
+        cv_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build and run the stage graph; see _run."""
+        initial = dict(initial or {})
+        stage_timings = {}
+        cv_id = initial.pop("cv_id", cv_id)
+        
+        async def lookup_cv():
+            if "cv_raw_text" in initial:
+                return cv_pdf_path, cv_id, {}
+            lookup_started = time.perf_counter()
+            found = await self._lookup_cv(cv_pdf_path, cv_id, additional_info, bypass_cache)
+            stage_timings["cv_store_lookup"] = time.perf_counter() - lookup_started
+            return found
+        
+        async def lookup_job():
+            if not job_posting_url or self.job_cache is None or bypass_cache:
+                return None, None
+            lookup_started = time.perf_counter()
+            found = await self._lookup_job_cache(job_posting_url)
+            stage_timings["job_cache_lookup"] = time.perf_counter() - lookup_started
+            return found
+        
+        # A revalidation request need not wait for the PDF read and hash
+        (cv_pdf_path, cv_id, cv_initial), (cached_job, job_cache_status) = await asyncio.gather(
+            lookup_cv(), lookup_job()
+        )
+        initial.update(cv_initial)
+        cv_reused = set(initial)
+        if cached_job is not None:
+            initial["job_posting_text"] = json.dumps(cached_job.job_data, indent=2)
+            initial["job_keywords"] = cached_job.job_keywords
+        
+        graph = StageGraph()
+        self._add_cv_stages(graph, cv_pdf_path, additional_info)
+        if cached_job is None:
+            # On a cache hit job_posting_text and job_keywords arrive as initial results
+            self._add_job_stages(graph, job_posting_url, job_posting_text)
+        self._add_enhancement_stages(graph, on_event)
+        # Stage tasks copy the current context, so the bypass reaches every LLM call
+        with LLMResponseCache.bypassed() if bypass_cache else nullcontext():
+            results = await graph.run(initial, on_event)
+        stage_timings.update(graph.timings)
+        await self._store_cv(cv_id, additional_info, cv_reused, results)
+        
+        enhanced_cv, final_similarity, retry_report = results["enhancement"]
+        baseline_similarity = results["baseline_similarity"]
+        improvement = final_similarity - baseline_similarity
+        
+        return {
+            "enhanced_cv": enhanced_cv,
+            "baseline_similarity": baseline_similarity,
+            "final_similarity": final_similarity,
+            "improvement": improvement,
+            "cv_keywords": results["cv_keywords"],
+            "job_keywords": results["job_keywords"],
+            "job_cache": job_cache_status,
+            "cv_id": cv_id,
+            "prompt_tokens": results["prompt_budget"][1],
+            "retry": retry_report,
+            "stage_timings": {name: round(seconds, 4) for name, seconds in stage_timings.items()},
+        }
+    
+    async def _lookup_cv(
+        self,
+        cv_pdf_path: Optional[PdfSource],
+        cv_id: Optional[str],
+        additional_info: Optional[str],
+        bypass_cache: bool
+    ) -> Tuple[Optional[bytes], str, Dict[str, Any]]:
+        """Read and hash the PDF; return (PDF bytes, cv_id, stored CV stage results)."""
+        cv_pdf = None
+        if cv_pdf_path is not None:
+            cv_pdf = await asyncio.to_thread(read_pdf_bytes, cv_pdf_path)
+            cv_id = make_cv_id(cv_pdf)
+        if self.cv_store is None:
+            if cv_pdf is None:
+                raise ValueError("cv_id requires the CV store (CV_STORE_ENABLED)")
+            return cv_pdf, cv_id, {}
+        
+        stored = await asyncio.to_thread(
+            self.cv_store.lookup, cv_id, additional_info, self.settings.embedding_model,
+            self._cv_keywords_version()
+        )
+        if cv_pdf is None and "cv_raw_text" not in stored:
+            raise ValueError(f"Unknown cv_id: {cv_id}")
+        if bypass_cache:
+            # Without the PDF the stored text is all there is; everything else is recomputed
+            stored = {"cv_raw_text": stored["cv_raw_text"]} if cv_pdf is None else {}
+        logger.info(f"CV store: reusing {sorted(stored) or 'nothing'} for {cv_id[:12]}")
+        return cv_pdf, cv_id, stored
+    
+    def _cv_keywords_version(self) -> str:
+        """Identify what produces CV keywords: the backend and its prompt or dictionary."""
+        backend = self.settings.cv_keywords_backend.lower()
+        if backend == "local":
+            source = f"{self.settings.keywords_local_max}\n{self.prompt_manager.skills_dictionary}"
+        else:
+            source = f"{self.settings.fast_llm_model_name}\n{self.prompt_manager.cv_keywords_prompt}"
+        return f"{backend}:{hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]}"
+    
+    async def _store_cv(
+        self,
+        cv_id: Optional[str],
+        additional_info: Optional[str],
+        reused: Set[str],
+        results: Dict[str, Any]
+    ) -> None:
+        """Save the CV stage results of a run unless all of them came from the store."""
+        if self.cv_store is not None and cv_id and (CV_STAGES & set(results)) - reused:
+            await asyncio.to_thread(
+                self.cv_store.put, cv_id, additional_info, self.settings.embedding_model, results,
+                self._cv_keywords_version()
             )
-            
-            # Step 4: Enhance CV
-            logger.info("Step 4: Enhancing CV...")
-            enhanced_cv, final_similarity = self.enhancer.enhance_with_retry(
-                cv_template=self.prompt_manager.cv_template,
-                cv_text=cv_text,
-                job_posting_text=job_posting_text,
-                cv_keywords=cv_keywords,
+    
+    def _add_cv_stages(
+        self,
+        graph: StageGraph,
+        cv_pdf_path: Optional[PdfSource],
+        additional_info: Optional[str],
+        embed: bool = True
+    ) -> None:
+        """
+        Add the CV branch: PDF extraction, keywords and (optionally) embedding.
+        
+        The CV branch and the job branch share no data and run concurrently;
+        they join at the baseline similarity and the enhancement stage.
+        """
+        async def extract_cv_text():
+            logger.info("Processing CV...")
+            return await self.cv_processor.aextract_text_from_pdf(cv_pdf_path)
+        
+        async def combine_cv(cv_raw_text):
+            return self.cv_processor.combine_cv_content(cv_raw_text, additional_info)
+        
+        async def extract_cv_keywords(cv_text):
+            return await self.cv_processor.aextract_keywords(cv_text)
+        
+        async def embed_cv(cv_raw_text):
+            return await self.similarity_calculator.aembed_text(cv_raw_text)
+        
+        graph.add("cv_raw_text", extract_cv_text)
+        graph.add("cv_text", combine_cv, ("cv_raw_text",))
+        graph.add("cv_keywords", extract_cv_keywords, ("cv_text",))
+        if embed:
+            graph.add("cv_embedding", embed_cv, ("cv_raw_text",))
+    
+    def _add_job_stages(
+        self,
+        graph: StageGraph,
+        job_posting_url: Optional[str],
+        job_posting_text: Optional[str]
+    ) -> None:
+        """Add the job branch: scraping and RAG (for URLs) and keywords."""
+        async def load_job_posting():
+            logger.info("Processing job posting...")
+            return job_posting_text
+        
+        async def fetch_job_page():
+            logger.info("Processing job posting...")
+            return await self.job_processor.afetch_job_page(job_posting_url)
+        
+        async def extract_job_data(job_fetch):
+            return await self.job_processor.aextract_job_with_rag(job_fetch.text)
+        
+        async def format_job_posting(job_data):
+            # Convert to string if it's a dict
+            if isinstance(job_data, dict):
+                return json.dumps(job_data, indent=2)
+            return str(job_data)
+        
+        async def store_job_posting(job_fetch, job_data, job_keywords):
+            if "error" in job_data:
+                return
+            await asyncio.to_thread(self.job_cache.put, CachedJobPosting(
+                url=job_posting_url,
+                job_text=job_fetch.text,
+                job_data=job_data,
                 job_keywords=job_keywords,
-                current_similarity=baseline_similarity,
-                job_keywords_text=job_keywords,
-                max_retries=self.settings.max_retries
-            )
-            
-            improvement = final_similarity - baseline_similarity
-            
-            result = {
-                "enhanced_cv": enhanced_cv,
-                "baseline_similarity": baseline_similarity,
-                "final_similarity": final_similarity,
-                "improvement": improvement,
+                etag=job_fetch.etag,
+                last_modified=job_fetch.last_modified,
+                keywords_backend=self.settings.job_keywords_backend,
+            ))
+        
+        async def extract_job_keywords(job_posting_text):
+            return await self.job_processor.aextract_keywords(job_posting_text)
+        
+        if job_posting_url:
+            graph.add("job_fetch", fetch_job_page)
+            graph.add("job_data", extract_job_data, ("job_fetch",))
+            graph.add("job_posting_text", format_job_posting, ("job_data",))
+            graph.add("job_keywords", extract_job_keywords, ("job_posting_text",))
+            if self.job_cache is not None:
+                graph.add(
+                    "job_cache_store", store_job_posting,
+                    ("job_fetch", "job_data", "job_keywords")
+                )
+        else:
+            graph.add("job_posting_text", load_job_posting)
+            graph.add("job_keywords", extract_job_keywords, ("job_posting_text",))
+    
+    def _add_enhancement_stages(
+        self,
+        graph: StageGraph,
+        on_event: Optional[EventCallback] = None
+    ) -> None:
+        """Add the job embedding, baseline similarity, prompt budget and enhancement stages."""
+        async def embed_job_keywords(job_keywords):
+            return await self.similarity_calculator.aembed_text(job_keywords)
+        
+        async def baseline(cv_embedding, job_embedding):
+            logger.info("Calculating baseline similarity...")
+            return self.similarity_calculator.cosine_similarity(cv_embedding, job_embedding)
+        
+        async def budget_prompt(cv_text, cv_keywords, job_posting_text, job_keywords):
+            sections = {
+                "cv_template": self.prompt_manager.cv_template,
+                "cv_text": cv_text,
+                "job_posting_text": job_posting_text,
                 "cv_keywords": cv_keywords,
                 "job_keywords": job_keywords,
             }
-            
-            logger.info("Pipeline completed successfully")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Pipeline error: {e}", exc_info=True)
-            raise
-
+            instructions = self.prompt_manager.format_cv_enhance_prompt("", "", "", "", "", 0.0)
+            return await asyncio.to_thread(self.prompt_budget.fit, sections, instructions)
+        
+        async def enhance(prompt_budget, job_keywords, baseline_similarity):
+            logger.info("Enhancing CV...")
+            sections, _ = prompt_budget
+            retry_report: Dict[str, Any] = {}
+            if self.settings.enhancement_candidates > 1:
+                enhanced_cv, similarity = await self.enhancer.aenhance_best_of_n(
+                    **sections,
+                    current_similarity=baseline_similarity,
+                    job_keywords_text=job_keywords,
+                    candidates=self.settings.enhancement_candidates,
+                    target_similarity=self.settings.enhancement_target_similarity,
+                    on_event=on_event
+                )
+            else:
+                enhanced_cv, similarity = await self.enhancer.aenhance_with_retry(
+                    **sections,
+                    current_similarity=baseline_similarity,
+                    job_keywords_text=job_keywords,
+                    max_retries=self.settings.max_retries,
+                    on_event=on_event,
+                    retry_report=retry_report
+                )
+            return enhanced_cv, similarity, retry_report
+        
+        graph.add("job_embedding", embed_job_keywords, ("job_keywords",))
+        graph.add("baseline_similarity", baseline, ("cv_embedding", "job_embedding"))
+        graph.add(
+            "prompt_budget", budget_prompt,
+            ("cv_text", "cv_keywords", "job_posting_text", "job_keywords")
+        )
+        # Scoring keeps the full job keywords; only the prompt sees compacted sections
+        graph.add(
+            "enhancement", enhance, ("prompt_budget", "job_keywords", "baseline_similarity")
+        )
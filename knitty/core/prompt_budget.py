@@ -0,0 +1,287 @@
+"""Token budgeting and deterministic compaction of prompt sections.
+
+Every section is first compacted losslessly (whitespace, JSON
+minification, duplicate keywords). If the prompt is still over budget,
+the variable sections share what is left after the fixed parts (the
+instructions and the CV template): sections smaller than their fair share
+keep everything, larger ones drop duplicate lines and are then truncated.
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated
+at four characters per token.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..config.settings import Settings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = "\n[... truncated]"
+EMPTY = (None, "", [], {})
+
+# Sections that are never compacted or truncated
+FIXED_SECTIONS = frozenset({"cv_template"})
+
+
+class TokenCounter:
+    """Counts and truncates text in tokens of the target model."""
+    
+    def __init__(self, model: str):
+        """Initialize counter for model (exact with tiktoken, estimated otherwise)."""
+        self._encoding = None
+        if tiktoken is None:
+            return
+        try:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                # Non-OpenAI models: a close enough BPE for budgeting
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # Encodings are downloaded on first use; fall back when offline
+            logger.warning(f"tiktoken unavailable ({e}), estimating token counts")
+    
+    @property
+    def name(self) -> str:
+        """Name of the encoding in use."""
+        return self._encoding.name if self._encoding is not None else "estimate"
+    
+    def count(self, text: str) -> int:
+        """Number of tokens in text."""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+    
+    def truncate(self, text: str, tokens: int) -> str:
+        """Keep at most tokens tokens from the start of text."""
+        if self._encoding is not None:
+            encoded = self._encoding.encode(text, disallowed_special=())
+            return self._encoding.decode(encoded[:tokens])
+        return text[:tokens * 4]
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of spaces, trailing spaces and more than one blank line."""
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _drop_empty(value: Any) -> Any:
+    """Remove null and empty values from parsed JSON."""
+    if isinstance(value, dict):
+        cleaned = {key: _drop_empty(item) for key, item in value.items()}
+        return {key: item for key, item in cleaned.items() if item not in EMPTY}
+    if isinstance(value, list):
+        return [item for item in map(_drop_empty, value) if item not in EMPTY]
+    return value
+
+
+def minify_json(text: str) -> str:
+    """Re-serialize JSON compactly without empty fields; other text is unchanged."""
+    stripped = text.strip()
+    if not stripped or stripped[0] not in "[{":
+        return text
+    try:
+        data = json.loads(stripped)
+    except ValueError:
+        return text
+    return json.dumps(_drop_empty(data), ensure_ascii=False, separators=(",", ":"))
+
+
+def dedupe_items(text: str) -> str:
+    """Remove case-insensitive duplicates from a JSON array or comma-separated list."""
+    stripped = text.strip()
+    try:
+        items = json.loads(stripped) if stripped.startswith("[") else None
+    except ValueError:
+        items = None
+    as_json = isinstance(items, list)
+    if not as_json:
+        items = [item.strip() for item in stripped.split(",")]
+    
+    seen = set()
+    unique = []
+    for item in items:
+        key = item.strip().lower() if isinstance(item, str) else json.dumps(item, sort_keys=True)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(item)
+    if as_json:
+        return json.dumps(unique, ensure_ascii=False, separators=(",", ":"))
+    return ", ".join(unique)
+
+
+def dedupe_lines(text: str) -> str:
+    """Drop repeated non-blank lines (e.g. page headers and footers), keeping the first."""
+    seen = set()
+    lines = []
+    for line in text.split("\n"):
+        key = " ".join(line.split()).lower()
+        if key and key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+Strategy = Tuple[str, Callable[[str], str]]
+
+# Lossless compaction, always applied
+LOSSLESS: Dict[str, List[Strategy]] = {
+    "cv_text": [("whitespace", collapse_whitespace)],
+    "job_posting_text": [("json", minify_json), ("whitespace", collapse_whitespace)],
+    "cv_keywords": [("json", minify_json), ("dedupe", dedupe_items)],
+    "job_keywords": [("json", minify_json), ("dedupe", dedupe_items)],
+}
+# Lossy compaction, applied before truncation when a section is over its share
+LOSSY: Dict[str, List[Strategy]] = {
+    "cv_text": [("dedupe_lines", dedupe_lines)],
+    "job_posting_text": [("dedupe_lines", dedupe_lines)],
+}
+
+
+def allocate(sizes: Dict[str, int], available: int) -> Dict[str, int]:
+    """Split available tokens; sections below the fair share keep their size."""
+    allocation = {}
+    remaining = dict(sizes)
+    available = max(0, available)
+    while remaining:
+        share = available // len(remaining)
+        small = {name: size for name, size in remaining.items() if size <= share}
+        if not small:
+            allocation.update({name: share for name in remaining})
+            break
+        for name, size in small.items():
+            allocation[name] = size
+            available -= size
+            del remaining[name]
+    return allocation
+
+
+class PromptBudget:
+    """Fits the sections of a prompt into a token budget."""
+    
+    def __init__(self, settings: Settings):
+        """Initialize budget from settings."""
+        self.enabled = settings.prompt_budget_enabled
+        self.max_tokens = settings.prompt_max_tokens
+        self.section_max_tokens = settings.prompt_section_max_tokens
+        self.model = settings.smart_llm_model_name
+        self._counter: Optional[TokenCounter] = None
+    
+    @property
+    def counter(self) -> TokenCounter:
+        """Token counter for the Smart LLM (created, and its encoding loaded, on first use)."""
+        if self._counter is None:
+            self._counter = TokenCounter(self.model)
+        return self._counter
+    
+    def _truncate(self, text: str, tokens: int) -> str:
+        """Truncate to tokens (marker included), preferring a line boundary."""
+        if tokens <= 0:
+            return ""
+        keep = self.counter.truncate(text, max(0, tokens - self.counter.count(TRUNCATION_MARKER)))
+        cut = keep.rfind("\n")
+        if cut > len(keep) * 0.8:
+            keep = keep[:cut]
+        return keep.rstrip() + TRUNCATION_MARKER
+    
+    def _shrink(self, name: str, text: str, limit: int, applied: List[str]) -> str:
+        """Apply lossy strategies, then truncation, until text fits limit tokens."""
+        for strategy, func in LOSSY.get(name, []):
+            if self.counter.count(text) <= limit:
+                return text
+            compacted = func(text)
+            if compacted != text:
+                applied.append(strategy)
+                text = compacted
+        if self.counter.count(text) > limit:
+            applied.append("truncate")
+            text = self._truncate(text, limit)
+        return text
+    
+    def fit(
+        self,
+        sections: Dict[str, str],
+        instructions: str = ""
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Compact sections so that instructions plus sections fit the budget.
+        
+        Args:
+            sections: Prompt inputs by name (cv_template, cv_text, ...)
+            instructions: The prompt with every section left empty
+        
+        Returns:
+            (compacted sections, report with tokens per section before and
+            after and the strategies applied)
+        """
+        original = {name: self.counter.count(text) for name, text in sections.items()}
+        applied: Dict[str, List[str]] = {name: [] for name in sections}
+        result = dict(sections)
+        
+        if self.enabled:
+            for name, text in sections.items():
+                for strategy, func in LOSSLESS.get(name, []):
+                    compacted = func(text)
+                    if compacted != text:
+                        applied[name].append(strategy)
+                        text = compacted
+                result[name] = text
+            
+            sizes = {
+                name: self.counter.count(text)
+                for name, text in result.items() if name not in FIXED_SECTIONS
+            }
+            limits = {
+                name: min(size, self.section_max_tokens.get(name, size))
+                for name, size in sizes.items()
+            }
+            if self.max_tokens:
+                fixed = self.counter.count(instructions) + sum(
+                    self.counter.count(result[name]) for name in result if name in FIXED_SECTIONS
+                )
+                if fixed + sum(limits.values()) > self.max_tokens:
+                    limits = allocate(limits, self.max_tokens - fixed)
+            for name, limit in limits.items():
+                if sizes[name] > limit:
+                    result[name] = self._shrink(name, result[name], limit, applied[name])
+        
+        final = {name: self.counter.count(text) for name, text in result.items()}
+        instruction_tokens = self.counter.count(instructions)
+        report = {
+            "tokenizer": self.counter.name,
+            "max_tokens": self.max_tokens if self.enabled else None,
+            "original_tokens": instruction_tokens + sum(original.values()),
+            "total_tokens": instruction_tokens + sum(final.values()),
+            "sections": {
+                "instructions": {"original": instruction_tokens, "final": instruction_tokens},
+                **{
+                    name: {
+                        "original": original[name],
+                        "final": final[name],
+                        **({"strategies": applied[name]} if applied[name] else {}),
+                    }
+                    for name in sections
+                },
+            },
+        }
+        if report["total_tokens"] < report["original_tokens"]:
+            logger.info(
+                f"Prompt compacted from {report['original_tokens']} "
+                f"to {report['total_tokens']} tokens"
+            )
+        if self.enabled and self.max_tokens and report["total_tokens"] > self.max_tokens:
+            logger.warning(
+                f"Prompt still uses {report['total_tokens']} tokens "
+                f"(budget {self.max_tokens}); fixed sections exceed the budget"
+            )
+        return result, report
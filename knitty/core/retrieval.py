@@ -0,0 +1,98 @@
+"""Chunk retrieval over a NumPy matrix of chunk embeddings."""
+
+import logging
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkRetriever:
+    """Retrieves the chunks of a document most similar to a query.
+    
+    Chunks are embedded in a single batched call and scored with one
+    matrix-vector product. Query vectors are computed once per (model, query)
+    and shared across instances, and no embedding is done at all when the
+    document yields no more than k chunks.
+    """
+    
+    _query_vectors: Dict[Tuple[str, str], np.ndarray] = {}
+    _query_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        chunk_size: int = 2000,
+        chunk_overlap: int = 200
+    ):
+        """Initialize chunk retriever."""
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+    
+    def split(self, text: str) -> List[str]:
+        """Split text into chunks."""
+        chunks = self.text_splitter.split_text(text)
+        logger.info(f"Created {len(chunks)} chunks for RAG")
+        return chunks
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize vectors along the last axis."""
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    def _top_k(self, chunks: List[str], chunk_vectors, query_vector: np.ndarray, k: int) -> List[str]:
+        """Rank chunks by cosine similarity to the query."""
+        matrix = self._normalize(np.asarray(chunk_vectors, dtype=np.float32))
+        scores = matrix @ query_vector
+        order = np.argsort(-scores)[:k]
+        return [chunks[i] for i in order]
+    
+    def _cached_query_vector(self, query: str):
+        """Return the cached normalized query vector, if any."""
+        with self._query_lock:
+            return self._query_vectors.get((self.model_name, query))
+    
+    def _store_query_vector(self, query: str, vector) -> np.ndarray:
+        """Normalize and cache a query vector."""
+        vector = self._normalize(np.asarray(vector, dtype=np.float32))
+        with self._query_lock:
+            self._query_vectors[(self.model_name, query)] = vector
+        return vector
+    
+    def retrieve(self, text: str, query: str, k: int = 3) -> List[str]:
+        """Return the k chunks of text most relevant to query."""
+        chunks = self.split(text)
+        if len(chunks) <= k:
+            return chunks
+        
+        query_vector = self._cached_query_vector(query)
+        if query_vector is None:
+            query_vector = self._store_query_vector(query, self.embeddings.embed_query(query))
+        
+        chunk_vectors = self.embeddings.embed_documents(chunks)
+        return self._top_k(chunks, chunk_vectors, query_vector, k)
+    
+    async def aretrieve(self, text: str, query: str, k: int = 3) -> List[str]:
+        """Return the k chunks of text most relevant to query (async)."""
+        chunks = self.split(text)
+        if len(chunks) <= k:
+            return chunks
+        
+        query_vector = self._cached_query_vector(query)
+        if query_vector is None:
+            query_vector = self._store_query_vector(
+                query, await self.embeddings.aembed_query(query)
+            )
+        
+        chunk_vectors = await self.embeddings.aembed_documents(chunks)
+        return self._top_k(chunks, chunk_vectors, query_vector, k)
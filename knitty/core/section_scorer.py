@@ -0,0 +1,130 @@
+"""Section-level scoring of markdown CVs for cheap edit/re-score loops.
+
+The CV is split into its headed sections (the layout of cvTemplate.txt: a
+YAML front matter header, then "## Profile", "## Projects", ...). Each
+section is embedded on its own and cached by content hash in the embedding
+cache, so after an edit only the changed sections are sent to the embedding
+model. The document vector is the length-weighted mean of the normalized
+section vectors; the result also reports every section's own similarity.
+
+The document score approximates, but is not identical to, the similarity of
+a single whole-document embedding, so compare scores from the same scorer.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from .similarity import SimilarityCalculator
+
+logger = logging.getLogger(__name__)
+
+FRONT_MATTER = re.compile(r"\A\s*---\n(.*?)\n---[ \t]*(?:\n|\Z)", re.DOTALL)
+HEADING = re.compile(r"^#{1,2}[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+
+
+@dataclass
+class CVSection:
+    """One headed section of a markdown CV."""
+    title: str
+    text: str
+
+
+def split_sections(markdown: str) -> List[CVSection]:
+    """Split a markdown CV into header and "#"/"##" headed sections.
+    
+    Sections keep their heading line, so two sections with the same body
+    under different headings embed differently. Blank sections are dropped.
+    """
+    sections = []
+    text = markdown.replace("\r\n", "\n")
+    front_matter = FRONT_MATTER.match(text)
+    if front_matter:
+        sections.append(CVSection("Header", front_matter.group(1).strip()))
+        text = text[front_matter.end():]
+    
+    headings = list(HEADING.finditer(text))
+    preamble = text[:headings[0].start() if headings else len(text)].strip()
+    if preamble:
+        sections.append(CVSection("Header" if not sections else "Preamble", preamble))
+    for index, heading in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+        body = text[heading.start():end].strip()
+        if body:
+            sections.append(CVSection(heading.group(1).strip(), body))
+    return [section for section in sections if section.text]
+
+
+class SectionScorer:
+    """Scores a markdown CV against a job text from cached section embeddings."""
+    
+    def __init__(self, similarity_calculator: SimilarityCalculator):
+        """Initialize scorer."""
+        self.similarity_calculator = similarity_calculator
+    
+    def _combine(
+        self,
+        sections: List[CVSection],
+        vectors: List[np.ndarray],
+        job_vector: np.ndarray,
+        embedded: List[str]
+    ) -> Dict[str, Any]:
+        """Document score and per-section breakdown from section vectors."""
+        matrix = np.vstack(vectors).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+        lengths = np.array([len(section.text) for section in sections], dtype=np.float32)
+        weights = lengths / lengths.sum()
+        
+        calculator = self.similarity_calculator
+        document_vector = weights @ matrix
+        similarity = calculator.cosine_similarity(document_vector, job_vector)
+        section_similarities = calculator.cosine_similarity_many(job_vector, list(matrix))
+        embedded_set = set(embedded)
+        result = {
+            "similarity": similarity,
+            "sections": [
+                {
+                    "title": section.title,
+                    "similarity": round(float(section_similarity), 6),
+                    "weight": round(float(weight), 4),
+                    "embedded": section.text in embedded_set,
+                }
+                for section, section_similarity, weight
+                in zip(sections, section_similarities, weights)
+            ],
+            "sections_embedded": sum(section.text in embedded_set for section in sections),
+            "sections_total": len(sections),
+        }
+        logger.info(
+            f"Section score {similarity:.4f}, embedded "
+            f"{result['sections_embedded']} of {len(sections)} sections"
+        )
+        return result
+    
+    def _texts(self, cv_markdown: str, job_text: str) -> Tuple[List[CVSection], List[str]]:
+        """Split the CV into sections; return them and the texts to embed, job text first."""
+        sections = split_sections(cv_markdown)
+        if not sections:
+            raise ValueError("The CV has no content to score")
+        return sections, [job_text] + [section.text for section in sections]
+    
+    def score(self, cv_markdown: str, job_text: str) -> Dict[str, Any]:
+        """
+        Score a markdown CV against a job text section by section.
+        
+        Returns:
+            Dictionary with the document similarity, a per-section breakdown
+            (title, similarity, weight, whether it had to be embedded) and
+            how many sections were embedded for this call
+        """
+        sections, texts = self._texts(cv_markdown, job_text)
+        vectors, embedded = self.similarity_calculator.embed_many_reporting(texts)
+        return self._combine(sections, vectors[1:], vectors[0], embedded)
+    
+    async def ascore(self, cv_markdown: str, job_text: str) -> Dict[str, Any]:
+        """Score a markdown CV against a job text section by section (async)."""
+        sections, texts = self._texts(cv_markdown, job_text)
+        vectors, embedded = await self.similarity_calculator.aembed_many_reporting(texts)
+        return self._combine(sections, vectors[1:], vectors[0], embedded)
@@ -1,8 +1,11 @@
 """Similarity calculation using cosine similarity."""
 
+import asyncio
 import logging
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from .llm_clients import LLMClients
+from .embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
@@ -10,19 +13,162 @@ logger = logging.getLogger(__name__)
 class SimilarityCalculator:
     """Calculates cosine similarity between CV and job posting."""
     
-    def __init__(self, llm_clients: LLMClients):
+    def __init__(self, llm_clients: LLMClients, embedding_cache: Optional[EmbeddingCache] = None):
         """Initialize similarity calculator."""
         self.llm_clients = llm_clients
+        self.embedding_cache = embedding_cache
+    
+    @property
+    def model_name(self) -> str:
+        """Get the embedding model name used for cache keys."""
+        return self.llm_clients.settings.embedding_model
     
     def embed_text(self, text: str) -> np.ndarray:
-        """Generate embedding for text."""
+        """Generate embedding for text, consulting the cache first."""
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get(self.model_name, text)
+            if cached is not None:
+                return cached
+        
         try:
             embedding_vector = self.llm_clients.embed_llm.embed_query(text)
+            if self.embedding_cache is not None:
+                return self.embedding_cache.put(self.model_name, text, embedding_vector)
+            return np.array(embedding_vector)
+        except Exception as e:
+            logger.error(f"Error generating embedding: {e}")
+            raise ValueError(f"Failed to generate embedding: {e}")
+    
+    async def aembed_text(self, text: str) -> np.ndarray:
+        """Generate embedding for text without blocking the event loop."""
+        if self.embedding_cache is not None:
+            cached = (await self.embedding_cache.aget_many(self.model_name, [text])).get(text)
+            if cached is not None:
+                return cached
+        
+        try:
+            embedding_vector = await self.llm_clients.embed_llm.aembed_query(text)
+            if self.embedding_cache is not None:
+                stored = await self.embedding_cache.aput_many(
+                    self.model_name, [(text, embedding_vector)]
+                )
+                return stored[0]
             return np.array(embedding_vector)
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise ValueError(f"Failed to generate embedding: {e}")
     
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """Pack texts into embedding requests under the provider's limits.
+        
+        Tokens are estimated at four characters each; a single text larger
+        than the token budget still gets a batch of its own.
+        """
+        settings = self.llm_clients.settings
+        max_tokens = settings.embed_batch_max_tokens
+        max_items = max(1, settings.embed_batch_max_items)
+        
+        batches, current, current_tokens = [], [], 0
+        for text in texts:
+            tokens = len(text) // 4 + 1
+            if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _split_cached(
+        self, texts: List[str], cached: Dict[str, np.ndarray]
+    ) -> tuple[Dict[str, np.ndarray], List[str]]:
+        """Unique texts not found in the cache, in order."""
+        return dict(cached), [text for text in dict.fromkeys(texts) if text not in cached]
+    
+    def _lookup_many(self, texts: List[str]) -> tuple[Dict[str, np.ndarray], List[str]]:
+        """Split unique texts into cached embeddings and texts still to embed."""
+        cached = {}
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get_many(self.model_name, texts)
+        return self._split_cached(texts, cached)
+    
+    async def _alookup_many(self, texts: List[str]) -> tuple[Dict[str, np.ndarray], List[str]]:
+        """_lookup_many with the disk tier read off the event loop."""
+        cached = {}
+        if self.embedding_cache is not None:
+            cached = await self.embedding_cache.aget_many(self.model_name, texts)
+        return self._split_cached(texts, cached)
+    
+    def _store_many(self, found: Dict[str, np.ndarray], texts: List[str], vectors) -> None:
+        """Record freshly computed embeddings in found and the cache (one transaction)."""
+        if self.embedding_cache is not None:
+            vectors = self.embedding_cache.put_many(self.model_name, list(zip(texts, vectors)))
+        for text, vector in zip(texts, vectors):
+            found[text] = np.asarray(vector)
+    
+    async def _astore_many(self, found: Dict[str, np.ndarray], texts: List[str], vectors) -> None:
+        """_store_many with the disk tier written off the event loop."""
+        if self.embedding_cache is not None:
+            vectors = await self.embedding_cache.aput_many(
+                self.model_name, list(zip(texts, vectors))
+            )
+        for text, vector in zip(texts, vectors):
+            found[text] = np.asarray(vector)
+    
+    def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embed several texts with as few requests as possible.
+        
+        Identical texts are embedded once, cached texts are not sent, and the
+        rest are packed into embed_documents batches.
+        """
+        return self.embed_many_reporting(texts)[0]
+    
+    def embed_many_reporting(self, texts: List[str]) -> Tuple[List[np.ndarray], List[str]]:
+        """embed_many that also returns the texts that were not cached."""
+        found, missing = self._lookup_many(texts)
+        vectors = []
+        try:
+            for batch in self._batches(missing):
+                vectors.extend(self.llm_clients.embed_llm.embed_documents(batch))
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise ValueError(f"Failed to generate embeddings: {e}")
+        
+        self._store_many(found, missing, vectors)
+        if missing:
+            logger.info(f"Embedded {len(missing)} of {len(texts)} texts")
+        return [found[text] for text in texts], missing
+    
+    async def aembed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed several texts with as few requests as possible (async).
+        
+        Batches are sent concurrently.
+        """
+        return (await self.aembed_many_reporting(texts))[0]
+    
+    async def aembed_many_reporting(
+        self, texts: List[str]
+    ) -> Tuple[List[np.ndarray], List[str]]:
+        """aembed_many that also returns the texts that were not cached."""
+        found, missing = await self._alookup_many(texts)
+        batches = self._batches(missing)
+        try:
+            results = await asyncio.gather(*(
+                self.llm_clients.embed_llm.aembed_documents(batch) for batch in batches
+            ))
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise ValueError(f"Failed to generate embeddings: {e}")
+        
+        await self._astore_many(
+            found, missing, [vector for vectors in results for vector in vectors]
+        )
+        if missing:
+            logger.info(f"Embedded {len(missing)} of {len(texts)} texts in {len(batches)} batches")
+        return [found[text] for text in texts], missing
+    
     def cosine_similarity(self, vector_a: np.ndarray, vector_b: np.ndarray) -> float:
         """Calculate cosine similarity between two vectors."""
         try:
@@ -41,9 +187,34 @@ class SimilarityCalculator:
             logger.error(f"Error calculating similarity: {e}")
             raise ValueError(f"Failed to calculate similarity: {e}")
     
+    def cosine_similarity_many(self, query_vector: np.ndarray, vectors: List[np.ndarray]) -> np.ndarray:
+        """Calculate cosine similarity of one vector against many at once."""
+        if not vectors:
+            return np.zeros(0, dtype=np.float32)
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+        norms[norms == 0] = 1.0
+        return (matrix @ query_vector) / norms
+    
     def calculate_similarity(self, text_a: str, text_b: str) -> float:
         """Calculate similarity between two texts."""
         embedding_a = self.embed_text(text_a)
         embedding_b = self.embed_text(text_b)
         return self.cosine_similarity(embedding_a, embedding_b)
-
+    
+    async def acalculate_similarity(self, text_a: str, text_b: str) -> float:
+        """Calculate similarity between two texts (async)."""
+        embedding_a, embedding_b = await asyncio.gather(
+            self.aembed_text(text_a), self.aembed_text(text_b)
+        )
+        return self.cosine_similarity(embedding_a, embedding_b)
+    
+    def calculate_similarity_many(self, query: str, candidates: List[str]) -> List[float]:
+        """Calculate similarity between one text and many candidates."""
+        vectors = self.embed_many([query] + candidates)
+        return self.cosine_similarity_many(vectors[0], vectors[1:]).tolist()
+    
+    async def acalculate_similarity_many(self, query: str, candidates: List[str]) -> List[float]:
+        """Calculate similarity between one text and many candidates (async)."""
+        vectors = await self.aembed_many([query] + candidates)
+        return self.cosine_similarity_many(vectors[0], vectors[1:]).tolist()
@@ -0,0 +1,135 @@
+"""Dependency-graph scheduling of asynchronous pipeline stages."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from ..utils.telemetry import STAGE_DURATION, span
+
+logger = logging.getLogger(__name__)
+
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+@dataclass
+class Stage:
+    """A single unit of pipeline work and the stages it depends on."""
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    depends_on: Tuple[str, ...] = field(default_factory=tuple)
+
+
+class StageGraph:
+    """Runs stages concurrently as soon as their dependencies are ready.
+    
+    Each stage function is awaited with its dependencies' results passed as
+    keyword arguments, so independent branches overlap and end-to-end time
+    is bounded by the critical path. The wall time of every stage run is
+    kept in timings.
+    """
+    
+    def __init__(self):
+        """Initialize an empty stage graph."""
+        self._stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, float] = {}
+    
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        depends_on: Tuple[str, ...] = ()
+    ) -> "StageGraph":
+        """Register a stage."""
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self._stages[name] = Stage(name, func, tuple(depends_on))
+        return self
+    
+    def _validate(self, initial: Dict[str, Any]) -> None:
+        """Check that dependencies exist and the graph is acyclic."""
+        for stage in self._stages.values():
+            for dep in stage.depends_on:
+                if dep not in self._stages and dep not in initial:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        
+        visiting, done = set(), set()
+        
+        def visit(name: str) -> None:
+            if name in done or name not in self._stages:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self._stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+        
+        for name in self._stages:
+            visit(name)
+    
+    async def run(
+        self,
+        initial: Optional[Dict[str, Any]] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Run all stages and return their results.
+        
+        Args:
+            initial: Precomputed results; stages with these names are skipped
+            on_event: Optional callback receiving stage transition events
+        
+        Returns:
+            Dictionary mapping stage name to result (including initial values)
+        """
+        initial = dict(initial or {})
+        self._validate(initial)
+        self.timings = {}
+        
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        def emit(stage: str, status: str, **extra: Any) -> None:
+            if on_event is not None:
+                on_event({"event": "stage", "stage": stage, "status": status, **extra})
+        
+        def record(stage: str, status: str, started: float) -> float:
+            duration = time.perf_counter() - started
+            self.timings[stage] = duration
+            STAGE_DURATION.observe(duration, stage=stage, status=status)
+            return duration
+        
+        async def run_stage(stage: Stage) -> Any:
+            kwargs = {}
+            for dep in stage.depends_on:
+                kwargs[dep] = initial[dep] if dep in initial else await tasks[dep]
+            logger.debug(f"Stage '{stage.name}' started")
+            emit(stage.name, "started")
+            started = time.perf_counter()
+            try:
+                with span(f"stage.{stage.name}"):
+                    result = await stage.func(**kwargs)
+            except Exception:
+                record(stage.name, "failed", started)
+                emit(stage.name, "failed")
+                raise
+            duration = record(stage.name, "completed", started)
+            emit(stage.name, "completed", duration=duration)
+            return result
+        
+        for name, stage in self._stages.items():
+            if name not in initial:
+                tasks[name] = asyncio.create_task(run_stage(stage), name=name)
+        
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        
+        results = dict(initial)
+        results.update({name: task.result() for name, task in tasks.items()})
+        return results
@@ -0,0 +1,450 @@
+"""Background task queue and worker pool for long-running enhancements.
+
+The SQLite queue can be shared by several server worker processes. A claimed
+task carries its worker's owner id and a lease that the worker renews while
+it runs; only tasks whose lease has expired (their worker is gone) are
+requeued, so a starting worker never requeues tasks that live workers run.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Task fields in dataclass order (the table also holds owner and lease_until)
+TASK_COLUMNS = "id, payload, status, result, error, created_at, started_at, finished_at"
+
+
+@dataclass
+class Task:
+    """A queued unit of work and its outcome."""
+    id: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    
+    @property
+    def wait_time(self) -> Optional[float]:
+        """Seconds spent queued before a worker picked the task up."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.created_at
+    
+    def to_dict(self, include_payload: bool = False) -> Dict[str, Any]:
+        """Serialize task for API responses."""
+        data = asdict(self)
+        if not include_payload:
+            data.pop("payload")
+        return data
+
+
+class TaskQueue(ABC):
+    """Interface for task queue backends.
+    
+    Payloads must be JSON-serializable so that out-of-process backends
+    (SQLite, Redis) can store them.
+    """
+    
+    @abstractmethod
+    async def put(self, payload: Dict[str, Any]) -> str:
+        """Enqueue a payload and return its task id."""
+    
+    @abstractmethod
+    async def get(self) -> Task:
+        """Wait for the next queued task and mark it running."""
+    
+    @abstractmethod
+    async def complete(self, task_id: str, result: Dict[str, Any]) -> None:
+        """Store a task's result."""
+    
+    @abstractmethod
+    async def fail(self, task_id: str, error: str) -> None:
+        """Store a task's error."""
+    
+    @abstractmethod
+    async def status(self, task_id: str) -> Optional[Task]:
+        """Get a task by id."""
+    
+    @abstractmethod
+    async def depth(self) -> int:
+        """Number of tasks waiting to be picked up."""
+    
+    # Seconds between lease renewals; None for queues without leases
+    heartbeat_interval: Optional[float] = None
+    
+    async def recover(self) -> int:
+        """Requeue tasks whose worker process is gone."""
+        return 0
+    
+    async def renew(self) -> None:
+        """Extend the leases of tasks this process is running."""
+    
+    async def release(self, task_id: str) -> None:
+        """Give back a task interrupted by shutdown."""
+        await self.fail(task_id, "Worker shut down before the task finished")
+
+
+class InMemoryTaskQueue(TaskQueue):
+    """Process-local queue; tasks are lost on restart."""
+    
+    def __init__(self, result_ttl: float = 3600):
+        """Initialize in-memory task queue."""
+        self.result_ttl = result_ttl
+        self._tasks: Dict[str, Task] = {}
+        self._queue: Optional[asyncio.Queue] = None
+    
+    def _get_queue(self) -> asyncio.Queue:
+        """Create the asyncio queue on the running loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+    
+    def _prune(self) -> None:
+        """Drop finished tasks older than the result TTL."""
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            task_id for task_id, task in self._tasks.items()
+            if task.finished_at is not None and task.finished_at < cutoff
+        ]
+        for task_id in expired:
+            del self._tasks[task_id]
+    
+    async def put(self, payload: Dict[str, Any]) -> str:
+        self._prune()
+        task = Task(id=uuid.uuid4().hex, payload=payload)
+        self._tasks[task.id] = task
+        await self._get_queue().put(task.id)
+        return task.id
+    
+    async def get(self) -> Task:
+        task_id = await self._get_queue().get()
+        task = self._tasks[task_id]
+        task.status = RUNNING
+        task.started_at = time.time()
+        return task
+    
+    async def complete(self, task_id: str, result: Dict[str, Any]) -> None:
+        task = self._tasks[task_id]
+        task.status, task.result, task.finished_at = COMPLETED, result, time.time()
+        task.payload = {}
+    
+    async def fail(self, task_id: str, error: str) -> None:
+        task = self._tasks[task_id]
+        task.status, task.error, task.finished_at = FAILED, error, time.time()
+        task.payload = {}
+    
+    async def status(self, task_id: str) -> Optional[Task]:
+        return self._tasks.get(task_id)
+    
+    async def depth(self) -> int:
+        return self._get_queue().qsize()
+
+
+class SQLiteTaskQueue(TaskQueue):
+    """Durable queue backed by a SQLite table; survives restarts.
+    
+    Statements run in a thread so that writer contention between worker
+    processes sharing the file never stalls the event loop.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        result_ttl: float = 3600,
+        poll_interval: float = 0.5,
+        lease_seconds: float = 60,
+        busy_timeout: float = 5.0
+    ):
+        """Initialize SQLite task queue."""
+        self.db_path = Path(db_path)
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = lease_seconds / 3
+        # Unique per queue instance, so a reused pid never inherits old leases
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            str(self.db_path), timeout=busy_timeout, check_same_thread=False
+        )
+        # WAL lets readers (status polls) proceed while another process writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, owner TEXT, lease_until REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(tasks)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE tasks ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, created_at)")
+        self._db.commit()
+    
+    def _row_to_task(self, row) -> Task:
+        """Build a Task from a database row."""
+        return Task(
+            id=row[0],
+            payload=json.loads(row[1]),
+            status=row[2],
+            result=json.loads(row[3]) if row[3] else None,
+            error=row[4],
+            created_at=row[5],
+            started_at=row[6],
+            finished_at=row[7],
+        )
+    
+    def _write(self, sql: str, params: tuple) -> int:
+        """Run one write statement and commit; returns the affected row count."""
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            self._db.commit()
+        return cursor.rowcount
+    
+    def _read_one(self, sql: str, params: tuple):
+        """Run one query and return its first row."""
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()
+    
+    def _claim_next(self) -> Optional[Task]:
+        """Atomically move the oldest queued task to running."""
+        with self._lock:
+            while True:
+                row = self._db.execute(
+                    "SELECT id FROM tasks WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                # Guard on status so another process sharing the file cannot claim it twice
+                now = time.time()
+                cursor = self._db.execute(
+                    "UPDATE tasks SET status = ?, started_at = ?, owner = ?, lease_until = ? "
+                    "WHERE id = ? AND status = ?",
+                    (RUNNING, now, self.owner, now + self.lease_seconds, row[0], QUEUED)
+                )
+                self._db.commit()
+                if cursor.rowcount:
+                    return self._row_to_task(self._db.execute(
+                        f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (row[0],)
+                    ).fetchone())
+                # Another process claimed it first; the next queued task may be free
+    
+    def _finish(self, task_id: str, status: str, result: Optional[str], error: Optional[str]) -> None:
+        """Record a task outcome and prune old results."""
+        now = time.time()
+        with self._lock:
+            # Once the lease expired and another process requeued the task, it owns the result
+            cursor = self._db.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "payload = '{}', lease_until = NULL WHERE id = ? AND owner = ?",
+                (status, result, error, now, task_id, self.owner)
+            )
+            self._db.execute(
+                "DELETE FROM tasks WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (now - self.result_ttl,)
+            )
+            self._db.commit()
+        if cursor.rowcount == 0:
+            logger.warning(f"Dropped {status} outcome of task {task_id}: lease lost to another worker")
+    
+    async def put(self, payload: Dict[str, Any]) -> str:
+        task_id = uuid.uuid4().hex
+        await asyncio.to_thread(
+            self._write,
+            "INSERT INTO tasks (id, payload, status, created_at) VALUES (?, ?, ?, ?)",
+            (task_id, json.dumps(payload), QUEUED, time.time())
+        )
+        return task_id
+    
+    async def get(self) -> Task:
+        while True:
+            task = await asyncio.to_thread(self._claim_next)
+            if task is not None:
+                return task
+            await asyncio.sleep(self.poll_interval)
+    
+    async def complete(self, task_id: str, result: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._finish, task_id, COMPLETED, json.dumps(result), None)
+    
+    async def fail(self, task_id: str, error: str) -> None:
+        await asyncio.to_thread(self._finish, task_id, FAILED, None, error)
+    
+    async def status(self, task_id: str) -> Optional[Task]:
+        row = await asyncio.to_thread(
+            self._read_one, f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)
+        )
+        return self._row_to_task(row) if row else None
+    
+    async def depth(self) -> int:
+        row = await asyncio.to_thread(
+            self._read_one, "SELECT COUNT(*) FROM tasks WHERE status = ?", (QUEUED,)
+        )
+        return row[0]
+    
+    async def release(self, task_id: str) -> None:
+        await asyncio.to_thread(
+            self._write,
+            "UPDATE tasks SET status = ?, started_at = NULL, owner = NULL, "
+            "lease_until = NULL WHERE id = ? AND owner = ?",
+            (QUEUED, task_id, self.owner)
+        )
+    
+    async def renew(self) -> None:
+        await asyncio.to_thread(
+            self._write,
+            "UPDATE tasks SET lease_until = ? WHERE owner = ? AND status = ?",
+            (time.time() + self.lease_seconds, self.owner, RUNNING)
+        )
+    
+    async def recover(self) -> int:
+        # Tasks of live workers keep renewed leases; rows without one predate leases
+        requeued = await asyncio.to_thread(
+            self._write,
+            "UPDATE tasks SET status = ?, started_at = NULL, owner = NULL, "
+            "lease_until = NULL WHERE status = ? AND owner IS NOT ? "
+            "AND (lease_until IS NULL OR lease_until < ?)",
+            (QUEUED, RUNNING, self.owner, time.time())
+        )
+        if requeued:
+            logger.warning(f"Requeued {requeued} tasks of workers that are gone")
+        return requeued
+
+
+def create_task_queue(settings: Settings) -> TaskQueue:
+    """Create the task queue backend selected in settings."""
+    backend = settings.task_queue_backend.lower()
+    if backend == "memory":
+        return InMemoryTaskQueue(result_ttl=settings.task_result_ttl)
+    if backend == "sqlite":
+        return SQLiteTaskQueue(
+            settings.task_queue_path,
+            result_ttl=settings.task_result_ttl,
+            lease_seconds=settings.task_lease_seconds
+        )
+    raise ValueError(f"Unknown task queue backend: {settings.task_queue_backend}")
+
+
+def check_server_workers(settings: Settings, workers: int) -> None:
+    """Reject server worker counts the task queue backend cannot serve."""
+    if workers > 1 and settings.task_queue_backend.lower() == "memory":
+        raise ValueError(
+            f"TASK_QUEUE_BACKEND=memory keeps jobs inside one worker process, so with "
+            f"{workers} workers job status requests would miss them; set "
+            f"TASK_QUEUE_BACKEND=sqlite or SERVER_WORKERS=1"
+        )
+
+
+class WorkerPool:
+    """Runs queued tasks with a fixed number of concurrent workers."""
+    
+    def __init__(
+        self,
+        queue: TaskQueue,
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        concurrency: int = 2
+    ):
+        """Initialize worker pool."""
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._stats = {
+            "running": 0,
+            "completed": 0,
+            "failed": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+    
+    async def start(self) -> None:
+        """Start worker tasks on the running loop."""
+        if self._workers:
+            return
+        await self.queue.recover()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"knitty-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        if self.queue.heartbeat_interval is not None:
+            self._heartbeat = asyncio.create_task(
+                self._renew_leases(self.queue.heartbeat_interval), name="knitty-task-leases"
+            )
+        logger.info(f"Started {self.concurrency} task workers")
+    
+    async def stop(self) -> None:
+        """Cancel workers; running tasks are released back to the queue."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def _renew_leases(self, interval: float) -> None:
+        """Keep this process's leases alive and requeue tasks of dead workers."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.queue.renew()
+                await self.queue.recover()
+            except Exception as e:
+                logger.warning(f"Task lease renewal failed: {e}")
+    
+    async def _worker(self, worker_id: int) -> None:
+        """Take tasks from the queue until cancelled."""
+        while True:
+            task = await self.queue.get()
+            wait_time = task.wait_time or 0.0
+            self._stats["wait_time_total"] += wait_time
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+            self._stats["running"] += 1
+            logger.info(f"Worker {worker_id} started task {task.id} (waited {wait_time:.2f}s)")
+            
+            try:
+                result = await self.handler(task.payload)
+                await self.queue.complete(task.id, result)
+                self._stats["completed"] += 1
+            except asyncio.CancelledError:
+                await self.queue.release(task.id)
+                raise
+            except Exception as e:
+                logger.error(f"Task {task.id} failed: {e}", exc_info=True)
+                await self.queue.fail(task.id, str(e))
+                self._stats["failed"] += 1
+            finally:
+                self._stats["running"] -= 1
+    
+    async def stats(self) -> Dict[str, Any]:
+        """Get queue depth, worker utilization and wait-time metrics."""
+        stats = dict(self._stats)
+        finished = stats["completed"] + stats["failed"] + stats["running"]
+        stats["wait_time_avg"] = stats.pop("wait_time_total") / finished if finished else 0.0
+        stats["queue_depth"] = await self.queue.depth()
+        stats["workers"] = self.concurrency
+        return stats
@@ -0,0 +1,341 @@
+"""Metrics and tracing for pipeline stages and model calls.
+
+Metrics are kept in a small in-process registry rendered in the Prometheus
+text format (served at /metrics). Spans are sent to OpenTelemetry when the
+opentelemetry API is installed and tracing is enabled; exporters are
+configured the usual way (opentelemetry-instrument or OTEL_* variables).
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import LLMResult
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    """Format a Prometheus label set."""
+    pairs = [
+        '{}="{}"'.format(
+            name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        """Initialize counter."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def render(self) -> List[str]:
+        """Render samples in the text exposition format."""
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labels, key)} {value}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        """Initialize histogram."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            # Per-bucket counts, then sum and count
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+    
+    def render(self) -> List[str]:
+        """Render samples in the text exposition format."""
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    labels = _format_labels(self.labels, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {state[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {state[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Any] = {}
+    
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        """Register (or return the existing) counter."""
+        return self._metrics.setdefault(name, Counter(name, documentation, labels))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Register (or return the existing) histogram."""
+        return self._metrics.setdefault(name, Histogram(name, documentation, labels, buckets))
+    
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def render_gauges(
+    name: str,
+    documentation: str,
+    labels: Tuple[str, ...],
+    samples: Dict[LabelValues, float]
+) -> str:
+    """Render point-in-time values (e.g. cache statistics) as a gauge."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    lines.extend(
+        f"{name}{_format_labels(labels, key)} {value}" for key, value in sorted(samples.items())
+    )
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "knitty_stage_duration_seconds", "Duration of pipeline stages", ("stage", "status")
+)
+PIPELINE_DURATION = REGISTRY.histogram(
+    "knitty_pipeline_duration_seconds", "End-to-end duration of one enhancement", ("status",)
+)
+LLM_DURATION = REGISTRY.histogram(
+    "knitty_llm_request_duration_seconds", "Duration of chat model calls", ("client", "model")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "knitty_llm_tokens_total", "Tokens reported by chat model calls", ("client", "model", "direction")
+)
+LLM_ERRORS = REGISTRY.counter(
+    "knitty_llm_errors_total", "Failed chat model calls", ("client", "model")
+)
+LLM_THROTTLED = REGISTRY.counter(
+    "knitty_llm_throttled_total", "HTTP 429 responses from model providers", ("provider",)
+)
+LLM_LIMITER_WAIT = REGISTRY.histogram(
+    "knitty_llm_limiter_wait_seconds", "Time requests waited for the provider rate limiter",
+    ("provider",)
+)
+EMBEDDING_DURATION = REGISTRY.histogram(
+    "knitty_embedding_request_duration_seconds", "Duration of embedding calls", ("model", "operation")
+)
+EMBEDDING_TEXTS = REGISTRY.counter(
+    "knitty_embedding_texts_total", "Texts sent to the embedding model", ("model",)
+)
+EMBEDDING_ERRORS = REGISTRY.counter(
+    "knitty_embedding_errors_total", "Failed embedding calls", ("model",)
+)
+ENHANCEMENT_ATTEMPTS = REGISTRY.counter(
+    "knitty_enhancement_attempts_total", "Smart LLM generations per enhancement mode", ("mode",)
+)
+RETRY_OUTPUT_TOKENS_SAVED = REGISTRY.counter(
+    "knitty_retry_output_tokens_saved_total",
+    "Estimated Smart LLM output tokens saved by targeted retries over full regeneration"
+)
+
+_tracer = None
+
+
+def configure_tracing(enabled: bool, service_name: str = "knitty") -> None:
+    """Turn OpenTelemetry spans on or off."""
+    global _tracer
+    if not enabled:
+        _tracer = None
+        return
+    if otel_trace is None:
+        logger.warning("OTEL_ENABLED is set but opentelemetry-api is not installed")
+        return
+    _tracer = otel_trace.get_tracer(service_name)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Open an OpenTelemetry span if tracing is enabled."""
+    if _tracer is None:
+        yield
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes):
+        yield
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Records duration, token usage and errors of chat model calls."""
+    
+    run_inline = True
+    
+    def __init__(self, client: str, model: str):
+        """Initialize handler for one LLM client."""
+        self.client = client
+        self.model = model
+        self._started: Dict[UUID, Tuple[float, Any]] = {}
+    
+    def _start(self, run_id: UUID) -> None:
+        context = None
+        if _tracer is not None:
+            context = _tracer.start_span(
+                f"llm.{self.client}", attributes={"llm.model": self.model}
+            )
+        self._started[run_id] = (time.perf_counter(), context)
+    
+    def _finish(self, run_id: UUID) -> Tuple[float, Any]:
+        started, otel_span = self._started.pop(run_id, (time.perf_counter(), None))
+        duration = time.perf_counter() - started
+        LLM_DURATION.observe(duration, client=self.client, model=self.model)
+        return duration, otel_span
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+    
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+    
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        _, otel_span = self._finish(run_id)
+        input_tokens, output_tokens = self._token_usage(response)
+        LLM_TOKENS.inc(input_tokens, client=self.client, model=self.model, direction="input")
+        LLM_TOKENS.inc(output_tokens, client=self.client, model=self.model, direction="output")
+        if otel_span is not None:
+            otel_span.set_attribute("llm.input_tokens", input_tokens)
+            otel_span.set_attribute("llm.output_tokens", output_tokens)
+            otel_span.end()
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        _, otel_span = self._finish(run_id)
+        LLM_ERRORS.inc(client=self.client, model=self.model)
+        if otel_span is not None:
+            otel_span.record_exception(error)
+            otel_span.end()
+    
+    @staticmethod
+    def _token_usage(response: LLMResult) -> Tuple[int, int]:
+        """Read (input, output) tokens from provider usage or message metadata."""
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+        
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    input_tokens += metadata.get("input_tokens", 0)
+                    output_tokens += metadata.get("output_tokens", 0)
+        return input_tokens, output_tokens
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings proxy that times every call and counts embedded texts."""
+    
+    def __init__(self, embeddings: Embeddings, model: str):
+        """Wrap an embeddings client."""
+        self.embeddings = embeddings
+        self.model = model
+    
+    @contextmanager
+    def _measure(self, operation: str, count: int) -> Iterator[None]:
+        started = time.perf_counter()
+        attributes = {"embedding.model": self.model, "embedding.texts": count}
+        with span(f"embedding.{operation}", **attributes):
+            try:
+                yield
+            except Exception:
+                EMBEDDING_ERRORS.inc(model=self.model)
+                raise
+            finally:
+                EMBEDDING_DURATION.observe(
+                    time.perf_counter() - started, model=self.model, operation=operation
+                )
+        EMBEDDING_TEXTS.inc(count, model=self.model)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._measure("documents", len(texts)):
+            return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        with self._measure("query", 1):
+            return self.embeddings.embed_query(text)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._measure("documents", len(texts)):
+            return await self.embeddings.aembed_documents(texts)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        with self._measure("query", 1):
+            return await self.embeddings.aembed_query(text)
+    
+    def __getattr__(self, name: str) -> Any:
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
@@ -7,12 +7,13 @@ This interface is in ALPHA stage and should be considered experimental.
 import streamlit as st
 import asyncio
 import sys
-from pathlib import Path
-import tempfile
+import threading
+import queue
 import json
 import zlib
 import base64
 from knitty.core.pipeline import EnhancementPipeline
+from knitty.core.browser_pool import BrowserPool
 from knitty.config.settings import get_settings
 
 # Page configuration
@@ -77,10 +78,16 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_browser_pool() -> BrowserPool:
+    """Create one browser pool shared by all sessions."""
+    return BrowserPool(get_settings())
+
+
 # Initialize session state
 if "pipeline" not in st.session_state:
     try:
-        st.session_state.pipeline = EnhancementPipeline()
+        st.session_state.pipeline = EnhancementPipeline(browser_pool=get_browser_pool())
         st.session_state.initialized = True
     except Exception as e:
         st.error(f"Failed to initialize pipeline: {e}")
@@ -128,18 +135,49 @@ def generate_gimmecv_url(markdown_cv: str, base_url: str = 'https://gimmecv.crea
     }
 
 
-def run_async(coro):
-    """Run async function in Streamlit."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Start a long-lived event loop shared by all sessions."""
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
     
-    return loop.run_until_complete(coro)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+# Progress shown when a pipeline stage starts: (percent, label)
+STAGE_PROGRESS = {
+    "cv_raw_text": (5, "📄 Extracting CV content..."),
+    "job_fetch": (10, "🌐 Fetching job posting..."),
+    "job_data": (20, "🌐 Processing job posting..."),
+    "cv_keywords": (30, "🔍 Extracting keywords..."),
+    "job_keywords": (40, "🔍 Extracting keywords..."),
+    "baseline_similarity": (55, "📊 Calculating similarity..."),
+    "enhancement": (65, "✨ Enhancing CV..."),
+}
+
+
+def stream_pipeline(pipeline, **kwargs):
+    """Yield pipeline events in the script thread as the background loop produces them."""
+    events: queue.Queue = queue.Queue()
+    done = object()
+    
+    async def consume():
+        try:
+            async for event in pipeline.process_stream(**kwargs):
+                events.put(event)
+        except Exception as e:
+            events.put({"event": "error", "detail": str(e)})
+        finally:
+            events.put(done)
+    
+    asyncio.run_coroutine_threadsafe(consume(), get_event_loop())
+    while True:
+        event = events.get()
+        if event is done:
+            return
+        yield event
 
 
 def main():
@@ -262,49 +300,48 @@ def main():
                 status_text = st.empty()
                 
                 try:
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                        tmp_file.write(cv_file.read())
-                        tmp_path = tmp_file.name
+                    preview = st.empty()
+                    streamed = ""
+                    result = None
                     
-                    try:
-                        status_text.text("📄 Extracting CV content...")
-                        progress_bar.progress(10)
-                        
-                        status_text.text("🌐 Processing job posting...")
-                        progress_bar.progress(30)
-                        
-                        status_text.text("🔍 Extracting keywords...")
-                        progress_bar.progress(50)
-                        
-                        status_text.text("📊 Calculating similarity...")
-                        progress_bar.progress(70)
-                        
-                        status_text.text("✨ Enhancing CV...")
-                        progress_bar.progress(90)
-                        
-                        # Run async pipeline
-                        result = run_async(
-                            st.session_state.pipeline.process(
-                                cv_pdf_path=tmp_path,
-                                job_posting_url=job_posting_url if job_posting_url else None,
-                                job_posting_text=job_posting_text if job_posting_text else None,
-                                additional_info=additional_info if additional_info else None
+                    for event in stream_pipeline(
+                        st.session_state.pipeline,
+                        cv_pdf_path=cv_file.getvalue(),
+                        job_posting_url=job_posting_url if job_posting_url else None,
+                        job_posting_text=job_posting_text if job_posting_text else None,
+                        additional_info=additional_info if additional_info else None
+                    ):
+                        kind = event["event"]
+                        if kind == "stage" and event["status"] == "started":
+                            if event["stage"] in STAGE_PROGRESS:
+                                percent, label = STAGE_PROGRESS[event["stage"]]
+                                progress_bar.progress(percent)
+                                status_text.text(label)
+                        elif kind == "token":
+                            streamed += event["data"]
+                            preview.code(streamed[-2000:], language="markdown")
+                        elif kind == "retry":
+                            streamed = ""
+                            progress_bar.progress(80)
+                            status_text.text("🔁 Improving enhancement...")
+                        elif kind == "candidate":
+                            status_text.text(
+                                f"✨ Candidate {event['attempt']} scored {event['similarity']:.4f}"
                             )
-                        )
-                        
-                        progress_bar.progress(100)
-                        status_text.text("✅ Complete!")
-                        
-                        # Store results
-                        st.session_state.results = result
-                        
-                        st.success("🎉 CV enhancement completed successfully!")
-                        st.balloons()
-                        
-                    finally:
-                        # Clean up
-                        Path(tmp_path).unlink(missing_ok=True)
+                        elif kind == "result":
+                            result = {k: v for k, v in event.items() if k != "event"}
+                        elif kind == "error":
+                            raise RuntimeError(event["detail"])
+                    
+                    preview.empty()
+                    progress_bar.progress(100)
+                    status_text.text("✅ Complete!")
+                    
+                    # Store results
+                    st.session_state.results = result
+                    
+                    st.success("🎉 CV enhancement completed successfully!")
+                    st.balloons()
                 
                 except Exception as e:
                     st.error(f"❌ Error processing CV: {str(e)}")
@@ -386,7 +423,7 @@ def main():
                         
                         # Also provide link in case JavaScript doesn't work
                         st.markdown(f"[Click here if the page didn't open automatically]({gimmecv_result['url']})")
-                        
+                    
                     except Exception as e:
                         st.error(f"Failed to generate GimmeCV URL: {str(e)}")
             